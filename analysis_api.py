@@ -0,0 +1,328 @@
+import io
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from config import Config
+from xml_parser import XMLParser
+from frame_of_discernment import FrameOfDiscernment
+from labelled_matrix import LabelledMatrix
+from weight_calculator import WeightCalculator
+from matrix_processor import MatrixProcessor
+from dempster_combiner import DempsterCombiner
+from belief_plausibility import belief_plausibility_arrays
+from utils import Utils
+from tracer import tracer
+
+
+class Problem:
+    """
+    Задача анализа в памяти: усеченные матрицы парных сравнений по критериям,
+    альтернативы и фрейм различения.
+
+    Создается из словаря (тот же вид, что у JSON входного формата), из XML
+    (путь к файлу, текст или байты) или из готовых матриц. Разобранную задачу
+    можно анализировать многократно с разными весами без повторного чтения.
+
+    Словарь задачи:
+        {
+            "alternatives": ["A", "B", "C"],            (необязательно)
+            "criteria": [
+                {"name": "Цена", "groups": ["A", "B&C", "ALL"],
+                 "matrix": [[1, 0, 3], [0, 1, 2], ["1/3", "1/2", 1]]},
+                ...
+            ]
+        }
+    Для прямоугольной матрицы подписи столбцов задаются ключом "columns".
+    criteria может быть и словарем {название: {"groups": ..., "matrix": ...}}.
+    Значения - числа, строки ('3', '1/3'); None и '' - усеченные (0) сравнения
+    """
+
+    __slots__ = ('criteria', 'alternatives', 'frame')
+
+    def __init__(self, criteria, alternatives=None):
+        """criteria - {критерий: LabelledMatrix или DataFrame} в порядке критериев"""
+        if not criteria:
+            raise ValueError("Задача не содержит ни одного критерия")
+
+        self.criteria = {name: LabelledMatrix.as_labelled(matrix) for name, matrix in criteria.items()}
+
+        groups = set()
+        for matrix in self.criteria.values():
+            groups.update(matrix.row_labels)
+            groups.update(matrix.col_labels)
+
+        all_alternatives = set(alternatives or ())
+        for group in groups:
+            if group != FrameOfDiscernment.ALL:
+                all_alternatives.update(Utils.parse_group_string(group))
+        all_alternatives.discard(FrameOfDiscernment.ALL)
+        if not all_alternatives:
+            raise ValueError("Задача не содержит ни одной альтернативы")
+
+        self.alternatives = tuple(sorted(all_alternatives))
+        self.frame = FrameOfDiscernment(self.alternatives)
+        self.frame.intern_groups(groups)
+
+    @classmethod
+    def load(cls, source):
+        """Задача из Problem, словаря, пути к XML файлу или текста/байтов XML"""
+        if isinstance(source, cls):
+            return source
+        if isinstance(source, dict):
+            return cls.from_dict(source)
+        if isinstance(source, (str, bytes, bytearray, os.PathLike)):
+            return cls.from_xml(source)
+        raise TypeError(f"Неподдерживаемый тип задачи: {type(source).__name__}")
+
+    @classmethod
+    def from_dict(cls, data):
+        criteria = data.get('criteria')
+        if isinstance(criteria, dict):
+            criteria = [dict(spec, name=name) for name, spec in criteria.items()]
+        if not criteria:
+            raise ValueError("Задача не содержит ни одного критерия")
+
+        matrices = {}
+        for spec in criteria:
+            name = spec.get('name')
+            if not name:
+                raise ValueError("Критерий задачи должен иметь название")
+            if name in matrices:
+                raise ValueError(f"Критерий '{name}' задан дважды")
+            rows = spec.get('groups', spec.get('rows'))
+            if not rows or 'matrix' not in spec:
+                raise ValueError(f"Для критерия '{name}' нужны группы и матрица")
+            columns = spec.get('columns', rows)
+            try:
+                matrices[name] = LabelledMatrix(cls.matrix_values(spec['matrix']), rows, columns)
+            except ValueError as e:
+                raise ValueError(f"Матрица критерия '{name}': {e}") from e
+
+        return cls(matrices, data.get('alternatives'))
+
+    @classmethod
+    def from_xml(cls, source):
+        """
+        Задача из XML формата ds_ahp_analysis: путь к файлу, текст или байты.
+        Строка, начинающаяся с '<', считается текстом XML
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        elif isinstance(source, str) and source.lstrip().startswith('<'):
+            source = io.BytesIO(source.encode('utf-8'))
+
+        parser = XMLParser()
+        try:
+            criteria = dict(parser.iter_criteria(source))
+        except ET.ParseError as e:
+            raise ValueError(f"Ошибка парсинга XML: {e}") from e
+
+        return cls(criteria, parser.get_alternatives())
+
+    @classmethod
+    def matrix_values(cls, rows):
+        """Массив float64 из вложенных списков; дроби вида '1/3' разбираются поэлементно"""
+        try:
+            values = np.array(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = np.array([[cls.parse_value(value) for value in row] for row in rows], dtype=np.float64)
+        if values.ndim != 2:
+            raise ValueError("матрица должна быть двумерной")
+        return np.nan_to_num(values, nan=0.0)  # None - усеченное сравнение
+
+    @staticmethod
+    def parse_value(value):
+        if value is None or value == "":
+            return 0.0
+        if isinstance(value, str) and '/' in value:
+            numerator, denominator = value.split('/')
+            return float(numerator) / float(denominator)
+        return float(value)
+
+    def to_dict(self):
+        """Словарь задачи (JSON входной формат)"""
+        criteria = []
+        for name, matrix in self.criteria.items():
+            spec = {'name': name, 'groups': list(matrix.row_labels), 'matrix': matrix.values.tolist()}
+            if matrix.col_labels != matrix.row_labels:
+                spec['columns'] = list(matrix.col_labels)
+            criteria.append(spec)
+        return {'alternatives': list(self.alternatives), 'criteria': criteria}
+
+    def criteria_names(self):
+        return list(self.criteria.keys())
+
+    def __repr__(self):
+        return f"Problem(criteria={self.criteria_names()}, alternatives={list(self.alternatives)})"
+
+
+class AnalysisResult:
+    """
+    Неизменяемый результат анализа.
+
+    Bel, Pl и оценки - массивы NumPy (только для чтения) в порядке alternatives
+    (по алфавиту); ranking_index - индексы альтернатив по убыванию оценки.
+    Словари в формате BeliefPlausibilityCalculator (get_intervals, get_ranking,
+    get_scores, ...) строятся при первом обращении. Как и в калькуляторе,
+    get_intervals возвращает вычисленные [Bel, Pl], по которым получены оценки,
+    а get_reported_intervals и as_dict - интервалы, расширенные на границу
+    погрешности суммаризации
+    """
+
+    __slots__ = ('alternatives', 'belief', 'plausibility', 'scores', 'ranking_index',
+                 'conflict_history', 'optimal_alternative', 'pessimism', 'error_bound', '_views')
+
+    def __init__(self, alternatives, belief, plausibility, scores, ranking_index,
+                 conflict_history, optimal_alternative, pessimism, error_bound=0.0):
+        fields = {
+            'alternatives': tuple(alternatives),
+            'belief': self._frozen(belief, np.float64),
+            'plausibility': self._frozen(plausibility, np.float64),
+            'scores': self._frozen(scores, np.float64),
+            'ranking_index': self._frozen(ranking_index, np.intp),
+            'conflict_history': self._frozen(conflict_history, np.float64),
+            'optimal_alternative': optimal_alternative,
+            'pessimism': float(pessimism),
+            'error_bound': float(error_bound),
+            '_views': {}
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    @staticmethod
+    def _frozen(values, dtype):
+        # Массив поверх неизменяемого буфера bytes: флаг записи нельзя вернуть через setflags
+        array = np.asarray(values, dtype=dtype)
+        return np.frombuffer(array.tobytes(), dtype=dtype).reshape(array.shape)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Результат анализа не изменяется")
+
+    def __delattr__(self, name):
+        raise AttributeError("Результат анализа не изменяется")
+
+    def __reduce__(self):
+        # Для передачи между процессами: восстановление через конструктор
+        return (self.__class__, (self.alternatives, self.belief, self.plausibility, self.scores,
+                                 self.ranking_index, self.conflict_history, self.optimal_alternative,
+                                 self.pessimism, self.error_bound))
+
+    def _view(self, name, build):
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = build()
+        return view
+
+    def get_belief_functions(self):
+        return dict(self._view('belief', lambda: dict(zip(self.alternatives, self.belief.tolist()))))
+
+    def get_plausibility_functions(self):
+        return dict(self._view('plausibility', lambda: dict(zip(self.alternatives, self.plausibility.tolist()))))
+
+    def get_intervals(self):
+        return dict(self._view('intervals', lambda: dict(
+            zip(self.alternatives, zip(self.belief.tolist(), self.plausibility.tolist()))
+        )))
+
+    def get_reported_intervals(self):
+        def build():
+            belief, plausibility = self.belief, self.plausibility
+            if self.error_bound > 0.0:
+                belief = np.maximum(0.0, belief - self.error_bound)
+                plausibility = np.minimum(1.0, plausibility + self.error_bound)
+            return dict(zip(self.alternatives, zip(belief.tolist(), plausibility.tolist())))
+        return dict(self._view('reported_intervals', build))
+
+    def get_scores(self):
+        return dict(self._view('scores', lambda: dict(zip(self.alternatives, self.scores.tolist()))))
+
+    def get_ranking(self):
+        return list(self._view('ranking', lambda: [(self.alternatives[index], float(self.scores[index]))
+                                                   for index in self.ranking_index]))
+
+    def get_conflict_history(self):
+        return self.conflict_history.tolist()
+
+    def as_dict(self):
+        """Результат в виде словаря, как DSAHPAnalyzer.get_results"""
+        return {
+            'optimal_alternative': self.optimal_alternative,
+            'ranking': self.get_ranking(),
+            'intervals': self.get_reported_intervals(),
+            'scores': self.get_scores(),
+            'conflict_history': self.get_conflict_history(),
+            'error_bound': self.error_bound,
+            'pessimism': self.pessimism
+        }
+
+    def __repr__(self):
+        return (f"AnalysisResult(optimal_alternative={self.optimal_alternative!r}, "
+                f"alternatives={len(self.alternatives)}, pessimism={self.pessimism})")
+
+
+def analyze(problem, weights=None, pessimism=None, criteria_matrix=None, kernel=None,
+            max_focal_elements=None, min_focal_mass=None, summarization=None, verbosity='silent'):
+    """
+    Неинтерактивный анализ задачи в памяти без экспорта файлов.
+
+    problem - Problem, словарь задачи, путь к XML файлу или текст XML;
+    weights - {критерий: вес} (ручной метод) или criteria_matrix - матрица парных
+    сравнений критериев в порядке критериев задачи либо {'criteria': [...],
+    'matrix': [[...]]} (автоматический метод); pessimism - коэффициент γ.
+    verbosity - уровень вывода на время анализа (None - не менять).
+    Ошибки входных данных - ValueError. Возвращает AnalysisResult
+    """
+    problem = Problem.load(problem)
+    pessimism = Config.DEFAULT_PESSIMISM_COEFFICIENT if pessimism is None else float(pessimism)
+    if not Config.MIN_PESSIMISM_COEFFICIENT <= pessimism <= Config.MAX_PESSIMISM_COEFFICIENT:
+        raise ValueError(f"Коэффициент пессимизма должен быть в диапазоне "
+                         f"[{Config.MIN_PESSIMISM_COEFFICIENT}, {Config.MAX_PESSIMISM_COEFFICIENT}]")
+    if kernel is not None and kernel not in Config.COMBINATION_KERNELS:
+        raise ValueError(f"Неизвестное ядро комбинирования '{kernel}'")
+    if summarization is not None and summarization not in Config.FOCAL_SUMMARIZATION_METHODS:
+        raise ValueError(f"Неизвестный способ суммаризации '{summarization}'")
+    DempsterCombiner.check_focal_budget(kernel, max_focal_elements, min_focal_mass)
+
+    previous_level, previous_file = tracer.level, tracer.trace_file
+    if verbosity is not None:
+        tracer.configure(verbosity, previous_file)
+
+    try:
+        criteria_names = problem.criteria_names()
+        weight_calculator = WeightCalculator()
+        if criteria_matrix is not None:
+            if isinstance(criteria_matrix, dict):
+                criteria_matrix = weight_calculator.reorder_matrix(
+                    criteria_names, criteria_matrix['criteria'], criteria_matrix['matrix']
+                )
+            criteria_weights = weight_calculator.calculate_weights_from_matrix(criteria_names, criteria_matrix)
+        elif weights is not None:
+            criteria_weights = weight_calculator.set_weights(criteria_names, weights)
+        else:
+            raise ValueError("Нужны веса критериев или матрица сравнения критериев")
+
+        processor = MatrixProcessor(problem.frame)
+        processor.transform_matrices(problem.criteria, criteria_weights)
+        processor.calculate_basic_probabilities()
+
+        combiner = DempsterCombiner(problem.frame, kernel)
+        combiner.set_focal_budget(max_focal_elements, min_focal_mass, summarization)
+        combiner.combine_evidence(processor.get_basic_masses())
+        masses = combiner.get_combined_masses()
+    finally:
+        if verbosity is not None:
+            tracer.configure(previous_level, previous_file)
+
+    belief, plausibility = belief_plausibility_arrays(masses, problem.frame)
+    scores = pessimism * belief + (1 - pessimism) * plausibility
+    # При равных оценках сохраняется порядок альтернатив, как в sorted(..., reverse=True)
+    ranking_index = np.argsort(-scores, kind='stable')
+
+    # Альтернатива с одновременно максимальными Bel и Pl, иначе первая по оценке
+    leaders = np.flatnonzero((belief == belief.max()) & (plausibility == plausibility.max()))
+    optimal = leaders[0] if leaders.size else ranking_index[0]
+
+    return AnalysisResult(problem.alternatives, belief, plausibility, scores, ranking_index,
+                          combiner.get_conflict_history(), problem.alternatives[optimal],
+                          pessimism, combiner.get_error_bound())
@@ -0,0 +1,316 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+from tracer import tracer
+
+
+class AnalysisTimeout(BaseException):
+    """
+    Превышение времени анализа файла. Наследуется от BaseException, чтобы
+    обработчики `except Exception` внутри этапов анализа его не перехватывали
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise AnalysisTimeout("Превышено время анализа файла")
+
+
+def analyze_file(file_path, base_name, settings, pending=None):
+    """
+    Полный анализ одного файла в процессе-обработчике:
+    загрузка -> преобразование -> базовые вероятности -> комбинирование -> Bel/Pl -> ранжирование -> экспорт.
+    Любая ошибка остается внутри результата этого файла.
+    Если передан список pending, запись файлов результатов не ожидается:
+    (результат, анализатор) добавляется в pending и завершается finish_result
+    """
+    from cli import CommandLine  # cli сам импортирует batch_runner
+
+    started = time.perf_counter()
+    result = {
+        'file': file_path,
+        'status': 'error',
+        'optimal_alternative': None,
+        'ranking': [],
+        'intervals': {},
+        'scores': {},
+        'conflict_history': [],
+        'error_bound': 0.0,
+        'input_hash': None,
+        'exported_files': None,
+        'error': None,
+        'elapsed': 0.0
+    }
+
+    # Ограничение времени на файл - сигналом таймера внутри обработчика (только Unix)
+    timeout = settings.get('timeout')
+    use_alarm = bool(timeout) and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = CommandLine().create_analyzer(settings)
+            analyzer.export_base_name = base_name
+            analyzer.defer_export = pending is not None
+            # Внутри обработчика пула ядро tree работает без вложенного пула
+            analyzer.dempster_combiner.set_max_workers(1)
+            optimal_alternative = analyzer.run_headless(
+                file_path,
+                weights=settings['weights'],
+                criteria_matrix=settings['criteria_matrix']
+            )
+            if optimal_alternative is not None and settings.get('pessimism_sweep'):
+                analyzer.run_pessimism_sweep(points=settings['pessimism_sweep'])
+            if optimal_alternative is not None and settings.get('robustness_samples'):
+                # Внутри обработчика пула - без вложенного пула процессов
+                analyzer.run_robustness_analysis(
+                    samples=settings['robustness_samples'],
+                    method=settings['robustness_method'],
+                    max_workers=1
+                )
+
+        result['input_hash'] = analyzer.input_hash
+        if optimal_alternative is None:
+            error = analyzer.last_error
+            result['error'] = str(error) if error else "Не удалось определить оптимальную альтернативу"
+        else:
+            result.update(analyzer.get_results())
+            if pending is not None:
+                pending.append((result, analyzer))
+            else:
+                finish_result(result, analyzer)
+
+    except AnalysisTimeout as e:
+        result['status'] = 'timeout'
+        result['error'] = str(e)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+def finish_result(result, analyzer):
+    """Статус результата файла после завершения записи файлов результатов"""
+    result['exported_files'] = analyzer.finish_export()
+    if result['exported_files']:
+        result['status'] = 'ok'
+    else:
+        result['status'] = 'error'
+        result['error'] = "Ошибка при экспорте результатов"
+
+
+def analyze_chunk(tasks, settings, progress=None):
+    """
+    Анализ группы файлов одним заданием пула (меньше накладных расходов на передачу).
+    Файлы результатов каждого файла пишутся в фоне, пока анализируется следующий.
+    progress - общий словарь {pid процесса: файл, который он сейчас анализирует}
+    для поиска файла, на котором процесс-обработчик завершился аварийно
+    """
+    results = []
+    pending = []
+    for file_path, base_name in tasks:
+        if progress is not None:
+            progress[os.getpid()] = file_path
+        results.append(analyze_file(file_path, base_name, settings, pending))
+        while len(pending) > 1:
+            finish_result(*pending.pop(0))
+
+    for result, analyzer in pending:
+        finish_result(result, analyzer)
+    return results
+
+
+class BatchRunner:
+    """
+    Пакетный анализ каталогов с XML файлами в пуле процессов.
+
+    Файлы распределяются группами по chunk_size между max_workers процессами
+    (по умолчанию - по числу ядер). Ошибка или превышение времени в одном файле
+    не влияет на остальные.
+
+    Аварийное завершение процесса-обработчика (segfault, OOM) ломает весь пул,
+    поэтому пул пересоздается, и незавершенные файлы анализируются заново.
+    Файлы, которые анализировались в момент аварии, затем анализируются по
+    одному в отдельном процессе: ошибкой отмечается только файл, на котором
+    процесс действительно завершился аварийно. Результаты каждого файла экспортируются в отдельные
+    файлы, общая сводка - через ExportFormats.export_batch_summary
+    """
+
+    def __init__(self, settings, max_workers=None, timeout=None, chunk_size=None, recursive=False):
+        self.settings = dict(settings)
+        self.settings['timeout'] = timeout
+        # В обработчиках подробный вывод некуда направить
+        self.settings['verbosity'] = 'silent'
+        self.settings['trace_file'] = None
+        if self.settings.get('kernel') is None:
+            self.settings['kernel'] = Config.COMBINATION_KERNEL_NUMPY
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.recursive = recursive
+        self.results = []
+        self.run_id = None  # Идентификатор последнего запуска пакета (в именах файлов результатов)
+
+    def collect_files(self, paths):
+        """Список XML файлов из переданных файлов и каталогов"""
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                if self.recursive:
+                    for root, _, names in os.walk(path):
+                        files.extend(os.path.join(root, name) for name in sorted(names)
+                                     if name.lower().endswith('.xml'))
+                else:
+                    files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                                 if name.lower().endswith('.xml'))
+            else:
+                files.append(path)
+        return files
+
+    @staticmethod
+    def unique_base_names(files, run_id=None):
+        """
+        Имена файлов результатов без коллизий для одноименных входных файлов:
+        счетчик увеличивается, пока имя занято (в том числе именем другого файла,
+        например x_2.xml). run_id запуска пакета добавляется в конец имени, чтобы
+        следующий пакет в той же папке не перезаписал результаты предыдущего
+        """
+        used = set()  # Без учета регистра: файловая система может его не различать
+        base_names = []
+        for file_path in files:
+            stem = os.path.splitext(os.path.basename(file_path))[0]
+            name = f"{stem}_ranking"
+            count = 1
+            while name.lower() in used:
+                count += 1
+                name = f"{stem}_{count}_ranking"
+            used.add(name.lower())
+            base_names.append(f"{name}_{run_id}" if run_id else name)
+        return base_names
+
+    def get_chunk_size(self, files_count):
+        """Размер группы: по умолчанию около четырех групп на процесс"""
+        if self.chunk_size:
+            return self.chunk_size
+        return max(1, files_count // (self.max_workers * 4))
+
+    def run(self, paths):
+        """Анализ всех файлов. Возвращает список результатов в порядке файлов"""
+        files = self.collect_files(paths)
+        if not files:
+            print("Не найдено XML файлов для анализа")
+            self.results = []
+            return []
+
+        from export_formats import ExportFormats
+        self.run_id = ExportFormats.new_run_id()
+        tasks = list(zip(files, self.unique_base_names(files, self.run_id)))
+        chunk_size = self.get_chunk_size(len(tasks))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+        tracer.summary("Пакетный анализ: {} файлов, {} процессов, по {} файлов в задании",
+                       len(files), self.max_workers, chunk_size)
+
+        results = {}
+        suspects = []  # Файлы, которые анализировались в момент аварии процесса
+        with multiprocessing.Manager() as manager:
+            progress = manager.dict()
+            while chunks or suspects:
+                if chunks:
+                    interrupted = self._run_round(chunks, self.max_workers, progress, results, len(files))
+                    chunks = []
+                    for chunk, current in interrupted:
+                        if current is None:
+                            chunks.append(chunk)
+                            continue
+                        # Файлы до текущего уже были проанализированы, но их результаты
+                        # потеряны вместе с заданием; файлы после него не начинались
+                        rest = [task for task in chunk if task != current]
+                        if rest:
+                            chunks.append(rest)
+                        suspects.append(current)
+
+                    if interrupted and all(current is None for _, current in interrupted):
+                        # Процессы завершаются до начала анализа файлов - повтор не поможет
+                        for chunk, _ in interrupted:
+                            self._mark_crashed(chunk, results)
+                        chunks = []
+                else:
+                    # По одному файлу в единственном процессе: авария указывает на файл точно
+                    interrupted = self._run_round([[task] for task in suspects], 1, progress, results, len(files))
+                    suspects = []
+                    for chunk, current in interrupted:
+                        if current is None:
+                            suspects.extend(chunk)
+                        else:
+                            self._mark_crashed(chunk, results)
+
+        self.results = [results[file_path] for file_path in files]
+        return self.results
+
+    def _run_round(self, chunks, max_workers, progress, results, files_count):
+        """
+        Анализ групп файлов в новом пуле. Результаты записываются в results.
+        Возвращает группы, прерванные аварией пула: [(группа, задача файла,
+        который анализировался в момент аварии, или None)]
+        """
+        broken = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(analyze_chunk, chunk, self.settings, progress): chunk for chunk in chunks}
+
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    for result in future.result():
+                        results[result['file']] = result
+                except BrokenProcessPool:
+                    broken.append(chunk)
+                    continue
+                except Exception as e:
+                    for file_path, _ in chunk:
+                        results[file_path] = self._failed_result(file_path, f"{type(e).__name__}: {e}")
+
+                tracer.summary("  Обработано файлов: {}/{}", len(results), files_count)
+
+        started = set(progress.values())
+        progress.clear()
+        if broken:
+            tracer.summary("Процесс-обработчик завершился аварийно, пул пересоздается")
+        return [(chunk, next((task for task in chunk if task[0] in started), None)) for chunk in broken]
+
+    def _mark_crashed(self, chunk, results):
+        for file_path, _ in chunk:
+            results[file_path] = self._failed_result(file_path, "Процесс-обработчик завершился аварийно")
+
+    @staticmethod
+    def _failed_result(file_path, error):
+        return {
+            'file': file_path, 'status': 'error', 'optimal_alternative': None,
+            'ranking': [], 'intervals': {}, 'scores': {}, 'conflict_history': [],
+            'error_bound': 0.0, 'input_hash': None, 'exported_files': None, 'error': error, 'elapsed': 0.0
+        }
+
+    def export_summary(self):
+        """Сводка по всем файлам в папку результатов"""
+        from export_formats import ExportFormats
+        export_formats = ExportFormats(self.settings['output_dir'])
+        base_filename = None
+        if self.run_id:
+            # Тот же идентификатор, что и в именах файлов результатов пакета
+            base_filename = os.path.join(export_formats.export_dir, f"batch_summary_{self.run_id}")
+        return export_formats.export_batch_summary(self.results, base_filename)
+
+    def get_failed(self):
+        """Файлы, анализ которых завершился ошибкой или по времени"""
+        return [result['file'] for result in self.results if result['status'] != 'ok']
@@ -1,4 +1,31 @@
-from utils import Utils
+import numpy as np
+from config import Config
+from frame_of_discernment import FrameOfDiscernment
+from belief_transforms import BeliefTransformEngine
+from pessimism_sweep import PessimismSweep
+from tracer import tracer
+
+
+def belief_plausibility_arrays(masses, frame):
+    """
+    Bel и Pl одноэлементных множеств всех альтернатив фрейма (в порядке их битов)
+    за один проход по фокальным элементам. Массы прибавляются в порядке фокальных
+    элементов, как в поэлементном расчете, поэтому результаты совпадают до бита
+    """
+    n = frame.size()
+    belief = np.zeros(n, dtype=np.float64)
+    plausibility = np.zeros(n, dtype=np.float64)
+    mask_bytes = (n + 7) // 8
+
+    for mask, mass in masses.items():
+        if mask & (mask - 1) == 0:
+            belief[mask.bit_length() - 1] = mass
+        if mass > Config.PLAUSIBILITY_THRESHOLD:
+            bits = np.unpackbits(np.frombuffer(mask.to_bytes(mask_bytes, 'little'), dtype=np.uint8),
+                                 count=n, bitorder='little')
+            plausibility[bits.view(bool)] += mass
+
+    return belief, plausibility
 
 
 class BeliefPlausibilityCalculator:
@@ -10,39 +37,67 @@ class BeliefPlausibilityCalculator:
         self.optimal_alternative = None
         self.ranking = []
         self.all_alternatives = set()
+        self.frame = None
+        self.transform_engine = None
+        self.error_bound = 0.0
 
-    def calculate_belief_plausibility(self, combined_beliefs, all_alternatives):
+    def calculate_belief_plausibility(self, combined_beliefs, all_alternatives, frame=None, error_bound=0.0):
         """
-        Вычисление функций доверия и правдоподобия
+        Вычисление функций доверия и правдоподобия.
+        combined_beliefs может быть задан как по строкам групп, так и по маскам фрейма.
+        error_bound - граница погрешности Bel/Pl приближенного комбинирования.
+        Ранжирование и анализ чувствительности выполняются по вычисленным Bel и Pl,
+        в выводе и экспорте интервалы расширяются до [Bel - ε, Pl + ε]
         """
-        print("\n" + "=" * 60)
-        print("ВЫЧИСЛЕНИЕ ФУНКЦИЙ ДОВЕРИЯ И ПРАВДОПОДОБИЯ")
-        print("=" * 60)
+        tracer.summary("\n" + "=" * 60)
+        tracer.summary("ВЫЧИСЛЕНИЕ ФУНКЦИЙ ДОВЕРИЯ И ПРАВДОПОДОБИЯ")
+        tracer.summary("=" * 60)
 
         self.belief_functions = {}
         self.plausibility_functions = {}
         self.intervals = {}
+        self.error_bound = error_bound
         self.all_alternatives = set(all_alternatives)  # Сохраняем все альтернативы
+        self.frame = frame if frame is not None else FrameOfDiscernment(self.all_alternatives)
 
-        print("Комбинированные вероятности для вычислений:")
-        for group, prob in combined_beliefs.items():
-            if prob > 0.001:
-                print(f"  m({group}) = {prob:.3f}")
+        # Ключи-маски: принадлежность альтернативы группе - одна проверка бита
+        combined_beliefs = self.frame.to_masses(combined_beliefs)
 
-        print(f"\nАльтернативы: {sorted(self.all_alternatives)}")
+        # Bel/Pl/Q для произвольных групп (таблицы строятся при первом запросе)
+        self.transform_engine = BeliefTransformEngine(self.frame, combined_beliefs)
 
-        # Вычисляем для каждой альтернативы belief and plausibility
-        for alt in sorted(self.all_alternatives):
-            print(f"\n{'─' * 40}")
-            print(f"АЛЬТЕРНАТИВА: {alt}")
-            print(f"{'─' * 40}")
+        if tracer.steps_enabled:
+            tracer.step("Комбинированные вероятности для вычислений:")
+            for mask, prob in combined_beliefs.items():
+                if prob > 0.001:
+                    tracer.step("  m({}) = {:.3f}", self.frame.label_of(mask), prob)
+
+        tracer.step("\nАльтернативы: {}", sorted(self.all_alternatives))
+
+        if tracer.steps_enabled:
+            # Поэлементный расчет с выводом вклада каждой группы
+            for alt in sorted(self.all_alternatives):
+                tracer.step("\n" + "─" * 40)
+                tracer.step("АЛЬТЕРНАТИВА: {}", alt)
+                tracer.step("─" * 40)
 
-            belief = self.calculate_belief(alt, combined_beliefs)
-            plausibility = self.calculate_plausibility(alt, combined_beliefs)
+                self.belief_functions[alt] = self.calculate_belief(alt, combined_beliefs)
+                self.plausibility_functions[alt] = self.calculate_plausibility(alt, combined_beliefs)
+        else:
+            # Bel и Pl всех альтернатив за один проход по фокальным элементам
+            beliefs, plausibilities = belief_plausibility_arrays(combined_beliefs, self.frame)
+            beliefs, plausibilities = beliefs.tolist(), plausibilities.tolist()
+            for alt in sorted(self.all_alternatives):
+                index = self.frame.alternative_bits[alt].bit_length() - 1
+                self.belief_functions[alt] = beliefs[index]
+                self.plausibility_functions[alt] = plausibilities[index]
+
+        for alt in sorted(self.all_alternatives):
+            self.intervals[alt] = (self.belief_functions[alt], self.plausibility_functions[alt])
 
-            self.belief_functions[alt] = belief
-            self.plausibility_functions[alt] = plausibility
-            self.intervals[alt] = (belief, plausibility)
+        if error_bound > 0.0:
+            tracer.summary("\nИнтервалы в выводе и экспорте расширены на границу погрешности "
+                           "суммаризации ε = {:.6f}", error_bound)
 
         return self.belief_functions.copy(), self.plausibility_functions.copy()
 
@@ -51,79 +106,87 @@ class BeliefPlausibilityCalculator:
         Вычисление функции доверия:
         Bel({Ai}) = m({Ai})
         """
-        print("Функция доверия: Bel")
+        tracer.step("Функция доверия: Bel")
 
         belief = 0.0
 
-        single_alt_key = alternative
+        single_alt_key = self.frame.alternative_bits[alternative]
         if single_alt_key in combined_beliefs:
             belief = combined_beliefs[single_alt_key]
-            print(f"  Bel({{{alternative}}}) = m({{{alternative}}}) = {belief:.3f}")
+            tracer.step("  Bel({{{}}}) = m({{{}}}) = {:.3f}", alternative, alternative, belief)
         else:
-            print(f"  Bel({{{alternative}}}) = 0 (m({{{alternative}}}) не найдено)")
+            tracer.step("  Bel({{{}}}) = 0 (m({{{}}}) не найдено)", alternative, alternative)
 
         return belief
 
     def calculate_plausibility(self, alternative, combined_beliefs):
 
-        print("Функция правдоподобия: Pl ")
+        tracer.step("Функция правдоподобия: Pl ")
 
         plausibility = 0.0
         contributing_groups = []
 
-        for group, prob in combined_beliefs.items():
-            if prob > 0.001:
-                group_alts = self.parse_group(group)
+        alternative_bit = self.frame.alternative_bits[alternative]
 
+        for mask, prob in combined_beliefs.items():
+            if prob > Config.PLAUSIBILITY_THRESHOLD:
                 # Pl({Ai}) = сумма всех m(B), где B содержит Ai
-                if alternative in group_alts:
+                if mask & alternative_bit:
                     plausibility += prob
-                    contributing_groups.append((group, prob))
-                    print(f"  + m({group}) = {prob:.3f}")
+                    contributing_groups.append((mask, prob))
+                    if tracer.steps_enabled:
+                        tracer.step("  + m({}) = {:.3f}", self.frame.label_of(mask), prob)
 
-        print(f"  Pl({{{alternative}}}) = {plausibility:.3f}")
+        tracer.step("  Pl({{{}}}) = {:.3f}", alternative, plausibility)
 
         return plausibility
 
-    def parse_group(self, group_str):
+    def bel(self, subset):
         """
-        Парсинг группы альтернатив
+        Функция доверия для произвольной группы, например 'Samsung&Xiaomi'
         """
-        if group_str == 'ALL':
-            return sorted(self.all_alternatives)  # ALL содержит все альтернативы
-        return Utils.parse_group_string(group_str)
+        return self.transform_engine.bel(subset)
+
+    def pl(self, subset):
+        """
+        Функция правдоподобия для произвольной группы
+        """
+        return self.transform_engine.pl(subset)
 
     def find_optimal_alternative(self, pessimism_coef=0.5):
         """
         Поиск оптимальной альтернативы и ранжирование
         """
-        print("\n" + "=" * 60)
-        print("ПОИСК ОПТИМАЛЬНОЙ АЛЬТЕРНАТИВЫ И РАНЖИРОВАНИЕ")
-        print("=" * 60)
-        print(f"Коэффициент пессимизма: γ = {pessimism_coef}")
+        tracer.summary("\n" + "=" * 60)
+        tracer.summary("ПОИСК ОПТИМАЛЬНОЙ АЛЬТЕРНАТИВЫ И РАНЖИРОВАНИЕ")
+        tracer.summary("=" * 60)
+        tracer.summary("Коэффициент пессимизма: γ = {}", pessimism_coef)
 
         if not self.intervals:
             print("❌ Нет данных для сравнения!")
             return None
 
+        # Результат предыдущего вызова (например, до анализа «что если») не используется
+        self.optimal_alternative = None
+
         # Шаг 1: Пытаемся найти лучшую альтернативу по интервалу
-        print("\nШАГ 1: ПОИСК ЛУЧШЕЙ АЛЬТЕРНАТИВЫ ПО ИНТЕРВАЛУ")
+        tracer.step("\nШАГ 1: ПОИСК ЛУЧШЕЙ АЛЬТЕРНАТИВЫ ПО ИНТЕРВАЛУ")
         best_alt_by_interval = self.find_best_by_interval()
 
         if best_alt_by_interval:
             self.optimal_alternative = best_alt_by_interval
-            print(f"Найдена лучшая альтернатива по интервалу: {best_alt_by_interval}")
+            tracer.step("Найдена лучшая альтернатива по интервалу: {}", best_alt_by_interval)
         else:
-            print("Не удалось найти однозначно лучшую альтернативу по интервалу")
+            tracer.step("Не удалось найти однозначно лучшую альтернативу по интервалу")
 
         # Шаг 2: Ранжируем все альтернативы с коэффициентом пессимизма
-        print(f"\nШАГ 2: РАНЖИРОВАНИЕ ВСЕХ АЛЬТЕРНАТИВ С γ = {pessimism_coef}")
+        tracer.step("\nШАГ 2: РАНЖИРОВАНИЕ ВСЕХ АЛЬТЕРНАТИВ С γ = {}", pessimism_coef)
         self.rank_alternatives(pessimism_coef)
 
         # Если не нашли лучшую по интервалу, берем первую из ранжированного списка
         if not self.optimal_alternative and self.ranking:
-            self.optimal_alternative = self.ranking[0]
-            print(f"Лучшая альтернатива по ранжированию: {self.optimal_alternative}")
+            self.optimal_alternative = self.ranking[0][0]
+            tracer.step("Лучшая альтернатива по ранжированию: {}", self.optimal_alternative)
 
         # Финальный вывод
         self.print_final_results(pessimism_coef)
@@ -135,36 +198,36 @@ class BeliefPlausibilityCalculator:
         Поиск альтернативы с максимальным интервалом
         Возвращает альтернативу, если она имеет максимальные Bel и Pl
         """
-        print("Критерий: альтернатива с максимальными Bel и Pl")
+        tracer.step("Критерий: альтернатива с максимальными Bel и Pl")
 
         max_belief = max(self.belief_functions.values())
         max_plausibility = max(self.plausibility_functions.values())
 
-        print(f"Максимальное Bel: {max_belief:.3f}")
-        print(f"Максимальное Pl: {max_plausibility:.3f}")
+        tracer.step("Максимальное Bel: {:.3f}", max_belief)
+        tracer.step("Максимальное Pl: {:.3f}", max_plausibility)
 
         # Ищем альтернативы с максимальным Bel
         alts_with_max_belief = [alt for alt, bel in self.belief_functions.items() if bel == max_belief]
-        print(f"Альтернативы с максимальным Bel: {alts_with_max_belief}")
+        tracer.step("Альтернативы с максимальным Bel: {}", alts_with_max_belief)
 
         # Ищем альтернативы с максимальным Pl
         alts_with_max_pl = [alt for alt, pl in self.plausibility_functions.items() if pl == max_plausibility]
-        print(f"Альтернативы с максимальным Pl: {alts_with_max_pl}")
+        tracer.step("Альтернативы с максимальным Pl: {}", alts_with_max_pl)
 
         # Проверяем, есть ли альтернатива, которая имеет оба максимума
         for alt in alts_with_max_belief:
             if alt in alts_with_max_pl:
-                print(f"Альтернатива {alt} имеет максимальные Bel и Pl")
+                tracer.step("Альтернатива {} имеет максимальные Bel и Pl", alt)
                 return alt
 
-        print("Нет альтернативы с одновременно максимальными Bel и Pl")
+        tracer.step("Нет альтернативы с одновременно максимальными Bel и Pl")
         return None
 
     def rank_alternatives(self, pessimism_coef):
         """
         Ранжирование всех альтернатив с коэффициентом пессимизма
         """
-        print(f"Формула ранжирования: {pessimism_coef}·Bel + (1-{pessimism_coef})·Pl")
+        tracer.step("Формула ранжирования: {}·Bel + (1-{})·Pl", pessimism_coef, pessimism_coef)
 
         self.scores = {}
         for alt in self.intervals.keys():
@@ -173,42 +236,56 @@ class BeliefPlausibilityCalculator:
             score = pessimism_coef * bel + (1 - pessimism_coef) * pl
             self.scores[alt] = score
 
-            print(f"  {alt}: {pessimism_coef}×{bel:.3f} + {1 - pessimism_coef}×{pl:.3f} = {score:.3f}")
+            tracer.step("  {}: {}×{:.3f} + {}×{:.3f} = {:.3f}",
+                        alt, pessimism_coef, bel, 1 - pessimism_coef, pl, score)
 
         # Сортируем альтернативы по убыванию оценки
         self.ranking = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
 
-        print(f"\nРанжирование альтернатив:")
+        tracer.step("\nРанжирование альтернатив:")
+        intervals = self.get_reported_intervals()
         for i, (alt, score) in enumerate(self.ranking, 1):
-            bel, pl = self.intervals[alt]
-            print(f"  {i}. {alt}: {score:.3f} ([{bel:.3f}, {pl:.3f}])")
+            bel, pl = intervals[alt]
+            tracer.step("  {}. {}: {:.3f} ([{:.3f}, {:.3f}])", i, alt, score, bel, pl)
+
+    def sweep_pessimism(self, gammas=None):
+        """
+        Ранжирование для массива значений γ по уже вычисленным интервалам
+        (без повторного анализа): оценки, ранжирования, точки смены ранжирования
+        и оптимальная альтернатива на каждом отрезке
+        """
+        if not self.intervals:
+            print("❌ Нет данных для сравнения!")
+            return None
+        return PessimismSweep(self.intervals).run(gammas)
 
     def print_final_results(self, pessimism_coef):
         """
         Вывод финальных результатов
         """
-        print("\n" + "=" * 60)
-        print("ФИНАЛЬНЫЕ РЕЗУЛЬТАТЫ")
-        print("=" * 60)
+        tracer.summary("\n" + "=" * 60)
+        tracer.summary("ФИНАЛЬНЫЕ РЕЗУЛЬТАТЫ")
+        tracer.summary("=" * 60)
 
-        print("\nИНТЕРВАЛЫ:")
-        for alt in sorted(self.intervals.keys()):
-            bel, pl = self.intervals[alt]
-            print(f"  {alt}: [{bel:.3f}, {pl:.3f}]")
+        intervals = self.get_reported_intervals()
+        tracer.summary("\nИНТЕРВАЛЫ:")
+        for alt in sorted(intervals.keys()):
+            bel, pl = intervals[alt]
+            tracer.summary("  {}: [{:.3f}, {:.3f}]", alt, bel, pl)
 
-        print(f"\nРАНЖИРОВАНИЕ С КОЭФФИЦИЕНТОМ ПЕССИМИЗМА = {pessimism_coef}:")
+        tracer.summary("\nРАНЖИРОВАНИЕ С КОЭФФИЦИЕНТОМ ПЕССИМИЗМА = {}:", pessimism_coef)
         for i, (alt, score) in enumerate(self.ranking, 1):
-            print(f"  {i}. {alt}: {score:.3f}")
+            tracer.summary("  {}. {}: {:.3f}", i, alt, score)
 
-        print(f"\n ОПТИМАЛЬНАЯ АЛЬТЕРНАТИВА: {self.optimal_alternative}")
+        tracer.summary("\n ОПТИМАЛЬНАЯ АЛЬТЕРНАТИВА: {}", self.optimal_alternative)
 
-        if self.optimal_alternative in self.intervals:
-            bel, pl = self.intervals[self.optimal_alternative]
-            print(f"   Интервал: [{bel:.3f}, {pl:.3f}]")
+        if self.optimal_alternative in intervals:
+            bel, pl = intervals[self.optimal_alternative]
+            tracer.summary("   Интервал: [{:.3f}, {:.3f}]", bel, pl)
 
             if self.optimal_alternative in self.scores:
                 score = self.scores[self.optimal_alternative]
-                print(f"   Финальная оценка: {score:.3f}")
+                tracer.summary("   Финальная оценка: {:.3f}", score)
 
     def get_belief_functions(self):
         return self.belief_functions.copy()
@@ -217,10 +294,28 @@ class BeliefPlausibilityCalculator:
         return self.plausibility_functions.copy()
 
     def get_intervals(self):
+        """Интервалы [Bel, Pl], по которым выполняется ранжирование"""
         return self.intervals.copy()
 
+    def get_reported_intervals(self):
+        """Интервалы для вывода и экспорта: [Bel - ε, Pl + ε] с границей погрешности ε"""
+        return self.widen_intervals(self.intervals, self.error_bound)
+
+    @staticmethod
+    def widen_intervals(intervals, error_bound):
+        if error_bound <= 0.0:
+            return dict(intervals)
+        return {alt: (max(0.0, belief - error_bound), min(1.0, plausibility + error_bound))
+                for alt, (belief, plausibility) in intervals.items()}
+
+    def get_error_bound(self):
+        return self.error_bound
+
     def get_scores(self):
         return self.scores.copy()
 
     def get_ranking(self):
-        return self.ranking.copy()
\ No newline at end of file
+        return self.ranking.copy()
+
+    def get_transform_engine(self):
+        return self.transform_engine
\ No newline at end of file
@@ -0,0 +1,152 @@
+import numpy as np
+from config import Config
+
+
+class BeliefTransformEngine:
+    """
+    Функции доверия, правдоподобия и общности для произвольных подмножеств фрейма.
+
+    Для небольших фреймов (не более Config.ZETA_MAX_FRAME_SIZE альтернатив)
+    массы раскладываются в плотный вектор длины 2^n, и быстрое дзета-преобразование
+    за O(n·2^n) сразу дает Bel и Q для всех подмножеств - каждый запрос
+    сводится к обращению по индексу.
+    Для больших фреймов строится индекс фокальных элементов, упорядоченных
+    по мощности, а результаты запросов кэшируются.
+    Таблицы и индекс строятся при первом запросе: анализ, которому не нужны
+    запросы по произвольным группам, их не создает.
+    """
+
+    def __init__(self, frame, masses):
+        self.frame = frame
+        self.n = frame.size()
+        self.masses = frame.to_masses(masses)
+        self.total_mass = sum(self.masses.values())
+        self.dense = self.n <= Config.ZETA_MAX_FRAME_SIZE
+
+        self.belief_vector = None
+        self.commonality_vector = None
+        self.focal_masks = None
+        self._built = False
+        self._cache = {}
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        if self.dense:
+            self._build_dense()
+        else:
+            self._build_index()
+        self._built = True
+
+    def _build_dense(self):
+        """Плотные векторы Bel и Q по всем 2^n подмножествам"""
+        mass_vector = self.to_dense(self.masses, self.n)
+        self.belief_vector = self.zeta_subsets(mass_vector, self.n)
+        self.commonality_vector = self.zeta_supersets(mass_vector, self.n)
+
+    def _build_index(self):
+        """Индекс фокальных элементов, упорядоченных по мощности"""
+        items = sorted(self.masses.items(), key=lambda item: item[0].bit_count())
+        self.focal_masks = np.array([mask for mask, _ in items], dtype=self.frame.mask_dtype())
+        self.focal_values = np.array([prob for _, prob in items], dtype=np.float64)
+        self.focal_sizes = np.array([mask.bit_count() for mask, _ in items], dtype=np.int64)
+
+    @staticmethod
+    def to_dense(masses, n):
+        """Плотный вектор масс длины 2^n (индекс - маска группы)"""
+        vector = np.zeros(1 << n, dtype=np.float64)
+        for mask, prob in masses.items():
+            vector[mask] += prob
+        return vector
+
+    @staticmethod
+    def zeta_subsets(vector, n):
+        """
+        Дзета-преобразование по подмножествам: f(A) = сумма v(B) по всем B ⊆ A.
+        Работает по последней оси, поэтому принимает и стопку векторов
+        """
+        result = np.array(vector, dtype=np.float64, copy=True)
+        for i in range(n):
+            view = result.reshape(result.shape[:-1] + (-1, 2, 1 << i))
+            view[..., 1, :] += view[..., 0, :]
+        return result
+
+    @staticmethod
+    def zeta_supersets(vector, n):
+        """Дзета-преобразование по надмножествам: f(A) = сумма v(B) по всем B ⊇ A"""
+        result = np.array(vector, dtype=np.float64, copy=True)
+        for i in range(n):
+            view = result.reshape(result.shape[:-1] + (-1, 2, 1 << i))
+            view[..., 0, :] += view[..., 1, :]
+        return result
+
+    @staticmethod
+    def mobius_subsets(vector, n):
+        """Обратное (Мёбиуса) преобразование к zeta_subsets: m из Bel"""
+        result = np.array(vector, dtype=np.float64, copy=True)
+        for i in range(n):
+            view = result.reshape(result.shape[:-1] + (-1, 2, 1 << i))
+            view[..., 1, :] -= view[..., 0, :]
+        return result
+
+    @staticmethod
+    def mobius_supersets(vector, n):
+        """Обратное (Мёбиуса) преобразование к zeta_supersets: m из Q"""
+        result = np.array(vector, dtype=np.float64, copy=True)
+        for i in range(n):
+            view = result.reshape(result.shape[:-1] + (-1, 2, 1 << i))
+            view[..., 0, :] -= view[..., 1, :]
+        return result
+
+    def bel(self, subset):
+        """Bel(A) = сумма m(B) по всем непустым B ⊆ A"""
+        mask = self.frame.mask_of(subset)
+        self._ensure_built()
+        if self.dense:
+            return float(self.belief_vector[mask] - self.belief_vector[0])
+        return self._query('bel', mask)
+
+    def pl(self, subset):
+        """Pl(A) = сумма m(B) по всем B, пересекающимся с A"""
+        mask = self.frame.mask_of(subset)
+        self._ensure_built()
+        if self.dense:
+            complement = self.frame.full_mask ^ mask
+            return float(self.total_mass - self.belief_vector[complement])
+        return self._query('pl', mask)
+
+    def q(self, subset):
+        """Функция общности Q(A) = сумма m(B) по всем B ⊇ A"""
+        mask = self.frame.mask_of(subset)
+        self._ensure_built()
+        if self.dense:
+            return float(self.commonality_vector[mask])
+        return self._query('q', mask)
+
+    def interval(self, subset):
+        """Интервал [Bel(A), Pl(A)]"""
+        return self.bel(subset), self.pl(subset)
+
+    def _query(self, kind, mask):
+        """Запрос к индексу фокальных элементов с кэшированием результата"""
+        key = (kind, mask)
+        if key in self._cache:
+            return self._cache[key]
+
+        size = mask.bit_count()
+        if kind == 'bel':
+            # Подмножества A не мощнее A - отсекаем хвост индекса
+            end = np.searchsorted(self.focal_sizes, size, side='right')
+            masks = self.focal_masks[:end]
+            selected = (masks & (self.frame.full_mask ^ mask)) == 0
+            value = float(self.focal_values[:end][selected & (masks != 0)].sum())
+        elif kind == 'q':
+            # Надмножества A не менее мощны, чем A
+            start = np.searchsorted(self.focal_sizes, size, side='left')
+            masks = self.focal_masks[start:]
+            value = float(self.focal_values[start:][(masks & mask) == mask].sum())
+        else:
+            value = float(self.focal_values[(self.focal_masks & mask) != 0].sum())
+
+        self._cache[key] = value
+        return value
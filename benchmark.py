@@ -0,0 +1,262 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from config import Config
+from xml_parser import XMLParser
+from matrix_processor import MatrixProcessor
+from dempster_combiner import DempsterCombiner
+from belief_plausibility import BeliefPlausibilityCalculator
+from export_formats import ExportFormats
+from problem_generator import ProblemGenerator
+from tracer import tracer
+
+
+class Benchmark:
+    """
+    Замеры времени этапов анализа на синтетических задачах разного размера.
+
+    Для каждой точки сетки (альтернативы, критерии, группы на критерий)
+    генерируется задача, и этапы конвейера выполняются по отдельности:
+        parse         - XMLParser.parse_xml_file
+        transform     - MatrixProcessor.transform_matrices
+        probabilities - MatrixProcessor.calculate_basic_probabilities
+        combine       - DempsterCombiner.combine_evidence
+        belief        - calculate_belief_plausibility и find_optimal_alternative
+        export        - ExportFormats.export_to_all_formats
+    Каждая точка повторяется repeats раз, для этапа берется лучшее время.
+    Отчет можно сравнить с сохраненным эталоном (compare), полученным с теми же
+    настройками задач и комбинирования (check_baseline)
+    """
+
+    STAGES = ['parse', 'transform', 'probabilities', 'combine', 'belief', 'export']
+    # Метаданные, от которых зависят сами задачи и ядро комбинирования
+    COMPARABLE_METADATA = ['kernel', 'seed', 'generator_options']
+
+    def __init__(self, grid=None, repeats=None, kernel=None, seed=0, generator_options=None):
+        self.grid = grid or Config.BENCHMARK_GRID
+        self.repeats = repeats or Config.BENCHMARK_REPEATS
+        self.kernel = kernel or Config.DEFAULT_COMBINATION_KERNEL
+        self.seed = seed
+        self.generator_options = generator_options or {}
+
+    @staticmethod
+    def case_key(alternatives, criteria, groups):
+        return f"n{alternatives}_k{criteria}_g{groups}"
+
+    def run_case(self, alternatives, criteria, groups, work_dir):
+        """Лучшее время каждого этапа (с) для одной точки сетки"""
+        generator = ProblemGenerator(alternatives, criteria, groups, seed=self.seed, **self.generator_options)
+        file_path = generator.write(os.path.join(work_dir, f"{self.case_key(alternatives, criteria, groups)}.xml"))
+        weights = generator.criteria_weights()
+        export_formats = ExportFormats(os.path.join(work_dir, 'results'))
+
+        best = dict.fromkeys(self.STAGES, float('inf'))
+        for repeat in range(self.repeats):
+            timings = {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                parser = XMLParser()
+                parser.parse_xml_file(file_path)
+                timings['parse'] = time.perf_counter() - started
+
+                frame = parser.get_frame()
+                processor = MatrixProcessor()
+                processor.set_frame(frame)
+                started = time.perf_counter()
+                processor.transform_matrices(parser.get_criteria_matrices(), weights)
+                timings['transform'] = time.perf_counter() - started
+
+                started = time.perf_counter()
+                processor.calculate_basic_probabilities()
+                timings['probabilities'] = time.perf_counter() - started
+
+                combiner = DempsterCombiner(frame, kernel=self.kernel)
+                started = time.perf_counter()
+                combiner.combine_evidence(processor.get_basic_masses())
+                timings['combine'] = time.perf_counter() - started
+
+                calculator = BeliefPlausibilityCalculator()
+                started = time.perf_counter()
+                calculator.calculate_belief_plausibility(combiner.get_combined_masses(),
+                                                         parser.get_alternatives(), frame)
+                optimal = calculator.find_optimal_alternative(Config.DEFAULT_PESSIMISM_COEFFICIENT)
+                timings['belief'] = time.perf_counter() - started
+
+                started = time.perf_counter()
+                export_formats.export_to_all_formats(
+                    calculator.get_ranking(), calculator.get_reported_intervals(), optimal,
+                    Config.DEFAULT_PESSIMISM_COEFFICIENT,
+                    base_filename=os.path.join(export_formats.export_dir, f"ranking_{repeat}")
+                )
+                timings['export'] = time.perf_counter() - started
+
+            for stage, seconds in timings.items():
+                best[stage] = min(best[stage], seconds)
+
+        best['focal_elements'] = len(combiner.get_combined_masses())
+        return best
+
+    def run(self):
+        """Отчет: метаданные окружения и время этапов для каждой точки сетки"""
+        previous_level = tracer.level
+        tracer.configure('silent')
+
+        cases = []
+        try:
+            with tempfile.TemporaryDirectory(prefix='ds_ahp_benchmark_') as work_dir:
+                for alternatives, criteria, groups in self.grid:
+                    key = self.case_key(alternatives, criteria, groups)
+                    timings = self.run_case(alternatives, criteria, groups, work_dir)
+                    cases.append({
+                        'key': key,
+                        'alternatives': alternatives,
+                        'criteria': criteria,
+                        'groups': groups,
+                        'focal_elements': timings.pop('focal_elements'),
+                        'stages': timings
+                    })
+                    print(f"{key}: " + ", ".join(f"{stage} {seconds * 1000:.1f} мс"
+                                                for stage, seconds in timings.items()))
+        finally:
+            tracer.configure(previous_level)
+
+        return {
+            'metadata': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'repeats': self.repeats,
+                **self.comparable_metadata()
+            },
+            'cases': cases
+        }
+
+    def comparable_metadata(self):
+        return {'kernel': self.kernel, 'seed': self.seed, 'generator_options': self.generator_options}
+
+    def check_baseline(self, baseline):
+        """
+        Расхождения настроек эталона с настройками замеров:
+        [(ключ, значение эталона, текущее значение)]. Пустой список - эталон сравним
+        """
+        metadata = baseline.get('metadata', {})
+        current = self.comparable_metadata()
+        return [(key, metadata.get(key), current[key]) for key in self.COMPARABLE_METADATA
+                if metadata.get(key) != current[key]]
+
+    @staticmethod
+    def compare(report, baseline, tolerance=None, min_seconds=None):
+        """
+        Замедления относительно эталона: этапы, время которых выросло больше чем
+        на tolerance (доля) и больше чем на min_seconds. Точки сетки, которых нет
+        в эталоне, не сравниваются
+        """
+        tolerance = Config.BENCHMARK_TOLERANCE if tolerance is None else tolerance
+        min_seconds = Config.BENCHMARK_MIN_SECONDS if min_seconds is None else min_seconds
+        baseline_cases = {case['key']: case for case in baseline.get('cases', [])}
+
+        regressions = []
+        for case in report['cases']:
+            reference = baseline_cases.get(case['key'])
+            if reference is None:
+                continue
+            for stage, seconds in case['stages'].items():
+                reference_seconds = reference['stages'].get(stage)
+                if reference_seconds is None:
+                    continue
+                if seconds > reference_seconds * (1.0 + tolerance) and seconds - reference_seconds > min_seconds:
+                    regressions.append({
+                        'key': case['key'],
+                        'stage': stage,
+                        'seconds': seconds,
+                        'baseline': reference_seconds,
+                        'ratio': seconds / reference_seconds if reference_seconds > 0 else float('inf')
+                    })
+        return regressions
+
+    @staticmethod
+    def write_report(report, file_path):
+        with ExportFormats.atomic_open(file_path) as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return file_path
+
+
+def parse_grid(text):
+    """Сетка вида '10x3x3,100x5x6' (альтернативы x критерии x группы)"""
+    grid = []
+    for item in text.split(','):
+        alternatives, criteria, groups = (int(value) for value in item.lower().split('x'))
+        grid.append((alternatives, criteria, groups))
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замеры времени этапов анализа ДШ/МАИ на синтетических задачах')
+    parser.add_argument('--grid', type=parse_grid, metavar='NxKxG,...',
+                        help='сетка размеров: альтернативы x критерии x группы на критерий')
+    parser.add_argument('--repeats', type=int, metavar='R',
+                        help=f'повторов на точку сетки (по умолчанию {Config.BENCHMARK_REPEATS})')
+    parser.add_argument('--kernel', choices=Config.COMBINATION_KERNELS, help='ядро комбинирования')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора задач')
+    parser.add_argument('--group-size', dest='max_group_size', type=int, metavar='S',
+                        help='наибольший размер фокальной группы')
+    parser.add_argument('--truncation', type=float, metavar='P', help='доля усеченных сравнений групп')
+    parser.add_argument('--all-probability', dest='all_probability', type=float, metavar='P',
+                        help='вероятность наличия ALL в критерии')
+    parser.add_argument('--output', metavar='FILE', help='JSON файл отчета')
+    parser.add_argument('--baseline', metavar='FILE', help='JSON отчет-эталон для сравнения')
+    parser.add_argument('--tolerance', type=float, metavar='P',
+                        help=f'допустимое замедление этапа (по умолчанию {Config.BENCHMARK_TOLERANCE})')
+    args = parser.parse_args(argv)
+
+    generator_options = {name: getattr(args, name) for name in ('max_group_size', 'truncation', 'all_probability')
+                         if getattr(args, name) is not None}
+    benchmark = Benchmark(args.grid, args.repeats, args.kernel, args.seed, generator_options)
+
+    # Эталон читается и проверяется до замеров: ошибка не должна стоить прогона сетки
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось прочитать эталон '{args.baseline}': {e}")
+            return Config.EXIT_USAGE_ERROR
+
+        mismatches = benchmark.check_baseline(baseline)
+        if mismatches:
+            print(f"Эталон '{args.baseline}' получен с другими настройками:")
+            for key, baseline_value, value in mismatches:
+                print(f"  {key}: эталон {baseline_value!r}, сейчас {value!r}")
+            return Config.EXIT_USAGE_ERROR
+
+    report = benchmark.run()
+
+    if args.output:
+        print(f"Отчет записан в {benchmark.write_report(report, args.output)}")
+
+    if baseline is not None:
+        regressions = benchmark.compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Замедление относительно эталона:")
+            for regression in regressions:
+                print(f"  {regression['key']} {regression['stage']}: {regression['seconds'] * 1000:.1f} мс "
+                      f"(эталон {regression['baseline'] * 1000:.1f} мс, x{regression['ratio']:.2f})")
+            return Config.EXIT_ANALYSIS_FAILED
+        print("Замедлений относительно эталона нет")
+
+    return Config.EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
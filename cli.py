@@ -0,0 +1,339 @@
+import argparse
+import json
+import os
+import time
+from config import Config
+from dempster_combiner import DempsterCombiner
+from ds_ahp_analyzer import DSAHPAnalyzer
+from tracer import tracer
+
+
+class CommandLine:
+    """
+    Неинтерактивный режим: все параметры анализа передаются аргументами
+    командной строки или файлом настроек (JSON), результат - код завершения
+    """
+
+    # Ключи файла настроек совпадают с именами аргументов
+    SETTINGS_KEYS = ['weight_method', 'weights', 'criteria_matrix', 'pessimism',
+                     'output_dir', 'verbosity', 'trace_file', 'kernel', 'streaming',
+                     'max_consistency_ratio', 'pessimism_sweep', 'robustness_samples',
+                     'robustness_method', 'cache_dir', 'cache_size', 'max_focal_elements',
+                     'min_focal_mass', 'summarization', 'result_store', 'instrument', 'profile_file']
+
+    @staticmethod
+    def build_parser():
+        """Описание аргументов командной строки"""
+        parser = argparse.ArgumentParser(
+            prog='main.py',
+            description='Метод ДШ/МАИ (Демпстер-Шейфер / Метод анализа иерархий). '
+                        'Без аргументов запускается интерактивное меню.'
+        )
+        parser.add_argument('xml_files', nargs='+', metavar='XML',
+                            help='XML файлы формата ds_ahp_analysis (в пакетном режиме - и каталоги)')
+        parser.add_argument('--settings', metavar='FILE',
+                            help='JSON файл настроек (аргументы командной строки имеют приоритет)')
+        parser.add_argument('--weight-method', dest='weight_method',
+                            choices=[Config.WEIGHT_METHOD_MANUAL, Config.WEIGHT_METHOD_AUTO],
+                            help='метод расчета весов (по умолчанию определяется по переданным данным)')
+        parser.add_argument('--weights', metavar='FILE',
+                            help='JSON файл с весами критериев: {"критерий": вес, ...}')
+        parser.add_argument('--criteria-matrix', dest='criteria_matrix', metavar='FILE',
+                            help='JSON файл с матрицей сравнения критериев: [[...], ...] '
+                                 'или {"criteria": [...], "matrix": [[...], ...]}')
+        parser.add_argument('--max-cr', dest='max_consistency_ratio', type=float, metavar='CR',
+                            help='отклонять матрицу сравнения критериев с отношением '
+                                 'согласованности выше CR')
+        parser.add_argument('--pessimism', type=float, metavar='GAMMA',
+                            help=f'коэффициент пессимизма '
+                                 f'(по умолчанию {Config.DEFAULT_PESSIMISM_COEFFICIENT})')
+        parser.add_argument('--sweep', dest='pessimism_sweep', type=int, metavar='N',
+                            help='анализ чувствительности ранжирования к γ на сетке из N точек')
+        parser.add_argument('--robustness', dest='robustness_samples', type=int, metavar='N',
+                            help='анализ устойчивости к весам критериев методом Монте-Карло (N выборок)')
+        parser.add_argument('--robustness-method', dest='robustness_method', choices=Config.ROBUSTNESS_METHODS,
+                            help='выборка весов: распределение Дирихле вокруг весов или '
+                                 'возмущение матрицы сравнения критериев (по умолчанию dirichlet)')
+        parser.add_argument('--output-dir', dest='output_dir', metavar='DIR',
+                            help=f'папка для результатов (по умолчанию {Config.DEFAULT_EXPORT_DIR})')
+        parser.add_argument('--verbosity', choices=list(Config.TRACE_LEVEL_NAMES),
+                            help='подробность вывода (по умолчанию summary)')
+        parser.add_argument('--trace-file', dest='trace_file', metavar='FILE',
+                            help='файл для пошагового вывода')
+        parser.add_argument('--store', dest='result_store', metavar='DB',
+                            help='сохранять результаты в базу SQLite (запуски, альтернативы, конфликты)')
+        parser.add_argument('--instrument', choices=Config.INSTRUMENT_MODES,
+                            help='замеры этапов: время и CPU (time) или еще и пик памяти (memory); '
+                                 'добавляются в файлы результатов')
+        parser.add_argument('--profile', dest='profile_file', metavar='FILE',
+                            help='статистика cProfile анализа в файл (только для одного XML файла)')
+        parser.add_argument('--cache-dir', dest='cache_dir', metavar='DIR',
+                            help='дисковый кэш разобранных матриц, базовых вероятностей и комбинирования')
+        parser.add_argument('--cache-size', dest='cache_size', type=float, metavar='MB',
+                            help=f'предельный размер кэша (по умолчанию {Config.DEFAULT_CACHE_SIZE_MB} МБ)')
+        parser.add_argument('--kernel', choices=Config.COMBINATION_KERNELS,
+                            help='ядро комбинирования по правилу Демпстера')
+        parser.add_argument('--max-focal', dest='max_focal_elements', type=int, metavar='N',
+                            help='не более N фокальных элементов после каждого шага комбинирования')
+        parser.add_argument('--min-focal-mass', dest='min_focal_mass', type=float, metavar='M',
+                            help='фокальные элементы с массой меньше M объединяются')
+        parser.add_argument('--summarize', dest='summarization', choices=Config.FOCAL_SUMMARIZATION_METHODS,
+                            help='куда переносится масса лишних фокальных элементов '
+                                 f'(по умолчанию {Config.DEFAULT_FOCAL_SUMMARIZATION})')
+        parser.add_argument('--streaming', action='store_true', default=None,
+                            help='потоковое чтение XML по одному критерию (только с --weights)')
+
+        batch = parser.add_argument_group('пакетный режим (включается автоматически, если передан каталог)')
+        batch.add_argument('--workers', type=int, metavar='N',
+                           help='число процессов (по умолчанию - число ядер); '
+                                'используется и для анализа устойчивости и ядра tree')
+        batch.add_argument('--batch', action='store_true',
+                           help='анализ файлов в пуле процессов со сводкой по всем файлам')
+        batch.add_argument('--timeout', type=float, metavar='SEC',
+                           help='ограничение времени анализа одного файла, с')
+        batch.add_argument('--chunk-size', dest='chunk_size', type=int, metavar='N',
+                           help='число файлов в одном задании пула')
+        batch.add_argument('--recursive', action='store_true',
+                           help='искать XML файлы во вложенных каталогах')
+        return parser
+
+    @staticmethod
+    def load_json(file_path):
+        """Чтение JSON файла"""
+        with open(file_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def resolve_settings(self, args):
+        """
+        Объединение файла настроек и аргументов командной строки.
+        Веса и матрица в файле настроек задаются значениями, в аргументах - путями к файлам
+        """
+        settings = {key: None for key in self.SETTINGS_KEYS}
+
+        if args.settings:
+            file_settings = self.load_json(args.settings)
+            unknown = set(file_settings) - set(self.SETTINGS_KEYS)
+            if unknown:
+                raise ValueError(f"Неизвестные параметры в файле настроек: {sorted(unknown)}")
+            settings.update(file_settings)
+
+        for key in self.SETTINGS_KEYS:
+            value = getattr(args, key)
+            if value is not None:
+                settings[key] = value
+
+        if args.weights:
+            settings['weights'] = self.load_json(args.weights)
+        if args.criteria_matrix:
+            settings['criteria_matrix'] = self.load_json(args.criteria_matrix)
+
+        if settings['weight_method'] is None:
+            if settings['criteria_matrix'] is not None:
+                settings['weight_method'] = Config.WEIGHT_METHOD_AUTO
+            else:
+                settings['weight_method'] = Config.WEIGHT_METHOD_MANUAL
+
+        if settings['weight_method'] == Config.WEIGHT_METHOD_AUTO and settings['criteria_matrix'] is None:
+            raise ValueError("Для автоматического метода требуется --criteria-matrix")
+        if settings['weight_method'] == Config.WEIGHT_METHOD_MANUAL and settings['weights'] is None:
+            raise ValueError("Для ручного метода требуется --weights")
+
+        if settings['pessimism'] is None:
+            settings['pessimism'] = Config.DEFAULT_PESSIMISM_COEFFICIENT
+        if not Config.MIN_PESSIMISM_COEFFICIENT <= settings['pessimism'] <= Config.MAX_PESSIMISM_COEFFICIENT:
+            raise ValueError(f"Коэффициент пессимизма должен быть в диапазоне "
+                             f"[{Config.MIN_PESSIMISM_COEFFICIENT}, {Config.MAX_PESSIMISM_COEFFICIENT}]")
+
+        if settings['max_consistency_ratio'] is not None and settings['max_consistency_ratio'] <= 0:
+            raise ValueError("Допустимое отношение согласованности должно быть положительным")
+
+        if settings['pessimism_sweep'] is not None and settings['pessimism_sweep'] < 2:
+            raise ValueError("Сетка анализа чувствительности должна содержать не менее 2 точек")
+
+        if settings['robustness_samples'] is not None:
+            if settings['robustness_samples'] < 1:
+                raise ValueError("Число выборок анализа устойчивости должно быть положительным")
+            if settings['streaming']:
+                raise ValueError("Анализ устойчивости недоступен в потоковом режиме")
+        if settings['robustness_method'] is None:
+            settings['robustness_method'] = Config.ROBUSTNESS_METHOD_DIRICHLET
+        if (settings['robustness_method'] == Config.ROBUSTNESS_METHOD_JUDGMENTS
+                and settings['weight_method'] != Config.WEIGHT_METHOD_AUTO):
+            raise ValueError("Выборка по суждениям требует матрицы сравнения критериев (--criteria-matrix)")
+
+        if settings['output_dir'] is None:
+            settings['output_dir'] = Config.DEFAULT_EXPORT_DIR
+        if settings['verbosity'] is None:
+            settings['verbosity'] = 'summary'
+        if settings['kernel'] is not None and settings['kernel'] not in Config.COMBINATION_KERNELS:
+            raise ValueError(f"Неизвестное ядро комбинирования: {settings['kernel']}")
+
+        if settings['instrument'] is not None and settings['instrument'] not in Config.INSTRUMENT_MODES:
+            raise ValueError(f"Неизвестный режим замеров: {settings['instrument']}")
+
+        if settings['max_focal_elements'] is not None and settings['max_focal_elements'] < 1:
+            raise ValueError("Бюджет фокальных элементов должен быть не меньше 1")
+        if settings['min_focal_mass'] is not None and not 0.0 <= settings['min_focal_mass'] < 1.0:
+            raise ValueError("Минимальная масса фокального элемента должна быть в диапазоне [0, 1)")
+        if (settings['summarization'] is not None
+                and settings['summarization'] not in Config.FOCAL_SUMMARIZATION_METHODS):
+            raise ValueError(f"Неизвестный способ суммаризации: {settings['summarization']}")
+        DempsterCombiner.check_focal_budget(settings['kernel'], settings['max_focal_elements'],
+                                            settings['min_focal_mass'])
+
+        return settings
+
+    def create_analyzer(self, settings):
+        """Анализатор, настроенный без диалога с пользователем"""
+        analyzer = DSAHPAnalyzer()
+        analyzer.set_weight_method(settings['weight_method'])
+        analyzer.set_pessimism_coefficient(settings['pessimism'])
+        analyzer.set_export_dir(settings['output_dir'])
+        analyzer.set_verbosity(settings['verbosity'], settings['trace_file'])
+        if settings['kernel']:
+            analyzer.dempster_combiner.set_kernel(settings['kernel'])
+        analyzer.dempster_combiner.set_focal_budget(settings['max_focal_elements'], settings['min_focal_mass'],
+                                                    settings['summarization'])
+        analyzer.set_streaming(settings['streaming'])
+        analyzer.set_max_consistency_ratio(settings['max_consistency_ratio'])
+        # Хэш входного файла нужен только хранилищу результатов и кэшу этапов
+        analyzer.set_hash_inputs(bool(settings['result_store']))
+        if settings['cache_dir']:
+            analyzer.set_cache(settings['cache_dir'], settings['cache_size'])
+        if settings['instrument'] or settings['profile_file']:
+            analyzer.set_instrumentation(
+                enabled=settings['instrument'] is not None,
+                memory=settings['instrument'] == Config.INSTRUMENT_MEMORY,
+                profile_file=settings['profile_file']
+            )
+        return analyzer
+
+    def run(self, argv=None):
+        """Запуск анализа всех переданных файлов. Возвращает код завершения"""
+        parser = self.build_parser()
+        args = parser.parse_args(argv)
+
+        try:
+            settings = self.resolve_settings(args)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка в параметрах: {e}")
+            return Config.EXIT_USAGE_ERROR
+
+        batch = args.batch or any(os.path.isdir(path) for path in args.xml_files)
+        if settings['profile_file'] and (batch or len(args.xml_files) > 1):
+            print("Ошибка в параметрах: профиль cProfile записывается только для одного XML файла")
+            return Config.EXIT_USAGE_ERROR
+
+        if batch:
+            return self.run_batch(args, settings)
+
+        failed = []
+        records = []
+        for file_path in args.xml_files:
+            if not os.path.isfile(file_path):
+                print(f"Файл '{file_path}' не найден!")
+                failed.append(file_path)
+                continue
+
+            # Для каждого файла - новый анализатор, чтобы состояние не смешивалось
+            analyzer = self.create_analyzer(settings)
+            analyzer.dempster_combiner.set_max_workers(args.workers)
+            started = time.perf_counter()
+            optimal_alternative = analyzer.run_headless(
+                file_path,
+                weights=settings['weights'],
+                criteria_matrix=settings['criteria_matrix']
+            )
+            records.append(self.result_record(file_path, analyzer, optimal_alternative,
+                                              time.perf_counter() - started))
+            analyzer.profiler.print_report()
+
+            if optimal_alternative is None or analyzer.exported_files is None:
+                failed.append(file_path)
+                continue
+
+            if settings['pessimism_sweep']:
+                analyzer.run_pessimism_sweep(points=settings['pessimism_sweep'])
+                if analyzer.sweep_files is None:
+                    failed.append(file_path)
+                    continue
+
+            if settings['robustness_samples']:
+                try:
+                    analyzer.run_robustness_analysis(
+                        samples=settings['robustness_samples'],
+                        method=settings['robustness_method'],
+                        max_workers=args.workers
+                    )
+                except ValueError as e:
+                    print(f"Ошибка анализа устойчивости для файла '{file_path}': {e}")
+                if analyzer.robustness_files is None:
+                    failed.append(file_path)
+
+        if not self.store_results(settings, records):
+            return Config.EXIT_ANALYSIS_FAILED
+
+        if failed:
+            print(f"Анализ завершился с ошибками для файлов: {failed}")
+            return Config.EXIT_ANALYSIS_FAILED
+        return Config.EXIT_OK
+
+    def run_batch(self, args, settings):
+        """Пакетный анализ в пуле процессов. Возвращает код завершения"""
+        from batch_runner import BatchRunner
+        tracer.configure(settings['verbosity'])
+
+        runner = BatchRunner(
+            settings,
+            max_workers=args.workers,
+            timeout=args.timeout,
+            chunk_size=args.chunk_size,
+            recursive=args.recursive
+        )
+        runner.run(args.xml_files)
+        if not self.store_results(settings, runner.results):
+            return Config.EXIT_ANALYSIS_FAILED
+
+        json_file, csv_file = runner.export_summary()
+        print(f"Сводка пакетного анализа: {json_file}, {csv_file}")
+
+        failed = runner.get_failed()
+        if failed or json_file is None or not runner.results:
+            print(f"Анализ завершился с ошибками для файлов: {failed}")
+            return Config.EXIT_ANALYSIS_FAILED
+        return Config.EXIT_OK
+
+    @staticmethod
+    def result_record(file_path, analyzer, optimal_alternative, elapsed):
+        """Результат анализа файла в формате пакетного режима (для хранилища результатов)"""
+        record = {'file': file_path, 'status': 'error', 'elapsed': elapsed, 'error': None,
+                  'input_hash': analyzer.input_hash}
+        if optimal_alternative is None:
+            error = analyzer.last_error
+            record['error'] = str(error) if error else "Не удалось определить оптимальную альтернативу"
+        else:
+            record.update(analyzer.get_results())
+            record['status'] = 'ok' if analyzer.exported_files else 'error'
+        return record
+
+    @staticmethod
+    def store_results(settings, results):
+        """Запись результатов в хранилище SQLite одной транзакцией (если оно задано)"""
+        if not settings['result_store'] or not results:
+            return True
+
+        import sqlite3
+        from result_store import ResultStore
+
+        try:
+            store = ResultStore(settings['result_store'])
+            try:
+                run_ids = store.add_runs(results, settings)
+            finally:
+                store.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Ошибка записи в хранилище результатов: {e}")
+            return False
+
+        tracer.summary("Результаты сохранены в {} (запуски {}-{})", settings['result_store'], run_ids[0], run_ids[-1])
+        return True
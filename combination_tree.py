@@ -0,0 +1,167 @@
+from dempster_combiner import DempsterCombiner
+
+
+class CombinationTree:
+    """
+    Дерево частичных комбинаций Демпстера над критериями (дерево отрезков).
+
+    Правило Демпстера ассоциативно и коммутативно, поэтому результат можно
+    собирать попарно: листья - распределения масс критериев, каждый внутренний
+    узел - нормированная комбинация двух потомков. Дерево хранится по уровням:
+    levels[0] - листья, levels[h][i] объединяет levels[h-1][2i] и levels[h-1][2i+1]
+    (узел без правого соседа просто повторяет левого).
+
+    Изменение одного критерия пересчитывает только O(log k) узлов на пути к
+    корню; добавление критерия - новый лист справа, удаление - перенос последнего
+    листа на место удаляемого. Каждый узел хранит также произведение (1 - K) по
+    всем комбинациям своего поддерева, так что суммарный конфликт
+    K = 1 - П(1 - K_узла) известен без повторного комбинирования.
+
+    Суммаризация фокальных элементов выполняется после каждого шага
+    последовательного комбинирования, и дерево ее результат не воспроизводит,
+    поэтому комбинирующий объект с бюджетом фокальных элементов не принимается.
+    """
+
+    def __init__(self, frame, combiner=None):
+        self.frame = frame
+        self.combiner = combiner or DempsterCombiner(frame, kernel=None)
+        if self.combiner.budget_enabled():
+            raise ValueError("Дерево комбинирования не поддерживает бюджет фокальных элементов")
+        self.combiner.set_frame(frame)
+        self.criteria = []
+        self.positions = {}  # критерий -> индекс листа
+        self.levels = [[]]
+        self.combinations = 0  # Число выполненных комбинирований (для отчета)
+
+    def build(self, basic_masses):
+        """Построение дерева по распределениям {критерий: {маска: масса}}"""
+        self.criteria = []
+        self.positions = {}
+        self.levels = [[]]
+        self.combinations = 0
+
+        for criterion, masses in basic_masses.items():
+            self.positions[criterion] = len(self.criteria)
+            self.criteria.append(criterion)
+            self.levels[0].append(self._leaf(masses))
+
+        # Уровни снизу вверх
+        while len(self.levels[-1]) > 1:
+            below = self.levels[-1]
+            self.levels.append([self._combine_nodes(below, 2 * i) for i in range((len(below) + 1) // 2)])
+
+    def update(self, criterion, masses):
+        """Замена распределения одного критерия: пересчет узлов на пути к корню"""
+        position = self.positions[criterion]
+        self.levels[0][position] = self._leaf(masses)
+        self._update_path(position)
+
+    def add(self, criterion, masses):
+        """Добавление критерия новым листом справа"""
+        if criterion in self.positions:
+            raise ValueError(f"Критерий '{criterion}' уже есть в дереве комбинирования")
+
+        self.positions[criterion] = len(self.criteria)
+        self.criteria.append(criterion)
+        self.levels[0].append(self._leaf(masses))
+        self._update_path(len(self.criteria) - 1)
+
+    def remove(self, criterion):
+        """
+        Удаление критерия: последний лист переносится на место удаляемого
+        (порядок критериев на результат не влияет), затем последний лист отбрасывается
+        """
+        position = self.positions.pop(criterion)
+        last = len(self.criteria) - 1
+
+        if position != last:
+            moved = self.criteria[last]
+            self.criteria[position] = moved
+            self.positions[moved] = position
+            self.levels[0][position] = self.levels[0][last]
+            self._update_path(position)
+
+        self.criteria.pop()
+        self.levels[0].pop()
+        self._update_path(last)
+
+    def _update_path(self, position):
+        """Пересчет узлов от листа position до корня; лишние узлы справа отбрасываются"""
+        index = position
+        for h in range(1, len(self.levels) + 1):
+            below = self.levels[h - 1]
+            size = (len(below) + 1) // 2
+            if len(below) <= 1:
+                # Корень найден - выше узлов быть не должно
+                del self.levels[h:]
+                return
+
+            if h == len(self.levels):
+                self.levels.append([])
+            level = self.levels[h]
+            del level[size:]
+
+            index //= 2
+            if index < size:
+                node = self._combine_nodes(below, 2 * index)
+                if index < len(level):
+                    level[index] = node
+                else:
+                    level.append(node)
+
+        if not self.levels[0]:
+            self.levels = [[]]
+
+    def _leaf(self, masses):
+        masks, values = self.combiner.to_vectors(self.frame.to_masses(masses))
+        return masks, values, 1.0
+
+    def _combine_nodes(self, below, left):
+        """Узел из пары соседних узлов нижнего уровня"""
+        if left + 1 >= len(below):
+            return below[left]
+
+        masks1, values1, agreement1 = below[left]
+        masks2, values2, agreement2 = below[left + 1]
+        masks, values, conflict = self.combiner.dempster_combination_vectors(masks1, values1, masks2, values2)
+        self.combinations += 1
+        return masks, values, agreement1 * agreement2 * (1.0 - conflict)
+
+    def root(self):
+        return self.levels[-1][0] if self.levels[0] else None
+
+    def get_combined_masses(self):
+        """Комбинация всех критериев {маска: масса}"""
+        root = self.root()
+        if root is None:
+            return {}
+        return self.combiner.from_vectors(root[0], root[1])
+
+    def get_total_conflict(self):
+        """Суммарный конфликт K = 1 - П(1 - K_узла) по всем комбинированиям"""
+        root = self.root()
+        return 0.0 if root is None else 1.0 - root[2]
+
+    def get_node_conflicts(self):
+        """
+        Конфликты всех комбинирований дерева снизу вверх в формате ядра tree:
+        [{'round': уровень, 'criteria': [...], 'conflict': K}]. Собственный
+        конфликт узла: 1 - K = A(узла) / (A(левого) * A(правого))
+        """
+        nodes = []
+        labels = [[criterion] for criterion in self.criteria]
+        for h in range(1, len(self.levels)):
+            below = self.levels[h - 1]
+            for i, node in enumerate(self.levels[h]):
+                left = 2 * i
+                if left + 1 >= len(below):
+                    continue
+                expected = below[left][2] * below[left + 1][2]
+                conflict = 1.0 - node[2] / expected if expected > 0.0 else 1.0
+                nodes.append({'round': h, 'criteria': labels[left] + labels[left + 1], 'conflict': float(conflict)})
+            labels = [labels[left] + (labels[left + 1] if left + 1 < len(labels) else [])
+                      for left in range(0, len(labels), 2)]
+        return nodes
+
+    def get_criteria(self):
+        return self.criteria.copy()
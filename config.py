@@ -20,4 +20,120 @@ class Config:
     # Коэффициент пессимизма по умолчанию
     DEFAULT_PESSIMISM_COEFFICIENT = 0.5
     MIN_PESSIMISM_COEFFICIENT = 0.0
-    MAX_PESSIMISM_COEFFICIENT = 1.0
\ No newline at end of file
+    MAX_PESSIMISM_COEFFICIENT = 1.0
+    PESSIMISM_SWEEP_POINTS = 1001  # Число значений γ при анализе чувствительности
+
+    # Ядро комбинирования по правилу Демпстера
+    COMBINATION_KERNEL_PYTHON = "python"  # Поэлементный цикл с подробным выводом
+    COMBINATION_KERNEL_NUMPY = "numpy"  # Векторизованное ядро NumPy
+    COMBINATION_KERNEL_COMMONALITY = "commonality"  # Все критерии сразу в области функций общности
+    COMBINATION_KERNEL_TREE = "tree"  # Попарное комбинирование деревом в пуле процессов
+    COMBINATION_KERNELS = [COMBINATION_KERNEL_PYTHON, COMBINATION_KERNEL_NUMPY,
+                           COMBINATION_KERNEL_COMMONALITY, COMBINATION_KERNEL_TREE]
+    DEFAULT_COMBINATION_KERNEL = COMBINATION_KERNEL_PYTHON
+
+    # Максимальный размер фрейма для плотного дзета-преобразования (2^n подмножеств)
+    ZETA_MAX_FRAME_SIZE = 20
+
+    # Массы ниже этого порога после обратного преобразования считаются нулевыми
+    COMMONALITY_EPSILON = 1e-12
+
+    # Ядро tree: пары с меньшим числом произведений фокальных элементов
+    # комбинируются в текущем процессе (передача в пул дороже вычисления)
+    TREE_PARALLEL_MIN_PRODUCTS = 20000
+    # Запуск процессов ядра tree: не fork, так как к этому моменту в процессе
+    # уже могут работать потоки (например, пул записи файлов результатов)
+    TREE_START_METHOD = "forkserver"
+
+    # Массы не выше порога не учитываются в функции правдоподобия альтернативы.
+    # Отсечение малых масс выполняется явно бюджетом фокальных элементов
+    # с оценкой погрешности, поэтому здесь массы не отбрасываются
+    PLAUSIBILITY_THRESHOLD = 0.0
+
+    # Бюджет фокальных элементов после каждого шага комбинирования
+    # (None / 0 - без ограничения). Лишние элементы с наименьшими массами
+    # объединяются в один: в их объединение или во весь фрейм (ALL)
+    MAX_FOCAL_ELEMENTS = None
+    MIN_FOCAL_MASS = 0.0
+    FOCAL_SUMMARIZATION_UNION = "union"
+    FOCAL_SUMMARIZATION_ALL = "all"
+    FOCAL_SUMMARIZATION_METHODS = [FOCAL_SUMMARIZATION_UNION, FOCAL_SUMMARIZATION_ALL]
+    DEFAULT_FOCAL_SUMMARIZATION = FOCAL_SUMMARIZATION_UNION
+    # Ядра, применяющие бюджет (commonality и tree комбинируют без промежуточных шагов)
+    FOCAL_BUDGET_KERNELS = [COMBINATION_KERNEL_PYTHON, COMBINATION_KERNEL_NUMPY]
+
+    # Уровни подробности вывода
+    TRACE_SILENT = 0  # Только ошибки и предупреждения
+    TRACE_SUMMARY = 1  # Заголовки шагов и итоговые результаты
+    TRACE_STEPS = 2  # Пошаговый вывод всех промежуточных вычислений
+    TRACE_LEVEL_NAMES = {
+        "silent": TRACE_SILENT,
+        "summary": TRACE_SUMMARY,
+        "steps": TRACE_STEPS
+    }
+    DEFAULT_TRACE_LEVEL = TRACE_STEPS
+
+    # Файл для пошагового вывода (None - стандартный вывод)
+    TRACE_FILE = None
+
+    # Коды завершения неинтерактивного режима
+    EXIT_OK = 0
+    EXIT_ANALYSIS_FAILED = 1
+    EXIT_USAGE_ERROR = 2
+
+    # Папка для результатов по умолчанию
+    DEFAULT_EXPORT_DIR = "results"
+
+    # Потоки записи файлов результатов (форматы пишутся параллельно)
+    EXPORT_THREADS = 4
+
+    # Замеры этапов анализа: только время или время и пик памяти (tracemalloc)
+    INSTRUMENT_TIME = "time"
+    INSTRUMENT_MEMORY = "memory"
+    INSTRUMENT_MODES = [INSTRUMENT_TIME, INSTRUMENT_MEMORY]
+
+    # Генератор синтетических задач (problem_generator.py)
+    GENERATOR_GROUPS_PER_CRITERION = 4
+    GENERATOR_MAX_GROUP_SIZE = 3
+    GENERATOR_TRUNCATION = 1.0  # Доля усеченных сравнений групп между собой
+    GENERATOR_ALL_PROBABILITY = 1.0  # Вероятность наличия ALL в критерии
+
+    # Замеры этапов (benchmark.py): сетка размеров (альтернативы, критерии, группы)
+    BENCHMARK_GRID = [(10, 3, 3), (100, 5, 6), (1000, 8, 10), (5000, 12, 16)]
+    BENCHMARK_REPEATS = 3  # Повторы; для каждого этапа берется лучшее время
+    BENCHMARK_TOLERANCE = 0.25  # Допустимое замедление этапа относительно эталона
+    BENCHMARK_MIN_SECONDS = 0.005  # Замедления меньше этого не считаются (шум таймера)
+
+    # HTTP сервис анализа (service.py)
+    SERVICE_HOST = "127.0.0.1"
+    SERVICE_PORT = 8765
+    SERVICE_WORKERS = None  # Процессов анализа (None - по числу ядер)
+    SERVICE_QUEUE_SIZE = 64  # Анализов в очереди сверх выполняемых; больше - ответ 503
+    SERVICE_MAX_BODY_BYTES = 16 * 1024 * 1024
+    SERVICE_REQUEST_TIMEOUT = 60.0  # Ожидание результата анализа, с (дольше - ответ 504)
+    SERVICE_PROBLEM_CACHE_SIZE = 32  # Разобранных задач в каждом процессе анализа
+    SERVICE_START_METHOD = "forkserver"  # Запуск процессов анализа (не fork: сокеты не наследуются)
+    SERVICE_LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+    # Предельный размер дискового кэша этапов анализа, МБ
+    DEFAULT_CACHE_SIZE_MB = 256
+    CACHE_EVICTION_TARGET = 0.8  # Доля предела, до которой очищается переполненный кэш
+
+    # Главный собственный вектор матрицы сравнения критериев (степенной метод)
+    EIGEN_TOLERANCE = 1e-12  # Максимальное изменение вектора весов между итерациями
+    EIGEN_MAX_ITERATIONS = 1000  # После этого используется np.linalg.eig
+
+    # Согласованность суждений: случайный индекс RI по размеру матрицы (Саати)
+    RANDOM_INDEX = {1: 0.0, 2: 0.0, 3: 0.58, 4: 0.90, 5: 1.12, 6: 1.24, 7: 1.32, 8: 1.41,
+                    9: 1.45, 10: 1.49, 11: 1.51, 12: 1.48, 13: 1.56, 14: 1.57, 15: 1.59}
+    ACCEPTABLE_CONSISTENCY_RATIO = 0.1  # Выше - предупреждение о несогласованности
+
+    # Анализ устойчивости весов критериев методом Монте-Карло
+    ROBUSTNESS_METHOD_DIRICHLET = "dirichlet"  # Веса из распределения Дирихле вокруг заданных
+    ROBUSTNESS_METHOD_JUDGMENTS = "judgments"  # Веса из возмущенной матрицы сравнения критериев
+    ROBUSTNESS_METHODS = [ROBUSTNESS_METHOD_DIRICHLET, ROBUSTNESS_METHOD_JUDGMENTS]
+    DEFAULT_ROBUSTNESS_SAMPLES = 10000
+    ROBUSTNESS_BATCH_SIZE = 2000  # Выборок в одном векторизованном пакете (задании пула)
+    DIRICHLET_CONCENTRATION = 100.0  # Чем больше, тем ближе выборки к заданным весам
+    JUDGMENT_SPREAD = 0.1  # Стандартное отклонение ln-множителя суждения
+    CONFIDENCE_SAMPLES = 2000  # Выборок для коэффициента доверия каждой альтернативы
@@ -1,146 +1,599 @@
-from utils import Utils
+import multiprocessing
+import os
+
+import numpy as np
+from config import Config
+from tracer import tracer
+from frame_of_discernment import FrameOfDiscernment
+from belief_transforms import BeliefTransformEngine
+
+
+def combine_nodes(left, right):
+    """
+    Задание пула ядра tree: комбинирование двух узлов (маски, массы, согласие),
+    где согласие - произведение (1 - K) по всем комбинированиям внутри узла.
+    Возвращает новый узел и конфликт этого комбинирования
+    """
+    masks1, values1, agreement1 = left
+    masks2, values2, agreement2 = right
+    masks, values, conflict = DempsterCombiner().dempster_combination_vectors(masks1, values1, masks2, values2)
+    return (masks, values, agreement1 * agreement2 * (1.0 - conflict)), conflict
+
+
+def node_agreement(left, right):
+    """
+    Задание пула ядра tree: только согласие комбинации двух узлов, без
+    построения и нормировки ее масс
+    """
+    masks1, values1, agreement1 = left
+    masks2, values2, agreement2 = right
+    conflict = DempsterCombiner.conflict_vectors(masks1, values1, masks2, values2)
+    return agreement1 * agreement2 * (1.0 - conflict)
 
 
 class DempsterCombiner:
-    def __init__(self):
+    def __init__(self, frame=None, kernel=None, max_workers=None):
         self.combined_beliefs = {}
+        self.combined_masses = {}
         self.conflict_history = []
+        self.node_conflicts = []  # Конфликты узлов дерева (ядро tree)
+        self.step_statistics = []  # Пары фокальных элементов и размер результата каждого шага
+        self.frame = frame  # Фрейм различения: группы -> маски
+        self.kernel = kernel or Config.DEFAULT_COMBINATION_KERNEL
+        self.max_workers = max_workers  # Процессы ядра tree (None - по числу ядер)
+        self.max_focal_elements = Config.MAX_FOCAL_ELEMENTS
+        self.min_focal_mass = Config.MIN_FOCAL_MASS
+        self.summarization = Config.DEFAULT_FOCAL_SUMMARIZATION
+        self.summarized_mass = []  # Масса, перенесенная суммаризацией на каждом шаге
+        self.error_bound = 0.0  # Граница погрешности Bel/Pl из-за суммаризации
+
+    def set_kernel(self, kernel):
+        """Установить ядро комбинирования (python / numpy / commonality / tree)"""
+        if kernel in Config.COMBINATION_KERNELS:
+            self.check_focal_budget(kernel, self.max_focal_elements, self.min_focal_mass)
+            self.kernel = kernel
+
+    def set_max_workers(self, max_workers):
+        """Установить число процессов ядра tree (1 - без пула процессов)"""
+        self.max_workers = max_workers
+
+    def set_focal_budget(self, max_elements=None, min_mass=None, method=None):
+        """
+        Установить бюджет фокальных элементов: не более max_elements элементов
+        и/или масса не меньше min_mass после каждого шага комбинирования.
+        method - куда переносится масса лишних элементов (union / all)
+        """
+        self.check_focal_budget(self.kernel, max_elements, min_mass)
+        self.max_focal_elements = max_elements
+        self.min_focal_mass = min_mass or 0.0
+        self.summarization = method or Config.DEFAULT_FOCAL_SUMMARIZATION
+
+    def budget_enabled(self):
+        return bool(self.max_focal_elements) or self.min_focal_mass > 0.0
+
+    @staticmethod
+    def check_focal_budget(kernel, max_elements=None, min_mass=None):
+        """Бюджет фокальных элементов применяется только ядрами FOCAL_BUDGET_KERNELS"""
+        kernel = kernel or Config.DEFAULT_COMBINATION_KERNEL
+        if (max_elements or (min_mass or 0.0) > 0.0) and kernel not in Config.FOCAL_BUDGET_KERNELS:
+            raise ValueError(f"Бюджет фокальных элементов не поддерживается ядром '{kernel}' "
+                             f"(доступен для ядер: {', '.join(Config.FOCAL_BUDGET_KERNELS)})")
+
+    def set_frame(self, frame):
+        """Установить фрейм различения"""
+        self.frame = frame
 
     def combine_evidence(self, basic_probabilities):
         """
-        Правило комбинирования Демпстера для объединения свидетельств от разных критериев
+        Правило комбинирования Демпстера для объединения свидетельств от разных критериев.
+        При полном конфликте (K = 1) правило не определено: во всех ядрах результат
+        пуст, а K = 1 записывается для этого и всех следующих шагов и сообщается
+        один раз по истории конфликтов (report_total_conflict)
         """
-        print("\n" + "=" * 60)
-        print("ПРАВИЛО КОМБИНИРОВАНИЯ ДЕМПСТЕРА")
-        print("=" * 60)
+        tracer.summary("\n" + "=" * 60)
+        tracer.summary("ПРАВИЛО КОМБИНИРОВАНИЯ ДЕМПСТЕРА")
+        tracer.summary("=" * 60)
 
         if not basic_probabilities:
             print("Нет базовых вероятностей для комбинирования!")
             return {}
 
         criteria_names = list(basic_probabilities.keys())
-        print(f"Критерии для комбинирования: {criteria_names}")
+        tracer.summary("Критерии для комбинирования: {}", criteria_names)
+
+        # Переводим группы в маски один раз на критерий
+        masses = self.to_masses(basic_probabilities)
+
+        # Результаты предыдущего комбинирования (анализатор используется повторно)
+        self.conflict_history = []
+        self.node_conflicts = []
+        self.summarized_mass = []
+        self.error_bound = 0.0
+        self.step_statistics = []
+        self.check_focal_budget(self.kernel, self.max_focal_elements, self.min_focal_mass)
+
+        if self.kernel == Config.COMBINATION_KERNEL_COMMONALITY:
+            if self.frame.size() <= Config.ZETA_MAX_FRAME_SIZE:
+                current_belief = self._combine_commonality(criteria_names, masses)
+            else:
+                tracer.summary("Фрейм из {} альтернатив слишком велик для области общности, "
+                               "используется ядро '{}'", self.frame.size(), Config.COMBINATION_KERNEL_NUMPY)
+                current_belief = self._combine_sequential(criteria_names, masses, vectorized=True)
+        elif self.kernel == Config.COMBINATION_KERNEL_TREE:
+            current_belief = self._combine_tree(criteria_names, masses)
+        else:
+            vectorized = self.kernel == Config.COMBINATION_KERNEL_NUMPY
+            current_belief = self._combine_sequential(criteria_names, masses, vectorized)
 
+        self.combined_masses = current_belief
+        self.combined_beliefs = self.frame.to_labels(current_belief)
+        self.report_total_conflict()
+        return self.combined_beliefs.copy()
+
+    def report_total_conflict(self):
+        """Сообщение о полном конфликте: первый шаг с K = 1, после которого результат пуст"""
+        if 1.0 in self.conflict_history:
+            tracer.summary("\nВЫСОКИЙ КОНФЛИКТ! K >= 1 на шаге {}: результат комбинирования пуст",
+                           self.conflict_history.index(1.0) + 1)
+
+    def _combine_sequential(self, criteria_names, masses, vectorized):
+        """
+        Последовательное комбинирование критериев слева направо
+        """
         # Начинаем с первого критерия
-        current_belief = basic_probabilities[criteria_names[0]].copy()
-        print(f"\nНачальное состояние (критерий '{criteria_names[0]}'):")
-        self.print_beliefs(current_belief)
+        current_belief = masses[criteria_names[0]].copy()
+        tracer.step("\nНачальное состояние (критерий '{}'):", criteria_names[0])
+        if tracer.steps_enabled:
+            self.print_beliefs(current_belief, tracer.step)
+
+        if vectorized:
+            current_masks, current_values = self.to_vectors(current_belief)
+
+        # L1-расстояние между приближенным и точным распределениями
+        budget = self.budget_enabled()
+        distance = 0.0
 
         # Последовательно комбинируем с остальными критериями
         for i, criterion in enumerate(criteria_names[1:], 1):
-            print(f"\n{'=' * 40}")
-            print(f"КОМБИНИРОВАНИЕ С КРИТЕРИЕМ '{criterion}'")
-            print(f"{'=' * 40}")
+            tracer.step("\n" + "=" * 40)
+            tracer.step("КОМБИНИРОВАНИЕ С КРИТЕРИЕМ '{}'", criterion)
+            tracer.step("=" * 40)
+
+            pairs = len(current_belief) * len(masses[criterion])
+            if vectorized:
+                masks, values = self.to_vectors(masses[criterion])
+                current_masks, current_values, conflict = self.dempster_combination_vectors(
+                    current_masks, current_values, masks, values
+                )
+                current_belief = self.from_vectors(current_masks, current_values)
+                tracer.step("\nКоэффициент конфликтности K = {:.6f}", conflict)
+            else:
+                current_belief, conflict = self.dempster_combination_step(
+                    current_belief, masses[criterion]
+                )
+
+            self.conflict_history.append(conflict)
+
+            if budget:
+                # Нормировка увеличивает накопленную погрешность в 1 / (1 - K) раз
+                distance = distance / (1.0 - conflict) if conflict < 1.0 else 2.0
+                if vectorized:
+                    current_masks, current_values, moved = self.summarize_vectors(current_masks, current_values)
+                    current_belief = self.from_vectors(current_masks, current_values)
+                else:
+                    current_belief, moved = self.summarize_masses(current_belief)
+                distance = min(2.0, distance + 2.0 * moved)
+                self.summarized_mass.append(moved)
+                if moved > 0.0:
+                    tracer.step("\nСуммаризация: перенесена масса {:.6f}, осталось {} фокальных элементов",
+                                moved, len(current_belief))
+
+            self.step_statistics.append({'pairs': pairs, 'focal_elements': len(current_belief)})
+
+            tracer.step("\nРезультат после комбинирования {} критериев:", i + 1)
+            if tracer.steps_enabled:
+                self.print_beliefs(current_belief, tracer.step)
+
+        if budget:
+            self.error_bound = distance / 2.0
+            tracer.summary("\nСуммаризация фокальных элементов: перенесено массы {:.6f}, "
+                           "граница погрешности Bel/Pl = {:.6f}", sum(self.summarized_mass), self.error_bound)
+
+        return current_belief
+
+    def summarize_vectors(self, masks, values):
+        """
+        Суммаризация распределения по бюджету фокальных элементов.
+
+        Элементы с наибольшими массами (не меньше min_focal_mass, не более
+        max_focal_elements - 1) сохраняются, масса остальных переносится на один
+        элемент - их объединение или весь фрейм. Результат менее определен, чем
+        исходное распределение (масса переходит только к надмножествам), а Bel/Pl
+        любого множества меняются не более чем на перенесенную массу δ.
+        Возвращает маски, массы и δ
+        """
+        order = np.argsort(-values, kind='stable')
+        keep = int(np.count_nonzero(values >= self.min_focal_mass))
+        if self.max_focal_elements and len(values) > self.max_focal_elements:
+            keep = min(keep, self.max_focal_elements - 1)
+        if keep >= len(values):
+            return masks, values, 0.0
+
+        kept = np.sort(order[:keep])
+        dropped = order[keep:]
+        if self.summarization == Config.FOCAL_SUMMARIZATION_ALL:
+            target = self.frame.full_mask
+        else:
+            target = np.bitwise_or.reduce(masks[dropped])
+        moved = float(values[dropped][masks[dropped] != target].sum())
+        merged = float(values[dropped].sum())
+
+        masks, values = masks[kept], values[kept].copy()
+        existing = np.flatnonzero(masks == target)
+        if existing.size:
+            values[existing[0]] += merged
+        else:
+            masks = np.append(masks, np.array([target], dtype=masks.dtype))
+            values = np.append(values, merged)
+        return masks, values, moved
 
-            new_belief, conflict = self.dempster_combination_step(
-                current_belief, basic_probabilities[criterion]
+    def summarize_masses(self, belief):
+        """Суммаризация распределения {маска: масса}, возвращает (распределение, δ)"""
+        masks, values, moved = self.summarize_vectors(*self.to_vectors(belief))
+        return self.from_vectors(masks, values), moved
+
+    def _combine_commonality(self, criteria_names, masses):
+        """
+        Комбинирование всех критериев сразу в области функций общности.
+
+        Правило Демпстера - поточечное произведение функций общности Q:
+        массы каждого критерия переводятся в Q одним дзета-преобразованием,
+        все k векторов перемножаются одной редукцией, а результат один раз
+        переводится обратно преобразованием Мёбиуса. Масса пустого множества
+        в ненормированном результате - суммарный конфликт.
+        """
+        n = self.frame.size()
+        tracer.summary("Комбинирование в области общности: {} критериев, 2^{} подмножеств",
+                       len(criteria_names), n)
+
+        stack = np.zeros((len(criteria_names), 1 << n), dtype=np.float64)
+        for i, criterion in enumerate(criteria_names):
+            for mask, prob in masses[criterion].items():
+                stack[i, mask] += prob
+
+        commonality = BeliefTransformEngine.zeta_supersets(stack, n)
+
+        # Накопленные произведения дают и итог, и конфликт после каждого шага:
+        # m(∅) = сумма (-1)^|A| · Q(A) по всем A
+        prefix_products = np.cumprod(commonality, axis=0, out=commonality)
+        signs = np.array([-1.0 if mask.bit_count() % 2 else 1.0 for mask in range(1 << n)])
+        cumulative_conflicts = prefix_products[1:] @ signs
+        # Полный конфликт префикса: Q = 0 на всех непустых подмножествах
+        # (как в последовательных ядрах, K = 1 и на всех следующих шагах)
+        remaining = (prefix_products[1:, 1:] > 0.0).any(axis=1)
+
+        previous_conflict = 0.0
+        for cumulative_conflict, has_mass in zip(cumulative_conflicts, remaining):
+            if has_mass and previous_conflict < 1.0:
+                conflict = 1.0 - (1.0 - cumulative_conflict) / (1.0 - previous_conflict)
+            else:
+                conflict = cumulative_conflict = 1.0
+            self.conflict_history.append(float(conflict))
+            previous_conflict = cumulative_conflict
+
+        unnormalized = BeliefTransformEngine.mobius_supersets(prefix_products[-1], n)
+        total_conflict = float(unnormalized[0]) if prefix_products[-1, 1:].any() else 1.0
+        tracer.summary("\nСуммарный коэффициент конфликтности K = {:.6f}", total_conflict)
+
+        combined = unnormalized / (1.0 - total_conflict) if total_conflict < 1.0 else unnormalized
+
+        # Отбрасываем пустое множество и погрешности округления вокруг нуля
+        focal_masks = np.flatnonzero(combined > Config.COMMONALITY_EPSILON)
+        focal_masks = focal_masks[focal_masks != 0]
+        current_belief = {int(mask): float(combined[mask]) for mask in focal_masks}
+
+        tracer.step("\nРезультат после комбинирования {} критериев:", len(criteria_names))
+        if tracer.steps_enabled:
+            self.print_beliefs(current_belief, tracer.step)
+
+        return current_belief
+
+    def _combine_tree(self, criteria_names, masses):
+        """
+        Комбинирование попарной редукцией: за раунд соседние узлы комбинируются
+        независимо (в пуле процессов), k критериев сводятся за ceil(log2 k) раундов.
+        Правило Демпстера ассоциативно и коммутативно, поэтому корень совпадает с
+        последовательным результатом.
+
+        Конфликт шага i последовательного комбинирования выражается через
+        согласие префиксов: 1 - K_i = A(1..i+1) / A(1..i), где A - произведение
+        (1 - K) по всем комбинированиям префикса. Исключающие префиксы (все
+        критерии левее листа) дает обратный проход по тому же дереву (префиксная
+        сумма Блеллоха) - еще log2 k раундов и не более k комбинирований; для
+        включающих префиксов считается только согласие, а согласие последнего -
+        это согласие корня. Так conflict_history совпадает с последовательным ядром.
+        """
+        k = len(criteria_names)
+        size = 1 << (k - 1).bit_length()
+        tracer.summary("Комбинирование деревом: {} критериев, {} раундов", k, size.bit_length() - 1)
+
+        # Дополнение до степени двойки вакуумными распределениями m(ALL) = 1
+        identity = (np.array([self.frame.full_mask], dtype=self.frame.mask_dtype()),
+                    np.array([1.0]), 1.0)
+        leaves = [(*self.to_vectors(masses[criterion]), 1.0) for criterion in criteria_names]
+        levels = [leaves + [identity] * (size - k)]
+        labels = [[[criterion] for criterion in criteria_names] + [[]] * (size - k)]
+
+        self.node_conflicts = []
+        executor = None
+        try:
+            # Прямой проход: попарная редукция до корня
+            while len(levels[-1]) > 1:
+                below, below_labels = levels[-1], labels[-1]
+                pairs = [(below[i], below[i + 1]) for i in range(0, len(below), 2)]
+                results, executor = self._run_round(pairs, executor)
+                self.step_statistics.extend(
+                    {'pairs': len(left[0]) * len(right[0]), 'focal_elements': len(node[0])}
+                    for (left, right), (node, _) in zip(pairs, results)
+                )
+
+                levels.append([node for node, _ in results])
+                labels.append([below_labels[i] + below_labels[i + 1] for i in range(0, len(below), 2)])
+                for i, (_, conflict) in enumerate(results):
+                    left, right = below_labels[2 * i], below_labels[2 * i + 1]
+                    if left and right:
+                        self.node_conflicts.append({'round': len(levels) - 1, 'criteria': left + right,
+                                                    'conflict': float(conflict)})
+                        tracer.step("  Раунд {}: ({}) ⊕ ({}): K = {:.6f}", len(levels) - 1,
+                                    ', '.join(left), ', '.join(right), conflict)
+
+            # Обратный проход: комбинация всех критериев левее каждого узла.
+            # Префикс левого потомка - префикс родителя, правого - он же ⊕ левый
+            # потомок; комбинирование с вакуумным префиксом и префиксы узлов из
+            # одного дополнения (None) не вычисляются
+            prefixes = [identity]
+            for h in range(len(levels) - 1, 0, -1):
+                below = levels[h - 1]
+                width = 1 << (h - 1)  # Листьев в узле уровня h - 1
+                children = []
+                pairs, positions = [], []
+                for i, prefix in enumerate(prefixes):
+                    children.extend((prefix, None))
+                    if (2 * i + 1) * width >= k:
+                        continue
+                    if prefix is identity:
+                        children[-1] = below[2 * i]
+                    else:
+                        pairs.append((prefix, below[2 * i]))
+                        positions.append(2 * i + 1)
+
+                results, executor = self._run_round(pairs, executor)
+                for position, (node, _) in zip(positions, results):
+                    children[position] = node
+                prefixes = children
+
+            # Включающие префиксы: нужны только их согласия
+            inclusive, executor = self._run_round(
+                [(prefixes[i], levels[0][i]) for i in range(1, k - 1)], executor, node_agreement
             )
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
-            self.conflict_history.append(conflict)
-            current_belief = new_belief
+        masks, values, agreement = levels[-1][0]
+        agreements = [1.0] + inclusive + ([agreement] if k > 1 else [])
+        for previous, current in zip(agreements[:-1], agreements[1:]):
+            self.conflict_history.append(1.0 - current / previous if previous > 0.0 else 1.0)
 
-            print(f"\nРезультат после комбинирования {i + 1} критериев:")
-            self.print_beliefs(current_belief)
+        tracer.summary("\nСуммарный коэффициент конфликтности K = {:.6f}", 1.0 - agreement)
 
-        self.combined_beliefs = current_belief
-        return self.combined_beliefs.copy()
+        current_belief = self.from_vectors(masks, values)
+        tracer.step("\nРезультат после комбинирования {} критериев:", k)
+        if tracer.steps_enabled:
+            self.print_beliefs(current_belief, tracer.step)
+
+        return current_belief
+
+    def _run_round(self, pairs, executor, task=combine_nodes):
+        """
+        Один раунд ядра tree: независимые комбинирования пар узлов
+        (task - combine_nodes или node_agreement).
+        Пул процессов создается при первом раунде, где передача узлов окупается
+        (число произведений фокальных элементов не меньше TREE_PARALLEL_MIN_PRODUCTS)
+        """
+        max_workers = self.max_workers or os.cpu_count() or 1
+        largest = max((len(left[0]) * len(right[0]) for left, right in pairs), default=0)
+        if max_workers <= 1 or len(pairs) < 2 or largest < Config.TREE_PARALLEL_MIN_PRODUCTS:
+            return [task(left, right) for left, right in pairs], executor
+
+        if executor is None:
+            # Пул служит и более широким раундам обратного прохода - по max_workers процессов
+            from concurrent.futures import ProcessPoolExecutor
+            method = Config.TREE_START_METHOD
+            if method not in multiprocessing.get_all_start_methods():
+                method = 'spawn'
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+        lefts, rights = zip(*pairs)
+        return list(executor.map(task, lefts, rights)), executor
+
+    def load_results(self, combined_beliefs, conflict_history, error_bound=0.0):
+        """Восстановление результата комбинирования (например, из кэша)"""
+        self.combined_masses = self.frame.to_masses(combined_beliefs)
+        self.combined_beliefs = self.frame.to_labels(self.combined_masses)
+        self.conflict_history = list(conflict_history)
+        self.node_conflicts = []
+        self.summarized_mass = []
+        self.step_statistics = []
+        self.error_bound = error_bound
+
+    def to_masses(self, basic_probabilities):
+        """
+        Перевод базовых вероятностей всех критериев в распределения по маскам.
+        Если фрейм не задан, он строится по встреченным группам
+        """
+        if self.frame is None:
+            groups = [group for probs in basic_probabilities.values() for group in probs
+                      if isinstance(group, str)]
+            self.frame = FrameOfDiscernment.from_groups(groups)
+
+        return {criterion: self.frame.to_masses(probs)
+                for criterion, probs in basic_probabilities.items()}
 
     def dempster_combination_step(self, belief1, belief2):
         """
-        Один шаг комбинирования по правилу Демпстера
+        Один шаг комбинирования по правилу Демпстера.
+        Распределения заданы по маскам групп: пересечение - побитовое И
         """
 
         new_belief = {}
         conflict = 0.0
 
-        print(f"\nВычисление произведений и пересечений:")
+        trace_steps = tracer.steps_enabled
+        tracer.step("\nВычисление произведений и пересечений:")
 
         # Проходим по всем парам групп из двух источников
-        for group1, prob1 in belief1.items():
-            for group2, prob2 in belief2.items():
+        for mask1, prob1 in belief1.items():
+            for mask2, prob2 in belief2.items():
                 product = prob1 * prob2
-                intersection = self.intersect_groups(group1, group2)
-                intersection_key = self.format_intersection(intersection)
+                intersection = mask1 & mask2
 
-                print(f"\n  m1({group1}) × m2({group2}) = {prob1:.4f} × {prob2:.4f} = {product:.6f}")
-                print(f"  Пересечение: {group1} ∩ {group2} = {intersection_key}")
+                if trace_steps:
+                    group1 = self.frame.label_of(mask1)
+                    group2 = self.frame.label_of(mask2)
+                    tracer.step("\n  m1({}) × m2({}) = {:.4f} × {:.4f} = {:.6f}",
+                                group1, group2, prob1, prob2, product)
+                    tracer.step("  Пересечение: {} ∩ {} = {}",
+                                group1, group2, self.frame.label_of(intersection))
 
                 if intersection:  # Если пересечение не пустое
-                    new_belief[intersection_key] = new_belief.get(intersection_key, 0) + product
-                    print(f"  Добавляем к m_comb({intersection_key})")
+                    new_belief[intersection] = new_belief.get(intersection, 0) + product
+                    if trace_steps:
+                        tracer.step("  Добавляем к m_comb({})", self.frame.label_of(intersection))
                 else:
                     conflict += product
-                    print(f"  КОНФЛИКТ! Добавляем к K: {product:.6f}")
+                    if trace_steps:
+                        tracer.step("  КОНФЛИКТ! Добавляем к K: {:.6f}", product)
+
+        # Не осталось массы ни на одном непустом пересечении - полный конфликт
+        if not any(value > 0.0 for value in new_belief.values()):
+            conflict = 1.0
 
-        print(f"\nКоэффициент конфликтности K = {conflict:.6f}")
+        tracer.step("\nКоэффициент конфликтности K = {:.6f}", conflict)
 
         # Нормировка с учетом конфликта
         if conflict < 1.0:  # Избегаем деления на 0
             normalization_factor = 1.0 - conflict
 
-            for group in list(new_belief.keys()):
-                old_value = new_belief[group]
+            for mask in list(new_belief.keys()):
+                old_value = new_belief[mask]
                 new_value = old_value / normalization_factor
-                new_belief[group] = new_value
-                print(f"  m_comb({group}) = {old_value:.6f} ÷ {normalization_factor:.6f} = {new_value:.6f}")
-        else:
-            print("ВЫСОКИЙ КОНФЛИКТ! K >= 1")
+                new_belief[mask] = new_value
+                if trace_steps:
+                    tracer.step("  m_comb({}) = {:.6f} ÷ {:.6f} = {:.6f}", self.frame.label_of(mask),
+                                old_value, normalization_factor, new_value)
 
         return new_belief, conflict
 
-    def intersect_groups(self, group1_str, group2_str):
+    def dempster_combination_vectors(self, masks1, values1, masks2, values2):
         """
-        Нахождение пересечения двух групп альтернатив
+        Векторизованный шаг комбинирования по правилу Демпстера.
+
+        Распределения заданы парами массивов (маски фокальных элементов, массы).
+        Все произведения масс вычисляются одним внешним произведением, пересечения -
+        одним побитовым И, а массы одинаковых пересечений суммируются через bincount.
+        Возвращает маски и массы результата и коэффициент конфликтности K
         """
-        # ALL пересекается с любой группой дает эту группу
-        if group1_str == 'ALL':
-            return self.parse_group(group2_str)
-        if group2_str == 'ALL':
-            return self.parse_group(group1_str)
+        products = np.multiply.outer(values1, values2).ravel()
+        intersections = np.bitwise_and.outer(masks1, masks2).ravel()
 
-        # Парсим группы
-        group1 = self.parse_group(group1_str)
-        group2 = self.parse_group(group2_str)
+        focal_masks, inverse = np.unique(intersections, return_inverse=True)
+        combined = np.bincount(inverse.ravel(), weights=products, minlength=len(focal_masks))
 
-        # Находим пересечение
-        intersection = list(set(group1) & set(group2))
-        return sorted(intersection) if intersection else []
+        # Пустое пересечение (маска 0) - это конфликт
+        empty = focal_masks == 0
+        conflict = float(combined[empty].sum())
+        focal_masks = focal_masks[~empty]
+        combined = combined[~empty]
 
-    def parse_group(self, group_str):
+        # Не осталось массы ни на одном непустом пересечении - полный конфликт
+        if not np.any(combined > 0.0):
+            conflict = 1.0
+
+        # При K = 1 массы не нормируются; сообщение - в report_total_conflict
+        if conflict < 1.0:
+            combined = combined / (1.0 - conflict)
+
+        return focal_masks, combined, conflict
+
+    @staticmethod
+    def conflict_vectors(masks1, values1, masks2, values2):
         """
-        Парсинг группы альтернатив
+        Только коэффициент конфликтности K шага комбинирования векторов
+        (как в dempster_combination_vectors, включая K = 1 при полном конфликте)
         """
-        if group_str == 'ALL':
-            return ['ALL']
-        return Utils.parse_group_string(group_str)
+        products = np.multiply.outer(values1, values2)
+        nonempty = np.bitwise_and.outer(masks1, masks2) != 0
+        if not np.any(products[nonempty] > 0.0):
+            return 1.0
+        return float(products[~nonempty].sum())
+
+    def to_vectors(self, masses):
+        """
+        Перевод распределения {маска: масса} в массивы масок и масс.
+        Для фреймов шире 63 альтернатив маски хранятся как объекты Python int
+        """
+        masks = np.array(list(masses.keys()), dtype=self.frame.mask_dtype())
+        values = np.array(list(masses.values()), dtype=np.float64)
+        return masks, values
+
+    def from_vectors(self, masks, values):
+        """Перевод массивов масок и масс обратно в словарь"""
+        return {int(mask): float(value) for mask, value in zip(masks, values)}
 
-    def format_intersection(self, intersection):
+    def intersect_groups(self, group1_str, group2_str):
         """
-        Форматирование пересечения в строку
+        Нахождение пересечения двух групп альтернатив
         """
-        if not intersection:
-            return "∅"
-        if intersection == ['ALL']:
-            return 'ALL'
-        return '&'.join(sorted(intersection))
+        intersection = self.frame.mask_of(group1_str) & self.frame.mask_of(group2_str)
+        if intersection == self.frame.full_mask:
+            return ['ALL']
+        return self.frame.members_of(intersection)
 
-    def print_beliefs(self, beliefs):
-        """Вывод вероятностей"""
+    def print_beliefs(self, beliefs, write=print):
+        """Вывод вероятностей (write - функция вывода строки, например tracer.step)"""
         total = 0.0
         for group, prob in sorted(beliefs.items(), key=lambda x: x[1], reverse=True):
             if prob > 0.000001:  # Показываем только значимые вероятности
-                print(f"  m({group}) = {prob:.6f}")
+                if self.frame is not None:
+                    group = self.frame.label_of(self.frame.mask_of(group))
+                write(f"  m({group}) = {prob:.6f}")
                 total += prob
-        print(f"  Сумма: {total:.6f}")
+        write(f"  Сумма: {total:.6f}")
 
     def get_combined_beliefs(self):
         """Получить комбинированные вероятности"""
         return self.combined_beliefs.copy()
 
+    def get_combined_masses(self):
+        """Получить комбинированные вероятности с ключами-масками групп"""
+        return self.combined_masses.copy()
+
     def get_conflict_history(self):
         """Получить историю конфликтов"""
         return self.conflict_history.copy()
 
+    def get_error_bound(self):
+        """Граница погрешности Bel/Pl из-за суммаризации фокальных элементов"""
+        return self.error_bound
+
+    def get_step_statistics(self):
+        """Число пар фокальных элементов и размер результата каждого комбинирования"""
+        return [dict(step) for step in self.step_statistics]
+
+    def get_node_conflicts(self):
+        """Получить конфликты узлов дерева комбинирования (ядро tree)"""
+        return [dict(node) for node in self.node_conflicts]
+
     def print_combination_report(self):
         """Отчет о комбинировании"""
         print("\n" + "=" * 60)
@@ -151,5 +604,10 @@ class DempsterCombiner:
         for i, conflict in enumerate(self.conflict_history, 1):
             print(f"  Шаг {i}: K = {conflict:.6f}")
 
+        if self.node_conflicts:
+            print("\nКонфликты узлов дерева комбинирования:")
+            for node in self.node_conflicts:
+                print(f"  Раунд {node['round']}: {' ⊕ '.join(node['criteria'])}: K = {node['conflict']:.6f}")
+
         print(f"\nФинальные комбинированные вероятности:")
         self.print_beliefs(self.combined_beliefs)
\ No newline at end of file
@@ -6,7 +6,13 @@ from dempster_combiner import DempsterCombiner
 from belief_plausibility import BeliefPlausibilityCalculator
 
 from config import Config
-from export_formats import ExportFormats
+from instrumentation import StageProfiler
+from tracer import tracer
+from utils import Utils
+
+# Экспорт, кэш, дерево комбинирования, анализ чувствительности и устойчивости
+# импортируются при первом использовании: ядру анализа они не нужны, а запуск
+# короткоживущих процессов-обработчиков должен быть быстрым
 
 
 
@@ -16,7 +22,8 @@ class DSAHPAnalyzer:
         self.weight_calculator = WeightCalculator()
         self.matrix_processor = MatrixProcessor()
         self.dempster_combiner = DempsterCombiner()
-        self.export_formats = ExportFormats()
+        self.export_dir = Config.DEFAULT_EXPORT_DIR
+        self._export_formats = None
         self.belief_calculator = BeliefPlausibilityCalculator()
         self.weight_method = Config.WEIGHT_METHOD_MANUAL
         self.pessimism_coefficient = Config.DEFAULT_PESSIMISM_COEFFICIENT
@@ -24,6 +31,20 @@ class DSAHPAnalyzer:
         self.criteria_weights = {}
         self.basic_probabilities = {}
         self.combined_beliefs = {}
+        self.exported_files = None
+        self.defer_export = False  # Не ждать записи файлов результатов (см. finish_export)
+        self.pending_export = None
+        self.sweep_files = None
+        self.robustness_files = None
+        self.combination_tree = None  # Дерево частичных комбинаций для пересчета по одному критерию
+        self.stage_cache = None
+        self.profiler = StageProfiler()  # Замеры этапов (выключены по умолчанию)
+        self.cache_keys = {}  # Ключи кэша этапов текущего анализа
+        self.input_hash = None  # Хэш содержимого файла, прочитанного при загрузке
+        self.hash_inputs = False  # Хэшировать входные файлы и без кэша этапов (для хранилища результатов)
+        self.export_base_name = None
+        self.last_error = None
+        self.streaming = False
 
     def set_weight_method(self, method):
         """Установить метод расчета весов"""
@@ -37,6 +58,68 @@ class DSAHPAnalyzer:
             return True
         return False
 
+    def set_streaming(self, streaming):
+        """Включить потоковую загрузку XML в неинтерактивном режиме (только для готовых весов)"""
+        self.streaming = bool(streaming)
+
+    def set_max_consistency_ratio(self, max_consistency_ratio):
+        """Установить допустимое отношение согласованности CR (автоматический метод)"""
+        self.weight_calculator.set_max_consistency_ratio(max_consistency_ratio)
+
+    def set_hash_inputs(self, enabled):
+        """
+        Вычислять хэш входного файла при загрузке (нужен хранилищу результатов).
+        При включенном кэше этапов хэш вычисляется всегда - это ключ кэша
+        """
+        self.hash_inputs = bool(enabled)
+
+    def set_cache(self, cache_dir, max_size_mb=None):
+        """Включить дисковый кэш этапов анализа (None - выключить)"""
+        if cache_dir:
+            from stage_cache import StageCache
+            self.stage_cache = StageCache(cache_dir, max_size_mb)
+        else:
+            self.stage_cache = None
+
+    def set_instrumentation(self, enabled=True, memory=True, profile_file=None):
+        """
+        Включить замеры этапов: время, CPU и пик памяти (memory - через tracemalloc).
+        profile_file - файл для статистики cProfile всего анализа
+        """
+        self.profiler = StageProfiler(enabled, memory, profile_file)
+
+    def set_export_dir(self, export_dir, base_name=None):
+        """
+        Установить папку для сохранения результатов.
+        base_name - имя файлов без расширения (по умолчанию ranking_<время>)
+        """
+        self.export_dir = export_dir
+        self._export_formats = None
+        self.export_base_name = base_name
+
+    @property
+    def export_formats(self):
+        """Экспорт в файлы (создается вместе с папкой результатов при первом экспорте)"""
+        if self._export_formats is None:
+            from export_formats import ExportFormats
+            self._export_formats = ExportFormats(self.export_dir)
+        return self._export_formats
+
+    def set_verbosity(self, level, trace_file=None):
+        """Установить уровень подробности вывода (silent / summary / steps) и файл трассировки"""
+        tracer.configure(level, trace_file)
+
+    def reset_run_state(self):
+        """
+        Сброс состояния предыдущего анализа: матриц критериев, результатов
+        шагов 3-4 и дерева комбинирования. Иначе критерии прошлого файла
+        попадают в анализ следующего
+        """
+        self.criteria_matrices = {}
+        self.matrix_processor.reset()
+        self.combination_tree = None
+        self.input_hash = None
+
     def get_weight_method_name(self):
         """Получить название метода расчета весов"""
         return Config.WEIGHT_METHOD_NAMES.get(self.weight_method, "Неизвестный")
@@ -45,6 +128,32 @@ class DSAHPAnalyzer:
         """Получить коэффициент пессимизма"""
         return self.pessimism_coefficient
 
+    def finish_export(self):
+        """
+        Ожидание отложенного экспорта (defer_export). Возвращает пути к файлам
+        (XML, JSON, CSV) или None при ошибке
+        """
+        if self.pending_export is not None:
+            files = self.export_formats.collect(self.pending_export)
+            self.pending_export = None
+            self.exported_files = None if None in files else files
+        return self.exported_files
+
+    def get_results(self):
+        """Результаты последнего анализа (для пакетного режима и хранилища результатов)"""
+        calculator = self.belief_calculator
+        return {
+            'optimal_alternative': calculator.optimal_alternative,
+            'ranking': calculator.get_ranking(),
+            'intervals': calculator.get_reported_intervals(),
+            'scores': calculator.get_scores(),
+            'conflict_history': self.dempster_combiner.get_conflict_history(),
+            'error_bound': calculator.get_error_bound(),
+            'input_hash': self.input_hash,
+            'exported_files': self.exported_files,
+            'instrumentation': self.profiler.report()
+        }
+
     def get_xml_file_path(self):
         """Получение пути к XML файлу от пользователя"""
         print("\n" + "=" * 60)
@@ -77,11 +186,13 @@ class DSAHPAnalyzer:
         1) Загрузка усеченных матриц
         2) Расчет весов критериев
         """
-        print("\n=== Шаг 1: Загрузка усеченных матриц парных сравнений ===")
+        tracer.summary("\n=== Шаг 1: Загрузка усеченных матриц парных сравнений ===")
 
         # Получение данных от пользователя
         file_path = self.get_xml_file_path()
-        success = self.xml_parser.parse_xml_file(file_path)
+        self.reset_run_state()
+        with self.profiler.stage('load'):
+            success = self.load_xml(file_path)
 
         if not success:
             print("Не удалось загрузить XML файл. Анализ прерван.")
@@ -94,88 +205,550 @@ class DSAHPAnalyzer:
             print(f" Внимание: загружено только {len(self.criteria_matrices)} критериев")
 
         # Выводим сводку загруженных данных
-        self.xml_parser.print_loaded_data_summary()
+        if tracer.summary_enabled:
+            self.xml_parser.print_loaded_data_summary()
 
         # Расчет весов критериев (шаг 2)
         criteria_names = list(self.criteria_matrices.keys())
 
-        if self.weight_method == Config.WEIGHT_METHOD_AUTO:
-            self.weight_calculator.calculate_weights_auto(criteria_names)
-        else:
-            self.weight_calculator.input_weights_manual(criteria_names)
+        with self.profiler.stage('weights'):
+            if self.weight_method == Config.WEIGHT_METHOD_AUTO:
+                self.weight_calculator.calculate_weights_auto(criteria_names)
+            else:
+                self.weight_calculator.input_weights_manual(criteria_names)
 
         return self.criteria_matrices.copy(), self.weight_calculator.get_weights()
 
+    def load_xml(self, file_path):
+        """
+        Загрузка XML файла: из кэша этапов, если он включен и файл не изменился,
+        иначе разбором файла с сохранением результата в кэш. Хэш файла вычисляется
+        только для кэша этапов или при set_hash_inputs
+        """
+        self.cache_keys = {}
+        if self.stage_cache is None:
+            self.input_hash = self.hash_input(file_path) if self.hash_inputs else None
+            return self.xml_parser.parse_xml_file(file_path)
+
+        self.input_hash = self.hash_input(file_path)
+        if self.input_hash is None:
+            return self.xml_parser.parse_xml_file(file_path)
+
+        try:
+            file_key = self.stage_cache.file_key(file_path, self.input_hash)
+        except OSError:
+            return self.xml_parser.parse_xml_file(file_path)
+
+        self.cache_keys['file'] = file_key
+        parsed = self.stage_cache.load_parsed(file_key)
+        if parsed is not None:
+            self.xml_parser.load_parsed(**parsed)
+            return True
+
+        if not self.xml_parser.parse_xml_file(file_path):
+            return False
+
+        self.stage_cache.store_parsed(
+            file_key,
+            self.xml_parser.get_criteria_matrices(),
+            self.xml_parser.get_alternatives(),
+            self.xml_parser.get_all_groups(),
+            self.xml_parser.criteria_count
+        )
+        return True
+
+    @staticmethod
+    def hash_input(file_path):
+        """
+        Хэш содержимого входного файла в момент загрузки (для хранилища результатов
+        и ключа кэша) или None, если файл недоступен
+        """
+        try:
+            return Utils.file_hash(file_path)
+        except OSError:
+            return None
+
     def run_complete_analysis(self):
 
-        print(f"Текущие настройки:")
-        print(f"  Метод расчета весов: {self.get_weight_method_name()}")
-        print(f"  Коэффициент пессимизма: {self.pessimism_coefficient}")
+        tracer.summary("Текущие настройки:")
+        tracer.summary("  Метод расчета весов: {}", self.get_weight_method_name())
+        tracer.summary("  Коэффициент пессимизма: {}", self.pessimism_coefficient)
 
+        self.profiler.begin_run()
         try:
             # Шаг 1-2: Загрузка матриц и расчет весов критериев
             matrices, weights = self.process_step_1_and_2()
-            all_alternatives = self.xml_parser.get_alternatives()
 
-            # Шаг 3: Преобразование матриц
-            transformed_matrices = self.matrix_processor.transform_matrices(matrices, weights)
+            # Шаги 3-6, ранжирование и экспорт
+            return self.run_pipeline(matrices, weights)
 
-            # Шаг 4: Вычисление базовых вероятностей
-            basic_probabilities = self.matrix_processor.calculate_basic_probabilities()
+        except Exception as e:
+            print(f"\nПроизошла ошибка: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+        finally:
+            self.profiler.end_run()
+            tracer.close()
 
-            # Шаг 5: Комбинирование по Демпстеру
-            combined_beliefs = self.dempster_combiner.combine_evidence(basic_probabilities)
+    def run_headless(self, file_path, weights=None, criteria_matrix=None):
+        """
+        Неинтерактивный анализ: путь к XML и веса критериев передаются напрямую.
+        weights - словарь {критерий: вес} (ручной метод),
+        criteria_matrix - матрица парных сравнений критериев в порядке критериев XML
+        или словарь {'criteria': [...], 'matrix': [[...]]} (автоматический метод)
+        """
+        tracer.summary("\n=== Шаг 1: Загрузка усеченных матриц парных сравнений ===")
+        self.last_error = None
+        self.profiler.begin_run()
+
+        try:
+            if self.streaming and self.weight_method == Config.WEIGHT_METHOD_MANUAL and weights is not None:
+                return self.run_streaming(file_path, weights)
+
+            self.reset_run_state()
+            with self.profiler.stage('load'):
+                loaded = self.load_xml(file_path)
+            if not loaded:
+                self.last_error = ValueError(f"Не удалось загрузить XML файл '{file_path}'")
+                print(f"Не удалось загрузить XML файл '{file_path}'. Анализ прерван.")
+                return None
+
+            self.criteria_matrices = self.xml_parser.get_criteria_matrices()
+            if tracer.summary_enabled:
+                self.xml_parser.print_loaded_data_summary()
+
+            # Шаг 2: веса критериев без диалога с пользователем
+            criteria_names = list(self.criteria_matrices.keys())
+            with self.profiler.stage('weights'):
+                if self.weight_method == Config.WEIGHT_METHOD_AUTO:
+                    if criteria_matrix is None:
+                        raise ValueError("Для автоматического метода требуется матрица сравнения критериев")
+                    if isinstance(criteria_matrix, dict):
+                        criteria_matrix = self.weight_calculator.reorder_matrix(
+                            criteria_names, criteria_matrix['criteria'], criteria_matrix['matrix']
+                        )
+                    self.weight_calculator.calculate_weights_from_matrix(criteria_names, criteria_matrix)
+                else:
+                    if weights is None:
+                        raise ValueError("Для ручного метода требуются веса критериев")
+                    self.weight_calculator.set_weights(criteria_names, weights)
+
+            return self.run_pipeline(self.criteria_matrices.copy(), self.weight_calculator.get_weights())
 
-            # Шаг 6: Функции доверия и правдоподобия
-            belief, plausibility = self.belief_calculator.calculate_belief_plausibility(
-                combined_beliefs, all_alternatives
+        except Exception as e:
+            self.last_error = e
+            print(f"\nОшибка при анализе файла '{file_path}': {e}")
+            return None
+        finally:
+            self.profiler.end_run()
+            tracer.close()
+
+    def run_streaming(self, file_path, weights):
+        """
+        Потоковый анализ: критерии читаются из XML по одному, и для каждого сразу
+        выполняются шаги 3-4. Исходные и преобразованные матрицы не сохраняются,
+        поэтому в памяти одновременно находится только одна матрица.
+        Требует готовых весов {критерий: вес} для всех критериев файла
+        """
+        self.cache_keys = {}  # Потоковый режим кэш не использует
+        self.reset_run_state()
+        if self.hash_inputs:
+            self.input_hash = self.hash_input(file_path)
+        criteria_weights = self.weight_calculator.set_weights(list(weights.keys()), weights)
+
+        tracer.summary("\n Потоковое чтение XML файла: {}", file_path)
+        tracer.summary("\n=== Шаги 3-4: Преобразование матриц и базовые вероятности ===")
+
+        loaded_criteria = []
+        # Загрузка, преобразование и базовые вероятности чередуются по критериям
+        with self.profiler.stage('streaming'):
+            for criterion, matrix in self.xml_parser.iter_criteria(file_path):
+                if criterion not in criteria_weights:
+                    raise ValueError(f"Не задан вес для критерия '{criterion}'")
+                self.matrix_processor.process_criterion(
+                    criterion, matrix, criteria_weights[criterion], keep_matrix=False
+                )
+                loaded_criteria.append(criterion)
+
+        if not loaded_criteria:
+            raise ValueError("Не удалось загрузить ни одного критерия")
+
+        missing = [criterion for criterion in criteria_weights if criterion not in loaded_criteria]
+        if missing:
+            raise ValueError(f"В XML файле нет критериев: {missing}")
+
+        self.matrix_processor.set_frame(self.xml_parser.get_frame())
+        self.matrix_processor.update_basic_masses()
+
+        return self.combine_and_rank()
+
+    def run_pipeline(self, matrices, weights):
+        """
+        Шаги 3-6 алгоритма для загруженных матриц и рассчитанных весов,
+        поиск оптимальной альтернативы и экспорт результатов
+        """
+        self.matrix_processor.set_frame(self.xml_parser.get_frame())
+
+        # Шаги 3-4 из кэша, если для этого файла и этих весов они уже вычислены
+        file_key = self.cache_keys.get('file')
+        if file_key is not None:
+            key = self.stage_cache.derive_key(
+                file_key, stage='probabilities', weight_method=self.weight_method,
+                weights=self.stage_cache.weights_param(weights)
+            )
+            self.cache_keys['probabilities'] = key
+            cached = self.stage_cache.load_probabilities(file_key, key)
+            if cached is not None:
+                self.matrix_processor.load_results(*cached)
+                return self.combine_and_rank()
+
+        # Шаг 3: Преобразование матриц
+        with self.profiler.stage('transform'):
+            self.matrix_processor.transform_matrices(matrices, weights)
+
+        # Шаг 4: Вычисление базовых вероятностей
+        with self.profiler.stage('probabilities'):
+            self.matrix_processor.calculate_basic_probabilities()
+
+        if file_key is not None:
+            self.stage_cache.store_probabilities(
+                file_key, self.cache_keys['probabilities'],
+                self.matrix_processor.basic_probabilities, self.matrix_processor.raw_weights
             )
 
-            # Поиск оптимальной альтернативы с текущим коэффициентом пессимизма
+        return self.combine_and_rank()
+
+    def combine_and_rank(self):
+        """
+        Шаги 5-6 по уже вычисленным базовым вероятностям,
+        поиск оптимальной альтернативы и экспорт результатов
+        """
+        all_alternatives = self.xml_parser.get_alternatives()
+        frame = self.xml_parser.get_frame()
+        self.dempster_combiner.set_frame(frame)
+        self.combination_tree = None
+        basic_masses = self.matrix_processor.get_basic_masses()
+
+        # Шаг 5: Комбинирование по Демпстеру (или его результат из кэша)
+        with self.profiler.stage('combination'):
+            if not self.load_cached_combination():
+                self.dempster_combiner.combine_evidence(basic_masses)
+                self.store_cached_combination()
+        combined_masses = self.dempster_combiner.get_combined_masses()
+        self.record_counters(basic_masses, combined_masses)
+
+        # Шаг 6: Функции доверия и правдоподобия
+        with self.profiler.stage('belief'):
+            self.belief_calculator.calculate_belief_plausibility(
+                combined_masses, all_alternatives, frame, self.dempster_combiner.get_error_bound()
+            )
+
+        # Поиск оптимальной альтернативы с текущим коэффициентом пессимизма
+        with self.profiler.stage('ranking'):
             optimal_alt = self.belief_calculator.find_optimal_alternative(self.pessimism_coefficient)
 
-            # Экспорт результатов
-            self.export_results(optimal_alt)
+        # Экспорт результатов (этапы export и export_write)
+        self.exported_files = self.export_results(optimal_alt)
+
+        return optimal_alt
+
+    def record_counters(self, basic_masses, combined_masses):
+        """Счетчики размера задачи и комбинирования для замеров этапов"""
+        steps = self.dempster_combiner.get_step_statistics()
+        self.profiler.set_counter('alternatives', len(self.xml_parser.get_alternatives()))
+        self.profiler.set_counter('criteria', len(basic_masses))
+        self.profiler.set_counter('basic_focal_elements', sum(len(masses) for masses in basic_masses.values()))
+        self.profiler.set_counter('focal_elements_per_step', [step['focal_elements'] for step in steps])
+        self.profiler.set_counter('pairs_evaluated', sum(step['pairs'] for step in steps))
+        self.profiler.set_counter('combined_focal_elements', len(combined_masses))
+
+    def load_cached_combination(self):
+        """Результат шага 5 из кэша для текущих базовых вероятностей и ядра комбинирования"""
+        probabilities_key = self.cache_keys.get('probabilities')
+        if probabilities_key is None:
+            return False
+
+        combiner = self.dempster_combiner
+        key = self.stage_cache.derive_key(probabilities_key, stage='combined', kernel=combiner.kernel,
+                                          max_focal_elements=combiner.max_focal_elements,
+                                          min_focal_mass=combiner.min_focal_mass,
+                                          summarization=combiner.summarization)
+        self.cache_keys['combined'] = key
+        cached = self.stage_cache.load_combined(self.cache_keys['file'], key)
+        if cached is None:
+            return False
+
+        self.dempster_combiner.load_results(*cached)
+        return True
+
+    def store_cached_combination(self):
+        if 'combined' in self.cache_keys:
+            self.stage_cache.store_combined(
+                self.cache_keys['file'], self.cache_keys['combined'],
+                self.dempster_combiner.get_combined_beliefs(),
+                self.dempster_combiner.get_conflict_history(),
+                self.dempster_combiner.get_error_bound()
+            )
 
-            return optimal_alt
+    def update_criterion(self, criterion, matrix=None, weight=None):
+        """
+        Анализ «что если»: новая матрица и/или вес одного критерия.
+        Шаги 3-4 выполняются только для этого критерия, а в дереве комбинирования
+        пересчитываются O(log k) узлов на его пути. Веса остальных критериев не
+        меняются (повторная нормировка весов не выполняется). При бюджете фокальных
+        элементов все критерии комбинируются заново последовательно, как при
+        полном анализе с теми же настройками.
+        Возвращает новую оптимальную альтернативу
+        """
+        if criterion not in self.criteria_matrices:
+            raise ValueError(f"Критерий '{criterion}' не загружен")
+
+        tree = self._what_if_tree()
+        masses = self._process_criterion(criterion, matrix, weight)
+        if tree is None:
+            return self.rank_recombined()
+        tree.update(criterion, masses)
+        return self.rank_from_tree()
+
+    def add_criterion(self, criterion, matrix, weight):
+        """Анализ «что если»: добавление критерия без повторного комбинирования остальных"""
+        if criterion in self.criteria_matrices:
+            raise ValueError(f"Критерий '{criterion}' уже загружен")
+
+        tree = self._what_if_tree()
+        masses = self._process_criterion(criterion, matrix, weight)
+        if tree is None:
+            return self.rank_recombined()
+        tree.add(criterion, masses)
+        return self.rank_from_tree()
+
+    def remove_criterion(self, criterion):
+        """Анализ «что если»: исключение критерия"""
+        if criterion not in self.criteria_matrices:
+            raise ValueError(f"Критерий '{criterion}' не загружен")
+        if len(self.criteria_matrices) == 1:
+            raise ValueError("Нельзя исключить единственный критерий")
+
+        tree = self._what_if_tree()
+        del self.criteria_matrices[criterion]
+        self.weight_calculator.criteria_weights.pop(criterion, None)
+        self.matrix_processor.remove_criterion(criterion)
+        if tree is None:
+            return self.rank_recombined()
+        tree.remove(criterion)
+        return self.rank_from_tree()
+
+    def _what_if_tree(self):
+        """
+        Дерево комбинирования для анализа «что если» или None, если задан бюджет
+        фокальных элементов: дерево не выполняет суммаризацию
+        """
+        if self.dempster_combiner.budget_enabled():
+            self.combination_tree = None
+            return None
+        return self.get_combination_tree()
+
+    def get_combination_tree(self):
+        """Дерево комбинирования по текущим базовым вероятностям (строится при первом обращении)"""
+        if self.combination_tree is None:
+            basic_masses = self.matrix_processor.get_basic_masses()
+            if not basic_masses:
+                raise ValueError("Сначала выполните анализ")
+            from combination_tree import CombinationTree
+            self.combination_tree = CombinationTree(self.xml_parser.get_frame(), self.dempster_combiner)
+            self.combination_tree.build(basic_masses)
+        return self.combination_tree
+
+    def _process_criterion(self, criterion, matrix, weight):
+        """Шаги 3-4 для одного критерия с сохранением новой матрицы и веса"""
+        if matrix is not None:
+            self.criteria_matrices[criterion] = matrix
+        if weight is not None:
+            if weight <= 0:
+                raise ValueError(f"Вес критерия '{criterion}' должен быть положительным")
+            self.weight_calculator.criteria_weights[criterion] = float(weight)
+
+        weights = self.weight_calculator.get_weights()
+        if criterion not in weights:
+            raise ValueError(f"Не задан вес для критерия '{criterion}'")
+
+        self.matrix_processor.set_frame(self.xml_parser.get_frame())
+        self.matrix_processor.process_criterion(criterion, self.criteria_matrices[criterion], weights[criterion])
+        return self.matrix_processor.get_basic_masses()[criterion]
+
+    def rank_recombined(self):
+        """Шаги 5-6 и ранжирование по текущим базовым вероятностям всех критериев"""
+        if not self.matrix_processor.get_basic_masses():
+            raise ValueError("Сначала выполните анализ")
+
+        self.dempster_combiner.set_frame(self.xml_parser.get_frame())
+        self.dempster_combiner.combine_evidence(self.matrix_processor.get_basic_masses())
+        self.belief_calculator.calculate_belief_plausibility(
+            self.dempster_combiner.get_combined_masses(), self.xml_parser.get_alternatives(),
+            self.xml_parser.get_frame(), self.dempster_combiner.get_error_bound()
+        )
+        return self.belief_calculator.find_optimal_alternative(self.pessimism_coefficient)
+
+    def rank_from_tree(self):
+        """Шаг 6 и ранжирование по корню дерева комбинирования"""
+        tree = self.combination_tree
+        frame = self.xml_parser.get_frame()
+
+        # Конфликты узлов дерева идут в порядке дерева и не являются шагами
+        # последовательного комбинирования, поэтому conflict_history остается пустой
+        # (прежняя относится к исходным данным), а суммарный конфликт - K корня
+        combined_masses = tree.get_combined_masses()
+        self.dempster_combiner.load_results(combined_masses, [])
+        self.dempster_combiner.node_conflicts = tree.get_node_conflicts()
+        tracer.summary("\nКомбинирование {} критериев, суммарный конфликт K = {:.6f}",
+                       len(tree.get_criteria()), tree.get_total_conflict())
+        if tree.get_total_conflict() >= 1.0:
+            tracer.summary("ВЫСОКИЙ КОНФЛИКТ! K >= 1: результат комбинирования пуст")
+
+        self.belief_calculator.calculate_belief_plausibility(
+            combined_masses, self.xml_parser.get_alternatives(), frame
+        )
+        return self.belief_calculator.find_optimal_alternative(self.pessimism_coefficient)
+
+    def has_results(self):
+        """Есть ли интервалы последнего анализа"""
+        return bool(self.belief_calculator.intervals)
+
+    def rerank(self):
+        """
+        Ранжирование по интервалам последнего анализа с текущим коэффициентом
+        пессимизма (без повторной загрузки XML). None, если анализ не выполнялся
+        """
+        if not self.has_results():
+            return None
+        return self.belief_calculator.find_optimal_alternative(self.pessimism_coefficient)
 
-        except Exception as e:
-            print(f"\nПроизошла ошибка: {e}")
-            import traceback
-            traceback.print_exc()
+    def run_pessimism_sweep(self, gammas=None, points=None):
+        """
+        Анализ чувствительности к коэффициенту пессимизма по результатам
+        последнего анализа (без повторной загрузки XML) и экспорт отчета.
+        gammas - массив значений γ, иначе равномерная сетка из points точек
+        """
+        if gammas is None:
+            from pessimism_sweep import PessimismSweep
+            gammas = PessimismSweep.default_gammas(points)
+
+        sweep = self.belief_calculator.sweep_pessimism(gammas)
+        if sweep is None:
+            return None
+
+        tracer.summary("\n" + "=" * 60)
+        tracer.summary("ЧУВСТВИТЕЛЬНОСТЬ К КОЭФФИЦИЕНТУ ПЕССИМИЗМА")
+        tracer.summary("=" * 60)
+        tracer.summary("Точки смены ранжирования: {}",
+                       ', '.join(f"{gamma:.4f}" for gamma in sweep['breakpoints']) or 'нет')
+        for segment in sweep['segments']:
+            tracer.summary("  γ ∈ [{:.4f}, {:.4f}]: {} (оптимальная: {})", segment['start'], segment['end'],
+                           ' > '.join(segment['ranking']), segment['optimal_alternative'])
+
+        base_filename = None
+        if self.export_base_name:
+            base_filename = os.path.join(self.export_formats.export_dir, f"{self.export_base_name}_sweep")
+
+        json_file, csv_file = self.export_formats.export_pessimism_sweep(sweep, base_filename)
+        self.sweep_files = (json_file, csv_file) if json_file and csv_file else None
+        if self.sweep_files:
+            tracer.summary("\nАнализ чувствительности экспортирован: {}, {}", json_file, csv_file)
+
+        return sweep
+
+    def run_robustness_analysis(self, samples=None, method=None, max_workers=None, seed=None):
+        """
+        Анализ устойчивости к неопределенности весов критериев методом Монте-Карло
+        по уже загруженным матрицам и рассчитанным весам, с экспортом отчета.
+        method - dirichlet или judgments (только для автоматического метода весов)
+        """
+        self.robustness_files = None
+        if not self.criteria_matrices:
+            print("Нет загруженных матриц критериев для анализа устойчивости "
+                  "(в потоковом режиме матрицы не сохраняются)")
             return None
 
+        from robustness_analysis import RobustnessAnalyzer
+        analyzer = RobustnessAnalyzer(self.criteria_matrices, self.xml_parser.get_frame(),
+                                      self.pessimism_coefficient, max_workers=max_workers)
+        results = analyzer.run(
+            self.weight_calculator.get_weights(),
+            samples=samples,
+            method=method,
+            criteria_matrix=self.weight_calculator.get_criteria_matrix(),
+            seed=seed
+        )
+
+        base_filename = None
+        if self.export_base_name:
+            base_filename = os.path.join(self.export_formats.export_dir, f"{self.export_base_name}_robustness")
+
+        json_file, csv_file = self.export_formats.export_robustness(results, base_filename)
+        self.robustness_files = (json_file, csv_file) if json_file and csv_file else None
+        if self.robustness_files:
+            tracer.summary("\nАнализ устойчивости экспортирован: {}, {}", json_file, csv_file)
+
+        return results
+
     def export_results(self, optimal_alternative):
-        """Экспорт результатов с интервалами"""
+        """
+        Экспорт результатов с интервалами.
+        Этап export - построение модели результата; он завершается до того, как
+        замеры этапов попадают в модель, поэтому есть в экспортированных файлах.
+        Запись файлов (и ее ожидание без defer_export) - этап export_write: он
+        идет уже после снятия замеров и виден только в get_results и print_report.
+        Возвращает пути к файлам (XML, JSON, CSV) или None при ошибке
+        """
         try:
-            # Получаем ранжирование и интервалы
-            ranking = self.belief_calculator.get_ranking()
-            intervals = self.belief_calculator.get_intervals()
+            with self.profiler.stage('export'):
+                # Получаем ранжирование и интервалы
+                ranking = self.belief_calculator.get_ranking()
+                intervals = self.belief_calculator.get_reported_intervals()
+
+                if ranking:
+                    from export_formats import ExportFormats
+                    model = ExportFormats.build_result_model(
+                        ranking, intervals, optimal_alternative, self.pessimism_coefficient
+                    )
 
             if not ranking:
                 print("Нет данных для экспорта")
-                return
+                return None
 
-            print("\n" + "=" * 60)
-            print("ЭКСПОРТ РЕЗУЛЬТАТОВ С ИНТЕРВАЛАМИ")
-            print("=" * 60)
+            tracer.summary("\n" + "=" * 60)
+            tracer.summary("ЭКСПОРТ РЕЗУЛЬТАТОВ С ИНТЕРВАЛАМИ")
+            tracer.summary("=" * 60)
 
             # Экспорт во все форматы
-            xml_file, json_file, csv_file = self.export_formats.export_to_all_formats(
-                ranking=ranking,
-                intervals=intervals,
-                optimal_alternative=optimal_alternative,
-                pessimism_coef=self.pessimism_coefficient
-            )
-
-            print(f"\nРанжирование с интервалами экспортировано в форматы:")
-            print(f"  • XML:  {xml_file}")
-            print(f"  • JSON: {json_file}")
-            print(f"  • CSV:  {csv_file}")
-            print(f"\nВсе файлы сохранены в папке: {self.export_formats.export_dir}/")
+            base_filename = None
+            if self.export_base_name:
+                base_filename = os.path.join(self.export_formats.export_dir, self.export_base_name)
+
+            model['instrumentation'] = self.profiler.report()
+            with self.profiler.stage('export_write'):
+                futures = self.export_formats.submit_model(model, base_filename)
+                if self.defer_export:
+                    # Файлы допишутся в фоне, результат - через finish_export
+                    self.pending_export = futures
+                    return None
+
+                xml_file, json_file, csv_file = self.export_formats.collect(futures)
+
+            tracer.summary("\nРанжирование с интервалами экспортировано в форматы:")
+            tracer.summary("  • XML:  {}", xml_file)
+            tracer.summary("  • JSON: {}", json_file)
+            tracer.summary("  • CSV:  {}", csv_file)
+            tracer.summary("\nВсе файлы сохранены в папке: {}/", self.export_formats.export_dir)
+
+            if None in (xml_file, json_file, csv_file):
+                return None
+            return xml_file, json_file, csv_file
 
         except Exception as e:
             print(f"Ошибка при экспорте результатов: {e}")
+            return None
 
 
 
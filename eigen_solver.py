@@ -0,0 +1,124 @@
+import numpy as np
+from config import Config
+
+
+class EigenvectorSolver:
+    """
+    Главный собственный вектор положительных обратно-симметричных матриц
+    парных сравнений степенным методом.
+
+    Для таких матриц (теорема Перрона-Фробениуса) итерации v <- A·v / сумма(A·v)
+    сходятся к вектору весов за несколько шагов, а сумма A·v дает λmax -
+    полное разложение np.linalg.eig не требуется. Принимает одну матрицу (n, n)
+    или стопку (k, n, n): все матрицы стопки итерируются одновременно.
+    Если итерации не сошлись или матрица не положительна, используется eig.
+    """
+
+    def __init__(self, tolerance=None, max_iterations=None):
+        self.tolerance = tolerance if tolerance is not None else Config.EIGEN_TOLERANCE
+        self.max_iterations = max_iterations or Config.EIGEN_MAX_ITERATIONS
+        self.last_weights = None  # Последнее решение - начальное приближение для следующего
+
+    def solve(self, matrices, initial=None):
+        """
+        Веса, λmax, индекс (CI) и отношение (CR) согласованности.
+        initial - начальное приближение (вектор или стопка векторов); по умолчанию
+        берется предыдущее решение того же размера или средние геометрические строк.
+        Возвращает словарь; для стопки матриц значения - массивы по первой оси
+        """
+        matrices = np.asarray(matrices, dtype=np.float64)
+        single = matrices.ndim == 2
+        stack = matrices[np.newaxis] if single else matrices
+
+        if stack.ndim != 3 or stack.shape[-1] != stack.shape[-2]:
+            raise ValueError(f"Ожидается квадратная матрица или стопка матриц, получено {matrices.shape}")
+
+        count, n, _ = stack.shape
+        weights = self._initial_vectors(stack, initial)
+        lambda_max = np.zeros(count)
+        converged = np.zeros(count, dtype=bool)
+
+        # Степенной метод сразу для всех положительных матриц стопки
+        active = np.flatnonzero((stack > 0).all(axis=(1, 2)))
+        active_matrices = stack[active]
+        iterations = 0
+
+        while active.size and iterations < self.max_iterations:
+            iterations += 1
+            products = np.einsum('kij,kj->ki', active_matrices, weights[active])
+            sums = products.sum(axis=1)
+            new_weights = products / sums[:, np.newaxis]
+
+            delta = np.abs(new_weights - weights[active]).max(axis=1)
+            weights[active] = new_weights
+            lambda_max[active] = sums
+
+            done = delta <= self.tolerance
+            if done.any():
+                converged[active[done]] = True
+                active = active[~done]
+                active_matrices = active_matrices[~done]
+
+        # Не сошедшиеся и неположительные матрицы - полным разложением
+        for index in np.flatnonzero(~converged):
+            weights[index], lambda_max[index] = self.solve_with_eig(stack[index])
+
+        consistency_index, consistency_ratio = self.consistency(lambda_max, n)
+        self.last_weights = weights.copy()
+
+        result = {
+            'weights': weights,
+            'lambda_max': lambda_max,
+            'consistency_index': consistency_index,
+            'consistency_ratio': consistency_ratio,
+            'converged': converged,
+            'iterations': iterations
+        }
+        if single:
+            result['weights'] = weights[0]
+            for key in ('lambda_max', 'consistency_index', 'consistency_ratio'):
+                result[key] = float(result[key][0])
+            result['converged'] = bool(converged[0])
+        return result
+
+    def _initial_vectors(self, stack, initial):
+        """Начальные приближения (k, n), нормированные к сумме 1"""
+        count, n, _ = stack.shape
+
+        if initial is None and self.last_weights is not None and self.last_weights.shape[-1] == n:
+            initial = self.last_weights if len(self.last_weights) == count else self.last_weights[-1]
+
+        if initial is None:
+            # Средние геометрические строк - точное решение для согласованной матрицы
+            with np.errstate(divide='ignore', invalid='ignore'):
+                initial = np.exp(np.log(stack).mean(axis=-1))
+
+        vectors = np.abs(np.broadcast_to(np.asarray(initial, dtype=np.float64), (count, n))).copy()
+        vectors[~np.isfinite(vectors).all(axis=1)] = 1.0
+        sums = vectors.sum(axis=1)
+        vectors[sums == 0] = 1.0
+        return vectors / vectors.sum(axis=1, keepdims=True)
+
+    @staticmethod
+    def solve_with_eig(matrix):
+        """Главный собственный вектор и λmax полным разложением np.linalg.eig"""
+        eigenvalues, eigenvectors = np.linalg.eig(matrix)
+        max_eigenvalue_index = np.argmax(eigenvalues.real)
+        weight_vector = np.abs(eigenvectors[:, max_eigenvalue_index].real)
+        return weight_vector / weight_vector.sum(), eigenvalues[max_eigenvalue_index].real
+
+    @staticmethod
+    def consistency(lambda_max, n):
+        """
+        Индекс согласованности CI = (λmax - n) / (n - 1) и отношение CR = CI / RI.
+        Матрицы 1x1 и 2x2 всегда согласованы
+        """
+        lambda_max = np.asarray(lambda_max, dtype=np.float64)
+        if n <= 2:
+            zeros = np.zeros_like(lambda_max)
+            return zeros, zeros.copy()
+
+        # Для положительной обратно-симметричной матрицы λmax >= n, отрицательная разность - погрешность
+        consistency_index = np.maximum(lambda_max - n, 0.0) / (n - 1)
+        random_index = Config.RANDOM_INDEX.get(n, Config.RANDOM_INDEX[max(Config.RANDOM_INDEX)])
+        return consistency_index, consistency_index / random_index
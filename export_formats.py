@@ -1,11 +1,18 @@
+import csv
+import io
 import json
-import xml.etree.ElementTree as ET
 import os
+import uuid
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from xml.dom import minidom
+from config import Config
 
 
 class ExportFormats:
+    _executor = None  # Общий пул потоков записи файлов (создается при первом экспорте)
+
     def __init__(self, export_dir="results"):
         self.export_dir = export_dir
         self._create_export_directory()
@@ -13,233 +20,435 @@ class ExportFormats:
     def _create_export_directory(self):
         """Создает директорию для результатов, если она не существует"""
         if not os.path.exists(self.export_dir):
-            os.makedirs(self.export_dir)
+            os.makedirs(self.export_dir, exist_ok=True)
 
-    def export_to_xml(self, ranking, intervals, optimal_alternative,
-                      pessimism_coef, filename=None):
+    @staticmethod
+    def new_run_id():
         """
-        Экспорт ранжирования с интервалами в XML формат
+        Уникальный идентификатор запуска: время с точностью до секунды для
+        сортировки и случайный суффикс, чтобы запуски в одну секунду не совпадали
         """
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.export_dir}/ranking_{timestamp}.xml"
+        return f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
 
+    def default_base_filename(self, prefix):
+        return f"{self.export_dir}/{prefix}_{self.new_run_id()}"
+
+    @staticmethod
+    @contextmanager
+    def atomic_open(filename, newline=None):
+        """
+        Запись файла целиком или никак: данные пишутся во временный файл рядом
+        с целевым и переименовываются в него (os.replace) только после успешной записи
+        """
+        temp_filename = f"{filename}.{uuid.uuid4().hex}.tmp"
         try:
-            # Создаем корневой элемент
-            root = ET.Element('ds_ahp_ranking')
+            with open(temp_filename, 'x', encoding='utf-8', newline=newline) as f:
+                yield f
+            os.replace(temp_filename, filename)
+        except BaseException:
+            try:
+                os.remove(temp_filename)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def executor(cls):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=Config.EXPORT_THREADS,
+                                               thread_name_prefix='export')
+        return cls._executor
+
+    @staticmethod
+    def build_result_model(ranking, intervals, optimal_alternative, pessimism_coef, instrumentation=None):
+        """
+        Модель результата для всех форматов экспорта (строится один раз):
+        метаданные, строки ранжирования с интервалами и замеры этапов
+        (StageProfiler.report, если они включены)
+        """
+        rows = []
+        for i, (alt, score) in enumerate(ranking, 1):
+            rows.append({
+                'rank': i,
+                'alternative': alt,
+                'score': score,
+                'interval': intervals.get(alt),
+                'optimal': alt == optimal_alternative
+            })
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'pessimism_coefficient': pessimism_coef,
+            'optimal_alternative': optimal_alternative,
+            'rows': rows,
+            'instrumentation': instrumentation
+        }
+
+    @staticmethod
+    def render_xml(model):
+        """Ранжирование с интервалами в XML (отступы - ElementTree.indent)"""
+        root = ET.Element('ds_ahp_ranking')
+
+        # Метаданные
+        metadata = ET.SubElement(root, 'metadata')
+        ET.SubElement(metadata, 'timestamp').text = model['timestamp']
+        ET.SubElement(metadata, 'analysis_type').text = 'DS_AHP'
+        ET.SubElement(metadata, 'pessimism_coefficient').text = f"{model['pessimism_coefficient']:.4f}"
+        ET.SubElement(metadata, 'optimal_alternative').text = model['optimal_alternative']
+        ET.SubElement(metadata, 'alternatives_count').text = str(len(model['rows']))
+
+        # Ранжирование с интервалами
+        ranking_elem = ET.SubElement(root, 'ranking')
+        for row in model['rows']:
+            rank_elem = ET.SubElement(ranking_elem, 'alternative')
+            rank_elem.set('rank', str(row['rank']))
+            rank_elem.set('name', row['alternative'])
+
+            ET.SubElement(rank_elem, 'score').text = f"{row['score']:.4f}"
+
+            # Функции доверия и правдоподобия, интервал и его ширина
+            if row['interval'] is not None:
+                belief, plausibility = row['interval']
+                ET.SubElement(rank_elem, 'belief').text = f"{belief:.4f}"
+                ET.SubElement(rank_elem, 'plausibility').text = f"{plausibility:.4f}"
+                ET.SubElement(rank_elem, 'interval').text = f"[{belief:.4f}, {plausibility:.4f}]"
+                ET.SubElement(rank_elem, 'interval_width').text = f"{plausibility - belief:.4f}"
+
+            rank_elem.set('optimal', 'true' if row['optimal'] else 'false')
+
+        instrumentation = model['instrumentation']
+        if instrumentation is not None:
+            instrumentation_elem = ET.SubElement(root, 'instrumentation')
+            for record in instrumentation['stages']:
+                stage_elem = ET.SubElement(instrumentation_elem, 'stage', name=record['stage'])
+                stage_elem.set('wall', f"{record['wall']:.6f}")
+                stage_elem.set('cpu', f"{record['cpu']:.6f}")
+                if record['peak_memory'] is not None:
+                    stage_elem.set('peak_memory', str(record['peak_memory']))
+            for name, value in instrumentation['counters'].items():
+                counter_elem = ET.SubElement(instrumentation_elem, 'counter', name=name)
+                counter_elem.text = ' '.join(map(str, value)) if isinstance(value, list) else str(value)
+
+        ET.indent(root, space="  ")
+        return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding='unicode')
+
+    @staticmethod
+    def render_json(model):
+        """Ранжирование с интервалами в JSON"""
+        results = {
+            'metadata': {
+                'timestamp': model['timestamp'],
+                'analysis_type': 'DS_AHP',
+                'pessimism_coefficient': f"{model['pessimism_coefficient']:.4f}",
+                'optimal_alternative': model['optimal_alternative'],
+                'alternatives_count': len(model['rows'])
+            },
+            'ranking': []
+        }
+
+        for row in model['rows']:
+            alt_data = {
+                'rank': row['rank'],
+                'alternative': row['alternative'],
+                'score': f"{row['score']:.4f}",  # Только отформатированный score
+                'optimal': row['optimal']
+            }
 
-            # Добавляем метаданные
-            metadata = ET.SubElement(root, 'metadata')
+            if row['interval'] is not None:
+                belief, plausibility = row['interval']
+                alt_data['belief'] = f"{belief:.4f}"
+                alt_data['plausibility'] = f"{plausibility:.4f}"
+                alt_data['interval'] = f"[{belief:.4f}, {plausibility:.4f}]"
+                alt_data['interval_width'] = f"{plausibility - belief:.4f}"
+
+            results['ranking'].append(alt_data)
+
+        if model['instrumentation'] is not None:
+            results['instrumentation'] = model['instrumentation']
+
+        return json.dumps(results, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def render_csv(model):
+        """Ранжирование с интервалами в CSV"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        # Заголовок с интервалами
+        writer.writerow([
+            'Ранг', 'Альтернатива', 'Оценка',
+            'Belief', 'Plausibility', 'Интервал', 'Ширина', 'Оптимальная'
+        ])
+
+        for row in model['rows']:
+            belief, plausibility = row['interval'] if row['interval'] is not None else (0.0, 0.0)
+            writer.writerow([
+                row['rank'], row['alternative'], f"{row['score']:.4f}",
+                f"{belief:.4f}", f"{plausibility:.4f}",
+                f"[{belief:.4f}, {plausibility:.4f}]", f"{plausibility - belief:.4f}",
+                'Да' if row['optimal'] else 'Нет'
+            ])
+
+        # Замеры этапов - отдельной таблицей после пустой строки
+        instrumentation = model['instrumentation']
+        if instrumentation is not None:
+            writer.writerow([])
+            writer.writerow(['Этап', 'Время, с', 'CPU, с', 'Пик памяти, байт'])
+            for record in instrumentation['stages']:
+                writer.writerow([
+                    record['stage'], f"{record['wall']:.6f}", f"{record['cpu']:.6f}",
+                    '' if record['peak_memory'] is None else record['peak_memory']
+                ])
+            for name, value in instrumentation['counters'].items():
+                writer.writerow([name, ' '.join(map(str, value)) if isinstance(value, list) else value])
 
-            timestamp_elem = ET.SubElement(metadata, 'timestamp')
-            timestamp_elem.text = datetime.now().isoformat()
+        return buffer.getvalue()
 
-            analysis_type = ET.SubElement(metadata, 'analysis_type')
-            analysis_type.text = 'DS_AHP'
+    # Формат: (расширение, newline при записи, название); текст строит render_<формат>
+    FORMATS = {
+        'xml': ('xml', '\n', 'XML'),
+        'json': ('json', None, 'JSON'),
+        'csv': ('csv', '', 'CSV')
+    }
 
-            pessimism_elem = ET.SubElement(metadata, 'pessimism_coefficient')
-            pessimism_elem.text = f"{pessimism_coef:.4f}"
+    def write_format(self, model, format_name, filename):
+        """Построение и атомарная запись одного формата. Возвращает имя файла или None"""
+        _, newline, title = self.FORMATS[format_name]
+        try:
+            text = getattr(self, f"render_{format_name}")(model)
+            with self.atomic_open(filename, newline=newline) as f:
+                f.write(text)
+            return filename
+        except Exception as e:
+            print(f"❌ Ошибка при экспорте в {title}: {e}")
+            return None
 
-            optimal_elem = ET.SubElement(metadata, 'optimal_alternative')
-            optimal_elem.text = optimal_alternative
+    def export_to_xml(self, ranking, intervals, optimal_alternative,
+                      pessimism_coef, filename=None):
+        """
+        Экспорт ранжирования с интервалами в XML формат
+        """
+        model = self.build_result_model(ranking, intervals, optimal_alternative, pessimism_coef)
+        return self.write_format(model, 'xml', filename or f"{self.default_base_filename('ranking')}.xml")
 
-            alternatives_count = ET.SubElement(metadata, 'alternatives_count')
-            alternatives_count.text = str(len(ranking))
+    def export_to_json(self, ranking, intervals, optimal_alternative,
+                       pessimism_coef, filename=None):
+        """
+        Экспорт ранжирования с интервалами в JSON формат
+        """
+        model = self.build_result_model(ranking, intervals, optimal_alternative, pessimism_coef)
+        return self.write_format(model, 'json', filename or f"{self.default_base_filename('ranking')}.json")
 
-            # Добавляем ранжирование с интервалами
-            ranking_elem = ET.SubElement(root, 'ranking')
+    def export_to_csv(self, ranking, intervals, optimal_alternative, filename=None):
+        """
+        Экспорт ранжирования с интервалами в CSV формат
+        """
+        model = self.build_result_model(ranking, intervals, optimal_alternative, 0.0)
+        return self.write_format(model, 'csv', filename or f"{self.default_base_filename('ranking')}.csv")
 
-            for i, (alt, score) in enumerate(ranking, 1):
-                rank_elem = ET.SubElement(ranking_elem, 'alternative')
-                rank_elem.set('rank', str(i))
-                rank_elem.set('name', alt)
+    def submit_all_formats(self, ranking, intervals, optimal_alternative,
+                           pessimism_coef, base_filename=None, instrumentation=None):
+        """
+        Запуск записи всех форматов в пуле потоков без ожидания.
+        Возвращает задания (XML, JSON, CSV) для collect
+        """
+        if base_filename is None:
+            base_filename = self.default_base_filename('ranking')
 
-                # Оценка
-                score_elem = ET.SubElement(rank_elem, 'score')
-                score_elem.text = f"{score:.4f}"
+        model = self.build_result_model(ranking, intervals, optimal_alternative, pessimism_coef, instrumentation)
+        return self.submit_model(model, base_filename)
 
-                # Функции доверия и правдоподобия
-                if alt in intervals:
-                    belief, plausibility = intervals[alt]
+    def submit_model(self, model, base_filename=None):
+        """Запуск записи всех форматов уже построенной модели результата (build_result_model)"""
+        if base_filename is None:
+            base_filename = self.default_base_filename('ranking')
 
-                    belief_elem = ET.SubElement(rank_elem, 'belief')
-                    belief_elem.text = f"{belief:.4f}"
+        return [
+            self.executor().submit(self.write_format, model, format_name, f"{base_filename}.{extension}")
+            for format_name, (extension, _, _) in self.FORMATS.items()
+        ]
 
-                    plausibility_elem = ET.SubElement(rank_elem, 'plausibility')
-                    plausibility_elem.text = f"{plausibility:.4f}"
+    @staticmethod
+    def collect(futures):
+        """Ожидание записи форматов: имена файлов (None - формат не записан)"""
+        return tuple(future.result() for future in futures)
 
-                    # Интервал
-                    interval_elem = ET.SubElement(rank_elem, 'interval')
-                    interval_elem.text = f"[{belief:.4f}, {plausibility:.4f}]"
+    def export_to_all_formats(self, ranking, intervals, optimal_alternative,
+                              pessimism_coef, base_filename=None, instrumentation=None):
+        """
+        Экспорт ранжирования с интервалами во все форматы (параллельно)
+        """
+        return self.collect(self.submit_all_formats(ranking, intervals, optimal_alternative,
+                                                    pessimism_coef, base_filename, instrumentation))
 
-                    # Ширина интервала
-                    width_elem = ET.SubElement(rank_elem, 'interval_width')
-                    width_elem.text = f"{plausibility - belief:.4f}"
+    def export_batch_summary(self, results, base_filename=None):
+        """
+        Экспорт сводки пакетного анализа: один JSON со всеми файлами и CSV-таблица
+        """
+        if base_filename is None:
+            base_filename = self.default_base_filename('batch_summary')
 
-                # Добавляем информацию об оптимальности
-                if alt == optimal_alternative:
-                    rank_elem.set('optimal', 'true')
-                else:
-                    rank_elem.set('optimal', 'false')
+        json_file = f"{base_filename}.json"
+        csv_file = f"{base_filename}.csv"
 
-            # Создаем строку XML
-            xml_string = ET.tostring(root, encoding='unicode', method='xml')
+        try:
+            summary = {
+                'metadata': {
+                    'timestamp': datetime.now().isoformat(),
+                    'analysis_type': 'DS_AHP_BATCH',
+                    'files_count': len(results),
+                    'succeeded': sum(1 for result in results if result['status'] == 'ok'),
+                    'failed': sum(1 for result in results if result['status'] != 'ok')
+                },
+                'files': results
+            }
 
-            # Добавляем декларацию XML
-            xml_declaration = '<?xml version="1.0" encoding="UTF-8"?>\n'
-            full_xml = xml_declaration + xml_string
+            with self.atomic_open(json_file) as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
 
-            # Форматируем XML
-            dom = minidom.parseString(full_xml)
-            pretty_xml = dom.toprettyxml(indent="  ")
+            with self.atomic_open(csv_file, newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow([
+                    'Файл', 'Статус', 'Оптимальная', 'Оценка', 'Belief', 'Plausibility',
+                    'Время, с', 'Ошибка'
+                ])
 
-            # Убираем лишние пустые строки
-            lines = pretty_xml.split('\n')
-            clean_lines = []
-            for line in lines:
-                if line.strip():
-                    clean_lines.append(line)
-            formatted_xml = '\n'.join(clean_lines)
+                for result in results:
+                    optimal = result.get('optimal_alternative')
+                    score = belief = plausibility = ''
+                    if optimal is not None:
+                        score = f"{result['scores'][optimal]:.4f}"
+                        belief, plausibility = (f"{value:.4f}" for value in result['intervals'][optimal])
 
-            # Записываем в файл
-            with open(filename, 'w', encoding='utf-8', newline='\n') as f:
-                f.write(formatted_xml)
+                    writer.writerow([
+                        result['file'], result['status'], optimal or '', score, belief, plausibility,
+                        f"{result['elapsed']:.3f}", result.get('error') or ''
+                    ])
 
-            return filename
+            return json_file, csv_file
 
         except Exception as e:
-            print(f"Ошибка при экспорте в XML: {e}")
-            return None
+            print(f"❌ Ошибка при экспорте сводки пакетного анализа: {e}")
+            return None, None
 
-    def export_to_json(self, ranking, intervals, optimal_alternative,
-                       pessimism_coef, filename=None):
+    def export_pessimism_sweep(self, sweep, base_filename=None):
         """
-        Экспорт ранжирования с интервалами в JSON формат
+        Экспорт анализа чувствительности к коэффициенту пессимизма:
+        JSON с точками смены ранжирования и отрезками, CSV с оценками для каждого γ
         """
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.export_dir}/ranking_{timestamp}.json"
+        if base_filename is None:
+            base_filename = self.default_base_filename('pessimism_sweep')
+
+        json_file = f"{base_filename}.json"
+        csv_file = f"{base_filename}.csv"
 
         try:
-            # Создаем структуру данных
+            alternatives = sweep['alternatives']
             results = {
                 'metadata': {
                     'timestamp': datetime.now().isoformat(),
-                    'analysis_type': 'DS_AHP',
-                    'pessimism_coefficient': f"{pessimism_coef:.4f}",
-                    'optimal_alternative': optimal_alternative,
-                    'alternatives_count': len(ranking)
+                    'analysis_type': 'DS_AHP_PESSIMISM_SWEEP',
+                    'gamma_count': len(sweep['gammas']),
+                    'gamma_range': [float(sweep['gammas'].min()), float(sweep['gammas'].max())],
+                    'alternatives_count': len(alternatives)
                 },
-                'ranking': []
+                'breakpoints': [round(gamma, 6) for gamma in sweep['breakpoints']],
+                'segments': [
+                    {
+                        'start': round(segment['start'], 6),
+                        'end': round(segment['end'], 6),
+                        'optimal_alternative': segment['optimal_alternative'],
+                        'ranking': segment['ranking']
+                    }
+                    for segment in sweep['segments']
+                ]
             }
 
-            # Добавляем ранжирование с интервалами
-            for i, (alt, score) in enumerate(ranking, 1):
-                alt_data = {
-                    'rank': i,
-                    'alternative': alt,
-                    'score': f"{score:.4f}",  # Только отформатированный score
-                    'optimal': alt == optimal_alternative
-                }
-
-                # Добавляем интервалы
-                if alt in intervals:
-                    belief, plausibility = intervals[alt]
-                    alt_data['belief'] = f"{belief:.4f}"
-                    alt_data['plausibility'] = f"{plausibility:.4f}"
-                    alt_data['interval'] = f"[{belief:.4f}, {plausibility:.4f}]"
-                    alt_data['interval_width'] = f"{plausibility - belief:.4f}"
-
-                results['ranking'].append(alt_data)
+            with self.atomic_open(json_file) as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
 
+            with self.atomic_open(csv_file, newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['Gamma', 'Оптимальная', 'Ранжирование'] + alternatives)
 
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+                for gamma, optimal, ranking, scores in zip(sweep['gammas'], sweep['optimal_alternatives'],
+                                                           sweep['rankings'], sweep['scores']):
+                    writer.writerow(
+                        [f"{gamma:.4f}", optimal, ' > '.join(alternatives[index] for index in ranking)]
+                        + [f"{score:.4f}" for score in scores]
+                    )
 
-            return filename
+            return json_file, csv_file
 
         except Exception as e:
-            print(f"❌ Ошибка при экспорте в JSON: {e}")
-            return None
+            print(f"❌ Ошибка при экспорте анализа чувствительности: {e}")
+            return None, None
 
-    def export_to_csv(self, ranking, intervals, optimal_alternative, filename=None):
+    def export_robustness(self, results, base_filename=None):
         """
-        Экспорт ранжирования с интервалами в CSV формат
+        Экспорт анализа устойчивости весов критериев: индексы приемлемости мест,
+        частота оптимальности, центральные веса и коэффициенты доверия (JSON и CSV)
         """
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.export_dir}/ranking_{timestamp}.csv"
+        if base_filename is None:
+            base_filename = self.default_base_filename('robustness')
+
+        json_file = f"{base_filename}.json"
+        csv_file = f"{base_filename}.csv"
 
         try:
-            import csv
+            alternatives = results['alternatives']
+            criteria = results['criteria']
 
-            with open(filename, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.writer(f)
+            def optional(value):
+                return None if value != value else round(float(value), 6)  # NaN -> null
 
-                # Заголовок с интервалами
-                writer.writerow([
-                    'Ранг', 'Альтернатива', 'Оценка',
-                    'Belief', 'Plausibility', 'Интервал', 'Ширина', 'Оптимальная'
-                ])
+            report = {
+                'metadata': {
+                    'timestamp': datetime.now().isoformat(),
+                    'analysis_type': 'DS_AHP_ROBUSTNESS',
+                    'method': results['method'],
+                    'samples': results['samples'],
+                    'confidence_samples': results['confidence_samples'],
+                    'pessimism_coefficient': f"{results['pessimism']:.4f}",
+                    'base_weights': {criterion: round(float(weight), 6)
+                                     for criterion, weight in zip(criteria, results['base_weights'])}
+                },
+                'alternatives': []
+            }
 
-                # Данные (отформатированные)
-                for i, (alt, score) in enumerate(ranking, 1):
-                    is_optimal = 'Да' if alt == optimal_alternative else 'Нет'
-
-                    if alt in intervals:
-                        belief, plausibility = intervals[alt]
-                        interval_str = f"[{belief:.4f}, {plausibility:.4f}]"
-                        width = plausibility - belief
-
-                        writer.writerow([
-                            i, alt, f"{score:.4f}",
-                            f"{belief:.4f}", f"{plausibility:.4f}",
-                            interval_str, f"{width:.4f}", is_optimal
-                        ])
-                    else:
-                        writer.writerow([
-                            i, alt, f"{score:.4f}",
-                            '0.0000', '0.0000',
-                            '[0.0000, 0.0000]', '0.0000', is_optimal
-                        ])
+            for i, alt in enumerate(alternatives):
+                report['alternatives'].append({
+                    'alternative': alt,
+                    'rank_acceptability': [round(float(value), 6) for value in results['rank_acceptability'][i]],
+                    'optimal_frequency': round(float(results['optimal_frequency'][i]), 6),
+                    'confidence_factor': optional(results['confidence_factors'][i]),
+                    'central_weights': {criterion: optional(weight)
+                                        for criterion, weight in zip(criteria, results['central_weights'][i])}
+                })
 
-            return filename
+            with self.atomic_open(json_file) as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
 
-        except Exception as e:
-            print(f"❌ Ошибка при экспорте в CSV: {e}")
-            return None
+            with self.atomic_open(csv_file, newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ['Альтернатива']
+                    + [f"Место {position}" for position in range(1, len(alternatives) + 1)]
+                    + ['Оптимальна', 'Коэффициент доверия']
+                    + [f"Центральный вес: {criterion}" for criterion in criteria]
+                )
+
+                for i, alt in enumerate(alternatives):
+                    confidence = optional(results['confidence_factors'][i])
+                    writer.writerow(
+                        [alt]
+                        + [f"{value:.4f}" for value in results['rank_acceptability'][i]]
+                        + [f"{results['optimal_frequency'][i]:.4f}",
+                           '' if confidence is None else f"{confidence:.4f}"]
+                        + ['' if weight != weight else f"{weight:.4f}" for weight in results['central_weights'][i]]
+                    )
+
+            return json_file, csv_file
 
-    def export_to_all_formats(self, ranking, intervals, optimal_alternative,
-                              pessimism_coef, base_filename=None):
-        """
-        Экспорт ранжирования с интервалами во все форматы
-        """
-        if base_filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            base_filename = f"{self.export_dir}/ranking_{timestamp}"
-
-        # Экспорт во все форматы
-        xml_file = self.export_to_xml(
-            ranking=ranking,
-            intervals=intervals,
-            optimal_alternative=optimal_alternative,
-            pessimism_coef=pessimism_coef,
-            filename=f"{base_filename}.xml"
-        )
-
-        json_file = self.export_to_json(
-            ranking=ranking,
-            intervals=intervals,
-            optimal_alternative=optimal_alternative,
-            pessimism_coef=pessimism_coef,
-            filename=f"{base_filename}.json"
-        )
-
-        csv_file = self.export_to_csv(
-            ranking=ranking,
-            intervals=intervals,
-            optimal_alternative=optimal_alternative,
-            filename=f"{base_filename}.csv"
-        )
-
-        return xml_file, json_file, csv_file
\ No newline at end of file
+        except Exception as e:
+            print(f"❌ Ошибка при экспорте анализа устойчивости: {e}")
+            return None, None
@@ -0,0 +1,113 @@
+from numbers import Integral
+
+import numpy as np
+from utils import Utils
+
+
+class FrameOfDiscernment:
+    """
+    Фрейм различения: отображение альтернатив в биты целочисленной маски.
+
+    Каждая альтернатива получает свой бит, ALL соответствует полной маске,
+    а любая группа альтернатив - объединению битов своих элементов.
+    Маски групп вычисляются один раз и кэшируются (интернируются), поэтому
+    пересечение групп сводится к одной операции '&', а проверка
+    принадлежности - к одной проверке бита.
+    """
+
+    ALL = 'ALL'
+    EMPTY_LABEL = "∅"
+
+    def __init__(self, alternatives):
+        self.alternatives = sorted(set(alternatives) - {self.ALL})
+        self.alternative_bits = {alt: 1 << i for i, alt in enumerate(self.alternatives)}
+        self.full_mask = (1 << len(self.alternatives)) - 1
+        self._group_masks = {self.ALL: self.full_mask}
+        self._mask_labels = {self.full_mask: self.ALL}
+
+    @classmethod
+    def from_groups(cls, groups):
+        """Построение фрейма по набору строк групп (ALL = все встреченные альтернативы)"""
+        alternatives = set()
+        for group in groups:
+            if group == cls.ALL:
+                continue
+            alternatives.update(Utils.parse_group_string(group))
+        return cls(alternatives)
+
+    def size(self):
+        """Количество альтернатив во фрейме"""
+        return len(self.alternatives)
+
+    def mask_dtype(self):
+        """
+        Тип массивов масок NumPy: int64, а для фреймов шире 63 альтернатив -
+        объекты Python int (произвольной длины)
+        """
+        return np.int64 if self.size() < 63 else object
+
+    def mask_of(self, group):
+        """
+        Маска группы. Принимает строку группы или уже готовую маску
+        """
+        if isinstance(group, Integral):
+            return int(group)
+
+        mask = self._group_masks.get(group)
+        if mask is not None:
+            return mask
+
+        mask = 0
+        for alt in Utils.parse_group_string(group):
+            if alt == self.ALL:
+                mask = self.full_mask
+                break
+            if alt not in self.alternative_bits:
+                raise KeyError(f"Альтернатива '{alt}' отсутствует во фрейме различения")
+            mask |= self.alternative_bits[alt]
+
+        self._group_masks[group] = mask
+        return mask
+
+    def label_of(self, mask):
+        """
+        Каноническая строка группы: ALL, одна альтернатива или 'A&B' в алфавитном порядке
+        """
+        label = self._mask_labels.get(mask)
+        if label is not None:
+            return label
+
+        if mask == 0:
+            return self.EMPTY_LABEL
+
+        label = '&'.join(self.members_of(mask))
+        self._mask_labels[mask] = label
+        return label
+
+    def members_of(self, mask):
+        """Список альтернатив, входящих в маску"""
+        return [alt for i, alt in enumerate(self.alternatives) if mask >> i & 1]
+
+    def contains(self, group_mask, alternative):
+        """Проверка: входит ли альтернатива в группу"""
+        return bool(group_mask & self.alternative_bits[alternative])
+
+    def intern_groups(self, groups):
+        """Предварительное вычисление масок для набора групп"""
+        for group in groups:
+            self.mask_of(group)
+
+    def to_masses(self, beliefs):
+        """
+        Перевод распределения масс из строковых ключей в маски.
+        Группы с одинаковой маской (например, 'A&B' и 'B&A') суммируются
+        """
+        masses = {}
+        for group, prob in beliefs.items():
+            mask = self.mask_of(group)
+            masses[mask] = masses.get(mask, 0.0) + prob
+        return masses
+
+    def to_labels(self, masses):
+        """Перевод распределения масс из масок в канонические строки групп"""
+        return {self.label_of(mask): prob for mask, prob in masses.items()}
@@ -0,0 +1,162 @@
+import bisect
+import cProfile
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from config import Config
+
+
+class StageProfiler:
+    """
+    Замеры этапов анализа: время (настенное и процессорное), пик памяти по
+    tracemalloc и счетчики (например, число фокальных элементов после каждого шага
+    комбинирования). Выключенный профилировщик ничего не измеряет.
+
+    Пик памяти этапа - наибольший прирост выделенной Python-памяти относительно
+    начала этапа. tracemalloc заметно замедляет выполнение, поэтому его можно
+    отключить (memory=False). Если задан profile_file, весь анализ выполняется
+    под cProfile, и статистика сохраняется в этот файл (формат pstats)
+    """
+
+    def __init__(self, enabled=False, memory=True, profile_file=None):
+        self.enabled = enabled
+        self.memory = memory
+        self.profile_file = profile_file
+        self.stages = []
+        self.counters = {}
+        self._profile = None
+        self._started_tracing = False
+
+    def begin_run(self):
+        """Начало анализа: сброс замеров, запуск tracemalloc и cProfile"""
+        self.stages = []
+        self.counters = {}
+        if self.enabled and self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.profile_file:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def end_run(self):
+        """Конец анализа: остановка tracemalloc и запись статистики cProfile"""
+        if self._profile is not None:
+            self._profile.disable()
+            try:
+                self._profile.dump_stats(self.profile_file)
+            except OSError as e:
+                print(f"Не удалось сохранить профиль в '{self.profile_file}': {e}")
+            self._profile = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def stage(self, name):
+        """Контекст замера этапа name"""
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_at_start = tracemalloc.get_traced_memory()[0]
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                'stage': name,
+                'wall': time.perf_counter() - wall_started,
+                'cpu': time.process_time() - cpu_started,
+                'peak_memory': None
+            }
+            if tracing:
+                record['peak_memory'] = max(0, tracemalloc.get_traced_memory()[1] - memory_at_start)
+            self.stages.append(record)
+
+    def set_counter(self, name, value):
+        if self.enabled:
+            self.counters[name] = value
+
+    def report(self):
+        """Замеры последнего анализа или None, если профилировщик выключен"""
+        if not self.enabled:
+            return None
+        return {
+            'stages': [dict(record) for record in self.stages],
+            'total_wall': sum(record['wall'] for record in self.stages),
+            'total_cpu': sum(record['cpu'] for record in self.stages),
+            'counters': dict(self.counters),
+            'profile_file': self.profile_file
+        }
+
+    def print_report(self):
+        report = self.report()
+        if report is None:
+            return
+
+        print("\n" + "=" * 60)
+        print("ЗАМЕРЫ ЭТАПОВ АНАЛИЗА")
+        print("=" * 60)
+        print(f"{'Этап':<16}{'Время, мс':>12}{'CPU, мс':>12}{'Пик памяти, КБ':>18}")
+        for record in report['stages']:
+            memory = '' if record['peak_memory'] is None else f"{record['peak_memory'] / 1024:.1f}"
+            print(f"{record['stage']:<16}{record['wall'] * 1000:>12.2f}{record['cpu'] * 1000:>12.2f}{memory:>18}")
+        print(f"{'Всего':<16}{report['total_wall'] * 1000:>12.2f}{report['total_cpu'] * 1000:>12.2f}")
+
+        for name, value in report['counters'].items():
+            print(f"  {name}: {value}")
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек с фиксированными границами корзин (мс): число
+    значений не выше каждой границы и выше последней. Квантили оцениваются
+    верхней границей корзины, в которую они попадают
+    """
+
+    def __init__(self, bounds=None):
+        self.bounds = list(bounds or Config.SERVICE_LATENCY_BUCKETS_MS)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, milliseconds):
+        self.counts[bisect.bisect_left(self.bounds, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.maximum = max(self.maximum, milliseconds)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.maximum
+
+    def report(self):
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            buckets.append({'le': bound, 'count': cumulative})
+        buckets.append({'le': 'inf', 'count': self.count})
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.maximum,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': buckets
+        }
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class LabelledMatrix:
+    """
+    Матрица парных сравнений: плотный массив float64 и подписи строк и столбцов.
+
+    Все этапы анализа работают напрямую с массивом values; pandas.DataFrame
+    создается только для вывода на экран (to_dataframe, str).
+    """
+
+    def __init__(self, values, row_labels, col_labels):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.row_labels = list(row_labels)
+        self.col_labels = list(col_labels)
+
+        if self.values.shape != (len(self.row_labels), len(self.col_labels)):
+            raise ValueError(f"Размер матрицы {self.values.shape} не совпадает с числом подписей "
+                             f"({len(self.row_labels)}, {len(self.col_labels)})")
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Создание из pandas.DataFrame (пустые ячейки - нули)"""
+        return cls(df.fillna(0).to_numpy(dtype=np.float64), df.index, df.columns)
+
+    @classmethod
+    def as_labelled(cls, matrix):
+        """Приведение к LabelledMatrix: матрица возвращается как есть, DataFrame - преобразуется"""
+        if isinstance(matrix, cls):
+            return matrix
+        return cls.from_dataframe(matrix)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def index(self):
+        """Подписи строк (совместимо с DataFrame.index)"""
+        return self.row_labels
+
+    @property
+    def columns(self):
+        """Подписи столбцов (совместимо с DataFrame.columns)"""
+        return self.col_labels
+
+    def copy(self):
+        return LabelledMatrix(self.values.copy(), self.row_labels, self.col_labels)
+
+    def with_values(self, values):
+        """Новая матрица с теми же подписями и другими значениями"""
+        return LabelledMatrix(values, self.row_labels, self.col_labels)
+
+    def to_dataframe(self):
+        """Представление в виде pandas.DataFrame для вывода"""
+        import pandas as pd
+        return pd.DataFrame(self.values, index=self.row_labels, columns=self.col_labels)
+
+    def __str__(self):
+        return str(self.to_dataframe())
+
+    def __repr__(self):
+        return f"LabelledMatrix(shape={self.shape}, rows={self.row_labels}, columns={self.col_labels})"
@@ -1,9 +1,20 @@
-from menu import Menu
-from ds_ahp_analyzer import DSAHPAnalyzer
+import sys
+from config import Config
 
 
-def main():
+def main(argv=None):
     """Главная функция программы"""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # С аргументами - неинтерактивный режим
+    if argv:
+        from cli import CommandLine
+        return CommandLine().run(argv)
+
+    from menu import Menu
+    from ds_ahp_analyzer import DSAHPAnalyzer
+
     print("=" * 60)
     print("       РЕАЛИЗАЦИЯ МЕТОДА ДШ/МАИ")
     print("   (Демпстер-Шейфер / Метод анализа иерархий)")
@@ -15,7 +26,8 @@ def main():
 
     # Запуск главного меню
     menu.show_main_menu()
+    return Config.EXIT_OK
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -1,137 +1,284 @@
+import numpy as np
+from labelled_matrix import LabelledMatrix
+from tracer import tracer
+
+
 class MatrixProcessor:
-    def __init__(self):
+    def __init__(self, frame=None):
         self.transformed_matrices = {}
+        self.frame = frame  # Фрейм различения для перевода групп в маски
+        self.basic_probabilities = {}
+        self.basic_masses = {}
+        self.raw_weights = {}
+
+    def set_frame(self, frame):
+        """Установить фрейм различения"""
+        self.frame = frame
+
+    def reset(self):
+        """
+        Сброс результатов шагов 3-4 и фрейма перед анализом нового файла
+        (фрейм задается заново, когда новый файл загружен)
+        """
+        self.frame = None
+        self.transformed_matrices = {}
+        self.basic_probabilities = {}
+        self.basic_masses = {}
+        self.raw_weights = {}
 
     def transform_matrices(self, criteria_matrices, criteria_weights):
         """
         Преобразование матриц с учетом весов критериев
         """
-        print("\n=== Шаг 3: Преобразование матриц парных сравнений ===")
+        tracer.summary("\n=== Шаг 3: Преобразование матриц парных сравнений ===")
 
-        for criterion, matrix in criteria_matrices.items():
-            weight = criteria_weights[criterion]
-            print(f"\nПреобразование матрицы для критерия '{criterion}' (вес: {weight:.4f})")
+        # Все критерии за один вызов: матрицы одного размера обрабатываются стопкой
+        transformed = self.transform_batch(criteria_matrices, criteria_weights)
 
-            transformed_matrix = self.transform_single_matrix(matrix, weight)
+        for criterion, transformed_matrix in transformed.items():
             self.transformed_matrices[criterion] = transformed_matrix
 
-            print("Преобразованная матрица:")
-            print(transformed_matrix)
+            tracer.summary("\nПреобразование матрицы для критерия '{}' (вес: {:.4f})",
+                           criterion, criteria_weights[criterion])
+            tracer.step("Исходная матрица:")
+            tracer.step("{}", criteria_matrices[criterion])
+            tracer.step("Преобразованная матрица:")
+            tracer.step("{}", transformed_matrix)
 
         return self.transformed_matrices.copy()
 
-    def transform_single_matrix(self, matrix, criterion_weight):
+    @staticmethod
+    def transform_values(values, criterion_weights):
         """
-        Преобразование матрицы
+        Векторизованное правило преобразования: элементы >= 1 умножаются на вес
+        критерия, элементы < 1 делятся на него; диагональ и нули не меняются.
+        values - матрица (r, c) или стопка матриц (k, r, c), criterion_weights -
+        число или массив из k весов
+        """
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.asarray(criterion_weights, dtype=np.float64)
+        if weights.ndim:
+            weights = weights.reshape(weights.shape + (1, 1))
+
+        # Пропускаем диагональные элементы и нули
+        unchanged = np.eye(values.shape[-2], values.shape[-1], dtype=bool) | (values == 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scaled = np.where(values >= 1, values * weights, values / weights)
+
+        return np.where(unchanged, values, scaled)
+
+    def transform_batch(self, criteria_matrices, criteria_weights):
+        """
+        Преобразование матриц всех критериев одним вызовом.
+        Матрицы группируются по размеру, каждая группа обрабатывается стопкой (k, r, c)
         """
-        print("Исходная матрица:")
-        print(matrix)
+        matrices = {criterion: LabelledMatrix.as_labelled(matrix)
+                    for criterion, matrix in criteria_matrices.items()}
+
+        transformed = {}
+        for criteria, stack in self.stack_by_shape(matrices):
+            weights = [criteria_weights[criterion] for criterion in criteria]
+            transformed_stack = self.transform_values(stack, weights)
+
+            for criterion, values in zip(criteria, transformed_stack):
+                transformed[criterion] = matrices[criterion].with_values(values)
+
+        # Сохраняем исходный порядок критериев
+        return {criterion: transformed[criterion] for criterion in matrices}
+
+    @staticmethod
+    def stack_by_shape(matrices):
+        """
+        Группировка матриц по размеру: для каждой группы возвращает
+        список критериев и стопку их значений (k, r, c)
+        """
+        groups = {}
+        for criterion, matrix in matrices.items():
+            groups.setdefault(matrix.shape, []).append(criterion)
+
+        return [(criteria, np.stack([matrices[criterion].values for criterion in criteria]))
+                for criteria in groups.values()]
+
+    def process_criterion(self, criterion, matrix, criterion_weight, keep_matrix=True):
+        """
+        Шаги 3 и 4 для одного критерия: преобразование матрицы и базовые вероятности.
+        Используется при потоковой загрузке, когда критерии поступают по одному;
+        при keep_matrix=False преобразованная матрица не сохраняется
+        """
+        tracer.summary("\nКритерий '{}' (вес: {:.4f})", criterion, criterion_weight)
+
+        transformed_matrix = self.transform_single_matrix(matrix, criterion_weight)
+        if keep_matrix:
+            self.transformed_matrices[criterion] = transformed_matrix
 
-        transformed_matrix = matrix.copy().astype(object)
+        raw_weights = self.calculate_geometric_weights(transformed_matrix)
+        self.raw_weights[criterion] = raw_weights
 
-        for i in range(len(matrix.index)):
-            for j in range(len(matrix.columns)):
-                value = matrix.iloc[i, j]
+        basic_probs = self.normalize_weights(raw_weights)
+        self.basic_probabilities[criterion] = basic_probs
 
-                # Пропускаем диагональные элементы и нули
-                if i == j or value == 0:
-                    continue
+        if self.frame is not None:
+            self.basic_masses[criterion] = self.frame.to_masses(basic_probs)
 
-                if value >= 1:
-                    new_value = value * criterion_weight
-                    transformed_matrix.iloc[i, j] = new_value
+        if tracer.summary_enabled:
+            for group, prob in basic_probs.items():
+                tracer.summary("  m_{}({}) = {:.6f}", criterion, group, prob)
 
-                elif value < 1:
-                    new_value = value / criterion_weight
-                    transformed_matrix.iloc[i, j] = new_value
+        return basic_probs
 
-        return transformed_matrix
+    def load_results(self, basic_probabilities, raw_weights):
+        """
+        Восстановление результатов шагов 3-4 (например, из кэша).
+        Преобразованные матрицы при этом недоступны
+        """
+        self.transformed_matrices = {}
+        self.basic_probabilities = {criterion: dict(probs) for criterion, probs in basic_probabilities.items()}
+        self.raw_weights = {criterion: dict(weights) for criterion, weights in raw_weights.items()}
+        self.basic_masses = {}
+        if self.frame is not None:
+            self.update_basic_masses()
+
+    def remove_criterion(self, criterion):
+        """Удаление всех результатов шагов 3-4 для критерия"""
+        for results in (self.transformed_matrices, self.basic_probabilities, self.basic_masses, self.raw_weights):
+            results.pop(criterion, None)
+
+    def update_basic_masses(self):
+        """
+        Перевод всех базовых вероятностей в маски (когда фрейм стал известен)
+        """
+        self.basic_masses = {criterion: self.frame.to_masses(basic_probs)
+                             for criterion, basic_probs in self.basic_probabilities.items()}
 
+    def transform_single_matrix(self, matrix, criterion_weight):
+        """
+        Преобразование матрицы
+        """
+        tracer.step("Исходная матрица:")
+        tracer.step("{}", matrix)
+
+        matrix = LabelledMatrix.as_labelled(matrix)
+        return matrix.with_values(self.transform_values(matrix.values, criterion_weight))
 
     def calculate_basic_probabilities(self):
 
-        print("\n" + "=" * 60)
-        print("ШАГ 4: ВЫЧИСЛЕНИЕ БАЗОВЫХ ВЕРОЯТНОСТЕЙ")
-        print("=" * 60)
+        tracer.summary("\n" + "=" * 60)
+        tracer.summary("ШАГ 4: ВЫЧИСЛЕНИЕ БАЗОВЫХ ВЕРОЯТНОСТЕЙ")
+        tracer.summary("=" * 60)
 
         self.basic_probabilities = {}
+        self.basic_masses = {}
         self.raw_weights = {}
 
+        # Средние геометрические всех строк всех критериев - одним вызовом
+        geometric_means = self.geometric_weights_batch(self.transformed_matrices)
+
         for criterion, matrix in self.transformed_matrices.items():
-            print(f"\n" + "=" * 50)
-            print(f"КРИТЕРИЙ: {criterion}")
-            print("=" * 50)
+            tracer.step("\n" + "=" * 50)
+            tracer.step("КРИТЕРИЙ: {}", criterion)
+            tracer.step("=" * 50)
 
             # Вычисляем веса групп методом среднего геометрического
-            print(f"\nВЫЧИСЛЕНИЕ ВЕСОВ ГРУПП (до нормирования):")
-            raw_weights = self.calculate_geometric_weights(matrix)
+            tracer.step("\nВЫЧИСЛЕНИЕ ВЕСОВ ГРУПП (до нормирования):")
+            raw_weights = self.calculate_geometric_weights(matrix, geometric_means[criterion])
             self.raw_weights[criterion] = raw_weights
 
             # Нормируем веса
             basic_probs = self.normalize_weights(raw_weights)
             self.basic_probabilities[criterion] = basic_probs
 
-            print(f"\nИТОГОВЫЕ БАЗОВЫЕ ВЕРОЯТНОСТИ m_{criterion}(B_k):")
-            for group, prob in basic_probs.items():
-                print(f"  m_{criterion}({group}) = {prob:.6f}")
+            if self.frame is not None:
+                self.basic_masses[criterion] = self.frame.to_masses(basic_probs)
+
+            tracer.summary("\nИТОГОВЫЕ БАЗОВЫЕ ВЕРОЯТНОСТИ m_{}(B_k):", criterion)
+            if tracer.summary_enabled:
+                for group, prob in basic_probs.items():
+                    tracer.summary("  m_{}({}) = {:.6f}", criterion, group, prob)
 
         return self.basic_probabilities.copy()
 
+    @staticmethod
+    def geometric_means(values):
+        """
+        Средние геометрические строк матрицы (r, c) или стопки матриц (k, r, c).
 
-    def calculate_geometric_weights(self, matrix,):
+        Считаются в лог-пространстве: exp(сумма ln a по ненулевым элементам / c)
+        (элементы положительны), поэтому широкие строки не переполняют
+        произведение. Нули в произведение не входят, но степень берется от полной
+        длины строки; строка из одних нулей дает 0
+        """
+        values = np.asarray(values, dtype=np.float64)
+        nonzero = values != 0
 
-        raw_weights = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logs = np.log(np.where(nonzero, values, 1.0))
+        means = np.exp(logs.sum(axis=-1) / values.shape[-1])
 
-        for i, group in enumerate(matrix.index):
-            print(f"\n--- Группа: {group} ---")
+        return np.where(nonzero.any(axis=-1), means, 0.0)
 
-            # Собираем ВСЕ элементы строки (включая нули и диагональ)
-            row_values = []
+    def geometric_weights_batch(self, matrices):
+        """
+        Средние геометрические строк для всех критериев сразу:
+        матрицы одного размера обрабатываются стопкой
+        """
+        matrices = {criterion: LabelledMatrix.as_labelled(matrix)
+                    for criterion, matrix in matrices.items()}
 
-            for j in range(len(matrix.columns)):
-                value = matrix.iloc[i, j]
-                col_group = matrix.columns[j]
+        means = {}
+        for criteria, stack in self.stack_by_shape(matrices):
+            for criterion, row_means in zip(criteria, self.geometric_means(stack)):
+                means[criterion] = row_means
 
-                row_values.append(value)
-                print(f"  a({group}, {col_group}) = {value}")
+        return {criterion: means[criterion] for criterion in matrices}
 
-            # Вычисляем среднее геометрическое для ВСЕХ элементов
-            gmean = 1.0
-            valid_count = 0
+    def calculate_geometric_weights(self, matrix, geometric_means=None):
+        """
+        Веса групп (строк матрицы) методом среднего геометрического.
+        geometric_means - уже вычисленные средние строк (из geometric_weights_batch)
+        """
+        matrix = LabelledMatrix.as_labelled(matrix)
+        if geometric_means is None:
+            geometric_means = self.geometric_means(matrix.values)
 
-            for val in row_values:
-                if val != 0:  # Нулевые элементы не учитываем в произведении
-                    gmean *= val
-                    valid_count += 1
+        n = len(matrix.col_labels)  # Степень берем от общего количества элементов
+        raw_weights = {}
 
-            n = len(row_values)  # Степень берем от общего количества элементов
+        for i, group in enumerate(matrix.row_labels):
+            geometric_mean = float(geometric_means[i])
+            raw_weights[group] = geometric_mean
 
+            if not tracer.steps_enabled:
+                continue
 
-            if valid_count > 0:
-                geometric_mean = gmean ** (1.0 / n)
-                print(f"  Среднее геометрическое: {gmean:.6f}^(1/{n}) = {geometric_mean:.6f}")
-            else:
-                geometric_mean = 0.0
-                print(f"  Среднее геометрическое: 0 (все элементы нулевые)")
+            tracer.step("\n--- Группа: {} ---", group)
+            for j, col_group in enumerate(matrix.col_labels):
+                tracer.step("  a({}, {}) = {}", group, col_group, matrix.values[i, j])
 
-            raw_weights[group] = geometric_mean
+            if np.any(matrix.values[i] != 0):
+                with np.errstate(over='ignore'):
+                    product = geometric_mean ** n
+                tracer.step("  Среднее геометрическое: {:.6f}^(1/{}) = {:.6f}", product, n, geometric_mean)
+            else:
+                tracer.step("  Среднее геометрическое: 0 (все элементы нулевые)")
 
         return raw_weights
 
-
     def normalize_weights(self, raw_weights):
         """
         Нормирование весов к сумме = 1
         """
-        total = sum(raw_weights.values())
+        weights = np.fromiter(raw_weights.values(), dtype=np.float64, count=len(raw_weights))
+        total = weights.sum()
 
         if total == 0:
             print("Сумма весов равна 0!")
             return {group: 0 for group in raw_weights.keys()}
 
-        basic_probs = {}
-        for group, weight in raw_weights.items():
-            prob = weight / total
-            basic_probs[group] = prob
+        return dict(zip(raw_weights.keys(), (weights / total).tolist()))
 
-        return basic_probs
\ No newline at end of file
+    def get_basic_masses(self):
+        """
+        Получить базовые вероятности с ключами-масками групп
+        """
+        return {criterion: masses.copy() for criterion, masses in self.basic_masses.items()}
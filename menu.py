@@ -15,10 +15,11 @@ class Menu:
         print("-" * 50)
         print("1. Настройки")
         print("2. Запуск анализа ДШ/МАИ")
-        print("3. Выход")
+        print("3. Чувствительность к коэффициенту пессимизма")
+        print("4. Выход")
         print("-" * 50)
 
-        choice = input("Выберите пункт меню (1-3): ").strip()
+        choice = input("Выберите пункт меню (1-4): ").strip()
 
         if choice == "1":
             self.settings_menu()
@@ -28,7 +29,11 @@ class Menu:
             print("ЗАПУСК АНАЛИЗА")
             print("=" * 50)
             self.analyzer.run_complete_analysis()
+            self.show_main_menu()
         elif choice == "3":
+            self._run_pessimism_sweep()
+            self.show_main_menu()
+        elif choice == "4":
             print("Выход из программы...")
         else:
             print("Неверный выбор! Попробуйте снова.")
@@ -97,6 +102,10 @@ class Menu:
 
                 if self.analyzer.set_pessimism_coefficient(new_coef):
                     print(f"Коэффициент пессимизма установлен: {new_coef}")
+                    # Результаты последнего анализа переранжируются без повторной загрузки XML
+                    optimal = self.analyzer.rerank()
+                    if optimal is not None:
+                        print(f"Оптимальная альтернатива по результатам последнего анализа: {optimal}")
                     break
                 else:
                     print(
@@ -107,4 +116,24 @@ class Menu:
 
             retry = input("Попробовать снова? (y/n): ").lower()
             if retry not in ['y', 'yes', 'д', 'да']:
-                break
\ No newline at end of file
+                break
+
+    def _run_pessimism_sweep(self):
+        """Анализ чувствительности к γ по результатам последнего анализа"""
+        if not self.analyzer.has_results():
+            print("Сначала выполните анализ ДШ/МАИ!")
+            return
+
+        print("\n--- Чувствительность к коэффициенту пессимизма ---")
+        points = input(f"Число точек сетки γ (Enter - {Config.PESSIMISM_SWEEP_POINTS}): ").strip()
+        try:
+            points = int(points) if points else None
+        except ValueError:
+            print("❌ Введите целое число!")
+            return
+        if points is not None and points < 2:
+            print("Сетка должна содержать не менее 2 точек!")
+            return
+
+        # Точки смены ранжирования и отрезки выводятся анализатором
+        self.analyzer.run_pessimism_sweep(points=points)
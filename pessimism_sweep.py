@@ -0,0 +1,104 @@
+import numpy as np
+from config import Config
+
+
+class PessimismSweep:
+    """
+    Чувствительность ранжирования к коэффициенту пессимизма γ.
+
+    Оценка альтернативы γ·Bel + (1-γ)·Pl линейна по γ, поэтому оценки всех
+    альтернатив для всех γ получаются одним матричным произведением
+    (m, 2) @ (2, a). Ранжирование меняется только там, где пересекаются
+    прямые оценок двух альтернатив, - эти точки находятся аналитически.
+    """
+
+    def __init__(self, intervals):
+        # Порядок альтернатив - как в BeliefPlausibilityCalculator.rank_alternatives
+        self.alternatives = list(intervals.keys())
+        self.beliefs = np.array([intervals[alt][0] for alt in self.alternatives], dtype=np.float64)
+        self.plausibilities = np.array([intervals[alt][1] for alt in self.alternatives], dtype=np.float64)
+
+    @staticmethod
+    def default_gammas(points=None):
+        """Равномерная сетка γ на [MIN, MAX] коэффициента пессимизма"""
+        return np.linspace(Config.MIN_PESSIMISM_COEFFICIENT, Config.MAX_PESSIMISM_COEFFICIENT,
+                           points or Config.PESSIMISM_SWEEP_POINTS)
+
+    def scores(self, gammas):
+        """Оценки (m, a) всех альтернатив для m значений γ"""
+        gammas = np.asarray(gammas, dtype=np.float64).ravel()
+        coefficients = np.column_stack([gammas, 1.0 - gammas])
+        return coefficients @ np.vstack([self.beliefs, self.plausibilities])
+
+    def rankings(self, scores):
+        """
+        Индексы альтернатив (m, a) по убыванию оценки; при равенстве сохраняется
+        исходный порядок, как в sorted(..., reverse=True)
+        """
+        return np.argsort(-scores, axis=-1, kind='stable')
+
+    def breakpoints(self, low, high):
+        """
+        Значения γ из интервала (low, high), в которых пересекаются оценки
+        какой-либо пары альтернатив, то есть меняется ранжирование
+        """
+        slopes = self.beliefs - self.plausibilities  # Оценка = Pl + γ·(Bel - Pl)
+        slope_diff = slopes[:, np.newaxis] - slopes[np.newaxis, :]
+        intercept_diff = self.plausibilities[np.newaxis, :] - self.plausibilities[:, np.newaxis]
+
+        upper = np.triu(np.ones_like(slope_diff, dtype=bool), k=1)
+        pairs = upper & (slope_diff != 0)
+        crossings = intercept_diff[pairs] / slope_diff[pairs]
+
+        crossings = crossings[(crossings > low) & (crossings < high)]
+        return np.unique(crossings)
+
+    def interval_leader(self):
+        """
+        Альтернатива с одновременно максимальными Bel и Pl - оптимальна при любом γ
+        (как в BeliefPlausibilityCalculator.find_best_by_interval)
+        """
+        leaders = (self.beliefs == self.beliefs.max()) & (self.plausibilities == self.plausibilities.max())
+        indices = np.flatnonzero(leaders)
+        return self.alternatives[indices[0]] if indices.size else None
+
+    def run(self, gammas=None):
+        """
+        Полный анализ чувствительности: оценки и ранжирование для каждого γ,
+        точки смены ранжирования и оптимальная альтернатива на каждом отрезке
+        """
+        gammas = self.default_gammas() if gammas is None else np.asarray(gammas, dtype=np.float64).ravel()
+        if not self.alternatives or gammas.size == 0:
+            return None
+
+        scores = self.scores(gammas)
+        rankings = self.rankings(scores)
+
+        low, high = float(gammas.min()), float(gammas.max())
+        breakpoints = self.breakpoints(low, high)
+        leader = self.interval_leader()
+
+        # Ранжирование на отрезке между точками смены постоянно - считаем его в середине
+        bounds = np.concatenate([[low], breakpoints, [high]])
+        midpoints = (bounds[:-1] + bounds[1:]) / 2
+        segment_rankings = self.rankings(self.scores(midpoints))
+
+        segments = []
+        for start, end, ranking in zip(bounds[:-1], bounds[1:], segment_rankings):
+            names = [self.alternatives[index] for index in ranking]
+            segments.append({
+                'start': float(start),
+                'end': float(end),
+                'ranking': names,
+                'optimal_alternative': leader or names[0]
+            })
+
+        return {
+            'alternatives': list(self.alternatives),
+            'gammas': gammas,
+            'scores': scores,
+            'rankings': rankings,
+            'optimal_alternatives': [leader or self.alternatives[index] for index in rankings[:, 0]],
+            'breakpoints': breakpoints.tolist(),
+            'segments': segments
+        }
@@ -0,0 +1,134 @@
+import argparse
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from config import Config
+
+
+class ProblemGenerator:
+    """
+    Генератор синтетических задач в формате ds_ahp_analysis.
+
+    Для каждого критерия случайно выбираются непересекающиеся фокальные группы
+    (до groups_per_criterion групп по 1..max_group_size альтернатив) и, с
+    вероятностью all_probability, множество ALL. Каждая группа сравнивается с ALL
+    по шкале Саати, сравнения групп между собой усекаются (0) с вероятностью
+    truncation, иначе заполняются взаимно обратными оценками. Одинаковый seed
+    дает одинаковый файл
+    """
+
+    SCALE = np.arange(1, 10, dtype=np.float64)  # Шкала Саати 1..9
+    RECIPROCAL_PROBABILITY = 0.2  # Доля обратных оценок (группа слабее сравниваемой)
+
+    def __init__(self, alternatives, criteria, groups_per_criterion=None, max_group_size=None,
+                 truncation=None, all_probability=None, seed=None):
+        self.alternatives = [f"A{i:0{len(str(alternatives))}d}" for i in range(1, alternatives + 1)]
+        self.criteria = [f"Критерий {i}" for i in range(1, criteria + 1)]
+        self.groups_per_criterion = groups_per_criterion or Config.GENERATOR_GROUPS_PER_CRITERION
+        self.max_group_size = max_group_size or Config.GENERATOR_MAX_GROUP_SIZE
+        self.truncation = Config.GENERATOR_TRUNCATION if truncation is None else truncation
+        self.all_probability = Config.GENERATOR_ALL_PROBABILITY if all_probability is None else all_probability
+        self.seed = seed
+
+    def random_value(self, rng):
+        """Оценка по шкале Саати: целое 1..9 или обратное к нему"""
+        value = rng.choice(self.SCALE)
+        return 1.0 / value if rng.random() < self.RECIPROCAL_PROBABILITY else value
+
+    def criterion_groups(self, rng):
+        """Непересекающиеся фокальные группы критерия"""
+        order = rng.permutation(len(self.alternatives))
+        groups = []
+        position = 0
+        while len(groups) < self.groups_per_criterion and position < len(order):
+            size = int(rng.integers(1, self.max_group_size + 1))
+            members = sorted(order[position:position + size])
+            groups.append('&'.join(self.alternatives[index] for index in members))
+            position += size
+        return groups
+
+    def criterion_matrix(self, rng):
+        """(группы строк/столбцов, матрица усеченных парных сравнений)"""
+        groups = self.criterion_groups(rng)
+        include_all = rng.random() < self.all_probability
+        labels = (groups + ['ALL']) if include_all else groups
+
+        size = len(labels)
+        matrix = np.eye(size)
+        for i in range(len(groups)):
+            if include_all:
+                value = self.random_value(rng)
+                matrix[i, -1] = value
+                matrix[-1, i] = 1.0 / value
+            for j in range(i + 1, len(groups)):
+                if rng.random() >= self.truncation:
+                    value = self.random_value(rng)
+                    matrix[i, j] = value
+                    matrix[j, i] = 1.0 / value
+        return labels, matrix
+
+    def generate(self):
+        """XML документ задачи (ElementTree)"""
+        rng = np.random.default_rng(self.seed)
+
+        root = ET.Element('ds_ahp_analysis')
+        metadata = ET.SubElement(root, 'metadata')
+        ET.SubElement(metadata, 'criteria_count').text = str(len(self.criteria))
+        ET.SubElement(metadata, 'alternatives').text = ','.join(self.alternatives)
+
+        criteria_elem = ET.SubElement(root, 'criteria')
+        for number, criterion in enumerate(self.criteria, 1):
+            criterion_elem = ET.SubElement(criteria_elem, 'criterion', id=str(number), name=criterion)
+            matrix_elem = ET.SubElement(criterion_elem, 'matrix')
+
+            labels, matrix = self.criterion_matrix(rng)
+            for row_label, row in zip(labels, matrix):
+                row_elem = ET.SubElement(matrix_elem, 'row', group=row_label)
+                for col_label, value in zip(labels, row):
+                    ET.SubElement(row_elem, 'column', group=col_label).text = f"{value:.6g}"
+
+        ET.indent(root, space="  ")
+        return ET.ElementTree(root)
+
+    def write(self, file_path):
+        self.generate().write(file_path, encoding='utf-8', xml_declaration=True)
+        return file_path
+
+    def criteria_weights(self):
+        """Случайные веса критериев (ручной метод), сумма равна 1"""
+        rng = np.random.default_rng(None if self.seed is None else self.seed + 1)
+        weights = rng.uniform(1.0, 9.0, len(self.criteria))
+        weights /= weights.sum()
+        return dict(zip(self.criteria, weights.tolist()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Генерация синтетической задачи ДШ/МАИ в формате ds_ahp_analysis')
+    parser.add_argument('output', metavar='XML', help='путь к создаваемому файлу')
+    parser.add_argument('--alternatives', type=int, required=True, metavar='N', help='число альтернатив')
+    parser.add_argument('--criteria', type=int, required=True, metavar='K', help='число критериев')
+    parser.add_argument('--groups', type=int, metavar='G',
+                        help=f'фокальных групп на критерий (по умолчанию {Config.GENERATOR_GROUPS_PER_CRITERION})')
+    parser.add_argument('--group-size', dest='group_size', type=int, metavar='S',
+                        help=f'наибольший размер группы (по умолчанию {Config.GENERATOR_MAX_GROUP_SIZE})')
+    parser.add_argument('--truncation', type=float, metavar='P',
+                        help='доля усеченных сравнений групп между собой '
+                             f'(по умолчанию {Config.GENERATOR_TRUNCATION})')
+    parser.add_argument('--all-probability', dest='all_probability', type=float, metavar='P',
+                        help=f'вероятность наличия ALL в критерии (по умолчанию {Config.GENERATOR_ALL_PROBABILITY})')
+    parser.add_argument('--seed', type=int, help='начальное значение генератора случайных чисел')
+    args = parser.parse_args(argv)
+
+    if args.alternatives < 1 or args.criteria < 1:
+        print("Число альтернатив и критериев должно быть положительным")
+        return Config.EXIT_USAGE_ERROR
+
+    generator = ProblemGenerator(args.alternatives, args.criteria, args.groups, args.group_size,
+                                 args.truncation, args.all_probability, args.seed)
+    print(f"Задача записана в {generator.write(args.output)}")
+    return Config.EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from export_formats import ExportFormats
+from utils import Utils
+
+
+class ResultStore:
+    """
+    Хранилище результатов анализа во встроенной базе SQLite.
+
+    Каждый анализ файла - запись в runs (хэш входного файла, настройки, время),
+    Bel/Pl/оценка/место каждой альтернативы - в alternatives, история конфликтов
+    комбинирования - в conflicts. Индексы позволяют искать запуски по входному
+    файлу, альтернативе и дате. Результаты пакета записываются одной транзакцией.
+    Файлы XML/JSON/CSV любого сохраненного запуска можно получить заново
+    через export_run.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            input_path TEXT NOT NULL,
+            input_hash TEXT,
+            settings TEXT NOT NULL,
+            pessimism REAL,
+            status TEXT NOT NULL,
+            optimal_alternative TEXT,
+            error_bound REAL NOT NULL DEFAULT 0,
+            elapsed REAL,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS alternatives (
+            run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+            alternative TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            score REAL NOT NULL,
+            belief REAL NOT NULL,
+            plausibility REAL NOT NULL,
+            PRIMARY KEY (run_id, alternative)
+        );
+        CREATE TABLE IF NOT EXISTS conflicts (
+            run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+            step INTEGER NOT NULL,
+            conflict REAL NOT NULL,
+            PRIMARY KEY (run_id, step)
+        );
+        CREATE INDEX IF NOT EXISTS runs_input_hash ON runs(input_hash);
+        CREATE INDEX IF NOT EXISTS runs_input_path ON runs(input_path);
+        CREATE INDEX IF NOT EXISTS runs_created_at ON runs(created_at);
+        CREATE INDEX IF NOT EXISTS alternatives_alternative ON alternatives(alternative, rank);
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        # Чтение базы другими процессами не блокирует запись
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def input_hash(file_path):
+        """Хэш содержимого входного файла или None, если файл недоступен"""
+        try:
+            return Utils.file_hash(file_path)
+        except OSError:
+            return None
+
+    # Запись
+
+    def add_run(self, result, settings):
+        """Сохранение одного результата. Возвращает идентификатор запуска"""
+        return self.add_runs([result], settings)[0]
+
+    def add_runs(self, results, settings):
+        """
+        Сохранение результатов (формат результата пакетного анализа: file, status,
+        optimal_alternative, ranking, intervals, conflict_history, elapsed, error)
+        одной транзакцией. input_hash результата - хэш файла, вычисленный при его
+        загрузке для анализа; файл читается заново, только если хэша в результате нет.
+        Возвращает идентификаторы запусков
+        """
+        settings_json = json.dumps(settings, ensure_ascii=False, sort_keys=True, default=str)
+        created_at = datetime.now().isoformat()
+        run_ids = []
+
+        with self.connection:
+            for result in results:
+                cursor = self.connection.execute(
+                    "INSERT INTO runs (created_at, input_path, input_hash, settings, pessimism, status, "
+                    "optimal_alternative, error_bound, elapsed, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (created_at, os.path.abspath(result['file']),
+                     result['input_hash'] if 'input_hash' in result else self.input_hash(result['file']),
+                     settings_json, settings.get('pessimism'), result['status'],
+                     result.get('optimal_alternative'), result.get('error_bound', 0.0),
+                     result.get('elapsed'), result.get('error'))
+                )
+                run_id = cursor.lastrowid
+                run_ids.append(run_id)
+
+                intervals = result.get('intervals', {})
+                self.connection.executemany(
+                    "INSERT INTO alternatives (run_id, alternative, rank, score, belief, plausibility) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(run_id, alt, rank, score, *intervals[alt])
+                     for rank, (alt, score) in enumerate(result.get('ranking', []), 1)]
+                )
+                self.connection.executemany(
+                    "INSERT INTO conflicts (run_id, step, conflict) VALUES (?, ?, ?)",
+                    [(run_id, step, conflict)
+                     for step, conflict in enumerate(result.get('conflict_history', []), 1)]
+                )
+
+        return run_ids
+
+    # Запросы
+
+    def find_runs(self, input_path=None, input_hash=None, alternative=None, optimal=False,
+                  since=None, until=None, limit=None):
+        """
+        Поиск запусков (новые первыми). alternative - запуски, в которых есть эта
+        альтернатива (optimal=True - в которых она оптимальна); since/until -
+        границы даты (datetime или строка ISO)
+        """
+        conditions = []
+        params = []
+        if input_path is not None:
+            conditions.append("input_path = ?")
+            params.append(os.path.abspath(input_path))
+        if input_hash is not None:
+            conditions.append("input_hash = ?")
+            params.append(input_hash)
+        if alternative is not None:
+            if optimal:
+                conditions.append("optimal_alternative = ?")
+            else:
+                conditions.append("id IN (SELECT run_id FROM alternatives WHERE alternative = ?)")
+            params.append(alternative)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        if until is not None:
+            conditions.append("created_at <= ?")
+            params.append(until.isoformat() if isinstance(until, datetime) else until)
+
+        query = "SELECT * FROM runs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return [self._run_row(row) for row in self.connection.execute(query, params)]
+
+    def get_run(self, run_id):
+        """Запуск с ранжированием, интервалами и историей конфликтов или None"""
+        row = self.connection.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+
+        run = self._run_row(row)
+        alternatives = self.connection.execute(
+            "SELECT alternative, score, belief, plausibility FROM alternatives WHERE run_id = ? ORDER BY rank",
+            (run_id,)
+        ).fetchall()
+        run['ranking'] = [(alt['alternative'], alt['score']) for alt in alternatives]
+        run['scores'] = dict(run['ranking'])
+        run['intervals'] = {alt['alternative']: (alt['belief'], alt['plausibility']) for alt in alternatives}
+        run['conflict_history'] = [
+            conflict for (conflict,) in self.connection.execute(
+                "SELECT conflict FROM conflicts WHERE run_id = ? ORDER BY step", (run_id,)
+            )
+        ]
+        return run
+
+    def alternative_history(self, alternative):
+        """Места и интервалы альтернативы во всех запусках (новые первыми)"""
+        rows = self.connection.execute(
+            "SELECT runs.id, runs.created_at, runs.input_path, alternatives.rank, alternatives.score, "
+            "alternatives.belief, alternatives.plausibility FROM alternatives "
+            "JOIN runs ON runs.id = alternatives.run_id WHERE alternatives.alternative = ? "
+            "ORDER BY runs.created_at DESC, runs.id DESC",
+            (alternative,)
+        )
+        return [dict(row) for row in rows]
+
+    def delete_run(self, run_id):
+        with self.connection:
+            self.connection.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    @staticmethod
+    def _run_row(row):
+        run = dict(row)
+        run['settings'] = json.loads(run['settings'])
+        return run
+
+    # Экспорт
+
+    def export_run(self, run_id, export_dir, base_filename=None):
+        """
+        Файлы XML/JSON/CSV сохраненного запуска (те же форматы, что и при анализе).
+        base_filename по умолчанию - run_<id>. Возвращает (xml, json, csv) или None
+        """
+        run = self.get_run(run_id)
+        if run is None or not run['ranking']:
+            print(f"Запуск {run_id} не найден в хранилище или не содержит ранжирования")
+            return None
+
+        export_formats = ExportFormats(export_dir)
+        if base_filename is None:
+            base_filename = os.path.join(export_formats.export_dir, f"run_{run_id}")
+        return export_formats.export_to_all_formats(
+            ranking=run['ranking'],
+            intervals=run['intervals'],
+            optimal_alternative=run['optimal_alternative'],
+            pessimism_coef=run['pessimism'],
+            base_filename=base_filename
+        )
@@ -0,0 +1,319 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from config import Config
+from eigen_solver import EigenvectorSolver
+from matrix_processor import MatrixProcessor
+from tracer import tracer
+
+
+def perturb_judgments(values, count, spread, rng):
+    """
+    count возмущенных копий матрицы парных сравнений (count, r, c): каждое суждение
+    над диагональю умножается на exp(N(0, spread)), симметричное - делится на тот же
+    множитель, поэтому обратная симметрия сохраняется. Нули и диагональ не меняются
+    """
+    rows, cols = values.shape
+    noise = rng.normal(0.0, spread, size=(count, rows, cols))
+    if rows == cols:
+        upper = np.triu(noise, k=1)
+        noise = upper - upper.transpose(0, 2, 1)
+    else:
+        noise[:, np.eye(rows, cols, dtype=bool)] = 0.0
+    return values * np.exp(noise)
+
+
+def simulate_chunk(problem, sampler, count, seed):
+    """
+    Задание пула: count выборок весов одним векторизованным пакетом.
+    Возвращает счетчики мест (a, a), число побед каждой альтернативы
+    и суммы весов по выборкам, в которых альтернатива оптимальна (a, k)
+    """
+    rng = np.random.default_rng(seed)
+    weights = RobustnessAnalyzer.sample_weights(sampler, count, rng)
+    rankings, optimal = RobustnessAnalyzer.evaluate(problem, weights)
+
+    alternatives_count = len(problem['alternatives'])
+    rank_counts = np.zeros((alternatives_count, alternatives_count), dtype=np.int64)
+    for position in range(alternatives_count):
+        rank_counts[:, position] = np.bincount(rankings[:, position], minlength=alternatives_count)
+
+    optimal_counts = np.bincount(optimal, minlength=alternatives_count)
+    weight_sums = np.zeros((alternatives_count, weights.shape[1]))
+    np.add.at(weight_sums, optimal, weights)
+
+    return rank_counts, optimal_counts, weight_sums
+
+
+def confidence_chunk(problem, alternative_index, central_weights, count, seed, spread):
+    """
+    Задание пула: доля выборок с возмущенными суждениями об альтернативах,
+    в которых альтернатива оптимальна при своем центральном векторе весов
+    """
+    rng = np.random.default_rng(seed)
+    values = [perturb_judgments(matrix, count, spread, rng) for matrix in problem['values']]
+    weights = np.broadcast_to(central_weights, (count, len(central_weights)))
+    _, optimal = RobustnessAnalyzer.evaluate(problem, weights, values)
+    return alternative_index, int(np.count_nonzero(optimal == alternative_index))
+
+
+class RobustnessAnalyzer:
+    """
+    Устойчивость результата к неопределенности весов критериев (SMAA).
+
+    Матрицы критериев загружаются один раз. Для N выборок весов (распределение
+    Дирихле вокруг заданных весов или веса из возмущенной матрицы сравнения
+    критериев) заново выполняются шаги 3-6: преобразование, базовые вероятности,
+    комбинирование по Демпстеру и ранжирование. Структура фокальных элементов
+    от весов не зависит, поэтому план комбинирования строится один раз, а
+    каждый пакет выборок обрабатывается целиком операциями над массивами.
+    Пакеты распределяются между процессами пула.
+
+    Результат - индексы приемлемости мест b[i, r] (доля выборок, в которых
+    альтернатива i заняла место r + 1), центральные векторы весов и
+    коэффициенты доверия альтернатив.
+    """
+
+    def __init__(self, criteria_matrices, frame, pessimism_coef=None, max_workers=None, batch_size=None):
+        self.problem = self.build_problem(
+            criteria_matrices, frame,
+            Config.DEFAULT_PESSIMISM_COEFFICIENT if pessimism_coef is None else pessimism_coef
+        )
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size or Config.ROBUSTNESS_BATCH_SIZE
+        self.results = None
+
+    @staticmethod
+    def build_problem(criteria_matrices, frame, pessimism_coef):
+        """
+        Неизменная часть задачи: значения матриц, план комбинирования по Демпстеру
+        и матрицы перехода от фокальных элементов к Bel/Pl альтернатив
+        """
+        criteria = list(criteria_matrices.keys())
+        values = [np.asarray(criteria_matrices[criterion].values, dtype=np.float64) for criterion in criteria]
+        row_masks = [np.array([frame.mask_of(group) for group in criteria_matrices[criterion].row_labels],
+                              dtype=frame.mask_dtype()) for criterion in criteria]
+
+        # Пересечения фокальных элементов при последовательном комбинировании
+        steps = []
+        current_masks = row_masks[0]
+        for masks in row_masks[1:]:
+            intersections = np.bitwise_and.outer(current_masks, masks).ravel()
+            focal_masks, inverse = np.unique(intersections, return_inverse=True)
+            inverse = inverse.ravel()
+            order = np.argsort(inverse, kind='stable')
+            starts = np.searchsorted(inverse[order], np.arange(len(focal_masks)))
+
+            empty = np.flatnonzero(focal_masks == 0)
+            keep = focal_masks != 0
+            steps.append({
+                'order': order,
+                'starts': starts,
+                'empty': int(empty[0]) if empty.size else None,
+                'keep': keep
+            })
+            current_masks = focal_masks[keep]
+
+        alternatives = list(frame.alternatives)
+        bits = [frame.alternative_bits[alt] for alt in alternatives]
+        belief_matrix = np.array([[mask == bit for bit in bits] for mask in current_masks], dtype=np.float64)
+        contains_matrix = np.array([[bool(mask & bit) for bit in bits] for mask in current_masks],
+                                   dtype=np.float64)
+
+        return {
+            'criteria': criteria,
+            'alternatives': alternatives,
+            'values': values,
+            'steps': steps,
+            'belief_matrix': belief_matrix.reshape(len(current_masks), len(alternatives)),
+            'contains_matrix': contains_matrix.reshape(len(current_masks), len(alternatives)),
+            'pessimism': pessimism_coef
+        }
+
+    @staticmethod
+    def evaluate(problem, weights, values=None):
+        """
+        Шаги 3-6 для пакета из S векторов весов (S, k).
+        values - матрицы критериев (r, c) или стопки возмущенных матриц (S, r, c).
+        Возвращает ранжирования (S, a) - индексы альтернатив по убыванию оценки -
+        и индексы оптимальных альтернатив (S,)
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        samples = len(weights)
+        values = problem['values'] if values is None else values
+
+        masses = None
+        for c, criterion_values in enumerate(values):
+            # Шаги 3-4: преобразование и базовые вероятности для всех выборок сразу
+            transformed = MatrixProcessor.transform_values(criterion_values, weights[:, c])
+            means = MatrixProcessor.geometric_means(transformed)
+            totals = means.sum(axis=-1, keepdims=True)
+            probabilities = np.divide(means, totals, out=np.zeros_like(means), where=totals != 0)
+
+            if masses is None:
+                masses = probabilities
+                continue
+
+            # Шаг 5: комбинирование по готовому плану пересечений
+            step = problem['steps'][c - 1]
+            products = (masses[:, :, np.newaxis] * probabilities[:, np.newaxis, :]).reshape(samples, -1)
+            combined = np.add.reduceat(products[:, step['order']], step['starts'], axis=1)
+
+            if step['empty'] is None:
+                conflict = np.zeros(samples)
+            else:
+                conflict = combined[:, step['empty']]
+            combined = combined[:, step['keep']]
+
+            normalization = np.where(conflict < 1.0, 1.0 - conflict, 1.0)
+            masses = combined / normalization[:, np.newaxis]
+
+        # Шаг 6: Bel и Pl альтернатив, оценки с коэффициентом пессимизма
+        beliefs = masses @ problem['belief_matrix']
+        significant = np.where(masses > Config.PLAUSIBILITY_THRESHOLD, masses, 0.0)
+        plausibilities = significant @ problem['contains_matrix']
+
+        gamma = problem['pessimism']
+        scores = gamma * beliefs + (1 - gamma) * plausibilities
+        rankings = np.argsort(-scores, axis=1, kind='stable')
+
+        # Как в find_optimal_alternative: сначала альтернатива с максимальными Bel и Pl
+        leaders = ((beliefs == beliefs.max(axis=1, keepdims=True))
+                   & (plausibilities == plausibilities.max(axis=1, keepdims=True)))
+        optimal = np.where(leaders.any(axis=1), leaders.argmax(axis=1), rankings[:, 0])
+
+        return rankings, optimal
+
+    @staticmethod
+    def sample_weights(sampler, count, rng):
+        """
+        Выборка count векторов весов (count, k).
+        Дирихле: параметры concentration · w; суждения: возмущенная матрица
+        сравнения критериев и ее главный собственный вектор
+        """
+        if sampler['method'] == Config.ROBUSTNESS_METHOD_JUDGMENTS:
+            matrices = perturb_judgments(sampler['criteria_matrix'], count, sampler['spread'], rng)
+            return EigenvectorSolver().solve(matrices)['weights']
+
+        return rng.dirichlet(sampler['concentration'] * sampler['weights'], size=count)
+
+    def run(self, weights, samples=None, method=None, criteria_matrix=None,
+            concentration=None, spread=None, confidence_samples=None, seed=None):
+        """
+        Моделирование samples выборок весов вокруг weights ({критерий: вес}).
+        Для метода judgments нужна матрица сравнения критериев в порядке критериев
+        """
+        criteria = self.problem['criteria']
+        samples = samples or Config.DEFAULT_ROBUSTNESS_SAMPLES
+        method = method or Config.ROBUSTNESS_METHOD_DIRICHLET
+        spread = Config.JUDGMENT_SPREAD if spread is None else spread
+        confidence_samples = confidence_samples or Config.CONFIDENCE_SAMPLES
+
+        if method not in Config.ROBUSTNESS_METHODS:
+            raise ValueError(f"Неизвестный метод выборки весов: {method}")
+
+        missing = [criterion for criterion in criteria if criterion not in weights]
+        if missing:
+            raise ValueError(f"Не заданы веса для критериев: {missing}")
+
+        base_weights = np.array([weights[criterion] for criterion in criteria], dtype=np.float64)
+        base_weights = base_weights / base_weights.sum()
+
+        sampler = {
+            'method': method,
+            'weights': base_weights,
+            'concentration': concentration or Config.DIRICHLET_CONCENTRATION,
+            'spread': spread
+        }
+        if method == Config.ROBUSTNESS_METHOD_JUDGMENTS:
+            if criteria_matrix is None:
+                raise ValueError("Для выборки по суждениям требуется матрица сравнения критериев")
+            sampler['criteria_matrix'] = np.asarray(criteria_matrix, dtype=np.float64)
+
+        tracer.summary("\n" + "=" * 60)
+        tracer.summary("АНАЛИЗ УСТОЙЧИВОСТИ ВЕСОВ КРИТЕРИЕВ (МОНТЕ-КАРЛО)")
+        tracer.summary("=" * 60)
+        tracer.summary("Выборок: {}, метод: {}, процессов: {}, пакет: {}",
+                       samples, method, self.max_workers, self.batch_size)
+
+        seeds = np.random.SeedSequence(seed)
+        sample_seeds, confidence_seeds = seeds.spawn(2)
+
+        # Этап 1: индексы приемлемости мест и центральные векторы весов
+        counts = [min(self.batch_size, samples - start) for start in range(0, samples, self.batch_size)]
+        tasks = [(simulate_chunk, (self.problem, sampler, count, chunk_seed))
+                 for count, chunk_seed in zip(counts, sample_seeds.spawn(len(counts)))]
+
+        alternatives_count = len(self.problem['alternatives'])
+        rank_counts = np.zeros((alternatives_count, alternatives_count), dtype=np.int64)
+        optimal_counts = np.zeros(alternatives_count, dtype=np.int64)
+        weight_sums = np.zeros((alternatives_count, len(criteria)))
+
+        for chunk_ranks, chunk_optimal, chunk_weights in self._run_tasks(tasks):
+            rank_counts += chunk_ranks
+            optimal_counts += chunk_optimal
+            weight_sums += chunk_weights
+
+        with np.errstate(invalid='ignore'):
+            central_weights = weight_sums / optimal_counts[:, np.newaxis]
+
+        # Этап 2: коэффициенты доверия - центральные веса и возмущенные суждения об альтернативах
+        candidates = np.flatnonzero(optimal_counts)
+        confidence_counts = [min(self.batch_size, confidence_samples - start)
+                             for start in range(0, confidence_samples, self.batch_size)]
+        tasks = []
+        for index, alternative_seeds in zip(candidates, confidence_seeds.spawn(len(candidates))):
+            for count, chunk_seed in zip(confidence_counts, alternative_seeds.spawn(len(confidence_counts))):
+                tasks.append((confidence_chunk,
+                              (self.problem, int(index), central_weights[index], count, chunk_seed, spread)))
+
+        confidence_factors = np.full(alternatives_count, np.nan)
+        confidence_factors[candidates] = 0.0
+        for index, optimal_count in self._run_tasks(tasks):
+            confidence_factors[index] += optimal_count / confidence_samples
+
+        self.results = {
+            'alternatives': list(self.problem['alternatives']),
+            'criteria': list(criteria),
+            'method': method,
+            'samples': samples,
+            'base_weights': base_weights,
+            'pessimism': self.problem['pessimism'],
+            'rank_acceptability': rank_counts / samples,
+            'optimal_frequency': optimal_counts / samples,
+            'central_weights': central_weights,
+            'confidence_factors': confidence_factors,
+            'confidence_samples': confidence_samples
+        }
+        self.print_results()
+        return self.results
+
+    def _run_tasks(self, tasks):
+        """Выполнение заданий в пуле процессов (или в текущем процессе при одном обработчике)"""
+        if self.max_workers == 1 or len(tasks) <= 1:
+            return [function(*args) for function, args in tasks]
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+            futures = [executor.submit(function, *args) for function, args in tasks]
+            return [future.result() for future in futures]
+
+    def print_results(self):
+        """Вывод индексов приемлемости и коэффициентов доверия"""
+        results = self.results
+        tracer.summary("\nИндексы приемлемости мест (доля выборок):")
+        header = ' '.join(f"{position:>7}" for position in range(1, len(results['alternatives']) + 1))
+        tracer.summary("  {:<20} {}", "Альтернатива", header)
+        for i, alt in enumerate(results['alternatives']):
+            tracer.summary("  {:<20} {}", alt,
+                           ' '.join(f"{value:>7.4f}" for value in results['rank_acceptability'][i]))
+
+        tracer.summary("\nОптимальность и коэффициенты доверия:")
+        for i, alt in enumerate(results['alternatives']):
+            confidence = results['confidence_factors'][i]
+            tracer.summary("  {}: оптимальна в {:.2%} выборок, коэффициент доверия {}", alt,
+                           results['optimal_frequency'][i],
+                           '-' if np.isnan(confidence) else f"{confidence:.4f}")
+
+    def get_results(self):
+        return dict(self.results) if self.results else None
@@ -0,0 +1,542 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import http
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+from config import Config
+from analysis_api import Problem, analyze
+from instrumentation import LatencyHistogram
+from tracer import tracer
+
+
+# Небольшая задача для прогрева процессов анализа
+WARMUP_PROBLEM = {
+    'criteria': [
+        {'name': 'Критерий 1', 'groups': ['A', 'B&C', 'ALL'],
+         'matrix': [[1, 0, 3], [0, 1, 2], ['1/3', '1/2', 1]]},
+        {'name': 'Критерий 2', 'groups': ['A&B', 'C', 'ALL'],
+         'matrix': [[1, 0, 2], [0, 1, 4], ['1/2', '1/4', 1]]}
+    ]
+}
+WARMUP_WEIGHTS = {'Критерий 1': 0.5, 'Критерий 2': 0.5}
+
+# Разобранные задачи процесса анализа: ключ задачи -> Problem (вытеснение LRU)
+_problems = OrderedDict()
+
+
+def init_worker():
+    """
+    Инициализация процесса пула: вывод хода вычислений отключается, и выполняется
+    пробный анализ, чтобы импорт модулей и первые вызовы NumPy прошли до запросов
+    """
+    tracer.configure('silent')
+    analyze(WARMUP_PROBLEM, WARMUP_WEIGHTS, verbosity=None)
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def run_analysis(problem_key, problem, params):
+    """
+    Анализ в процессе пула. problem - словарь задачи или байты XML; разобранная
+    задача сохраняется по problem_key, поэтому запросы с теми же матрицами и
+    другими весами или γ не разбирают ее заново. Возвращает (результат, время, мс)
+    """
+    started = time.perf_counter()
+    parsed = _problems.get(problem_key)
+    if parsed is None:
+        parsed = Problem.load(problem)
+        _problems[problem_key] = parsed
+        if len(_problems) > Config.SERVICE_PROBLEM_CACHE_SIZE:
+            _problems.popitem(last=False)
+    else:
+        _problems.move_to_end(problem_key)
+
+    result = analyze(parsed, verbosity=None, **params)
+    return result.as_dict(), (time.perf_counter() - started) * 1000
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers
+
+
+class AnalysisService:
+    """
+    HTTP/JSON сервис анализа на asyncio без внешних зависимостей.
+
+    Анализы выполняются в пуле процессов, которые запускаются и прогреваются
+    при старте сервиса. Запросы ставятся в ограниченную очередь; если она
+    заполнена, сервис сразу отвечает 503 (Retry-After), а не накапливает работу.
+    Одинаковые запросы (та же задача и те же параметры), поступившие, пока
+    анализ еще выполняется, получают результат этого же анализа.
+
+    POST /analyze
+        JSON: {"problem": <словарь задачи или текст XML>, "weights": {...} или
+        "criteria_matrix": ..., "pessimism": γ, "kernel", "max_focal_elements",
+        "min_focal_mass", "summarization"}; формат задачи - см. analysis_api.Problem.
+        XML (Content-Type */xml): тело - задача в формате ds_ahp_analysis,
+        параметры - в строке запроса (weights и criteria_matrix - JSON).
+    GET /health  - состояние сервиса
+    GET /metrics - счетчики и гистограммы задержек (мс)
+    """
+
+    # Параметры анализа: имя -> преобразование значения
+    PARAMS = {
+        'weights': None,
+        'criteria_matrix': None,
+        'pessimism': float,
+        'kernel': str,
+        'max_focal_elements': int,
+        'min_focal_mass': float,
+        'summarization': str
+    }
+    JSON_PARAMS = ('weights', 'criteria_matrix')  # В строке запроса передаются как JSON
+
+    def __init__(self, host=None, port=None, workers=None, queue_size=None, request_timeout=None):
+        self.host = host or Config.SERVICE_HOST
+        self.port = Config.SERVICE_PORT if port is None else port
+        self.workers = workers or Config.SERVICE_WORKERS or os.cpu_count() or 1
+        self.queue_size = queue_size or Config.SERVICE_QUEUE_SIZE
+        self.request_timeout = request_timeout or Config.SERVICE_REQUEST_TIMEOUT
+        self.max_body_bytes = Config.SERVICE_MAX_BODY_BYTES
+
+        self.executor = None
+        self.queue = None
+        self.server = None
+        self.dispatchers = []
+        self.connections = set()
+        self.in_flight = {}  # Ключ запроса -> future выполняемого анализа
+        self.worker_pids = []
+        self.started_at = None
+
+        self.counters = {
+            'requests': 0,
+            'analyses': 0,
+            'coalesced': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'failed': 0
+        }
+        self.responses = {}  # Код ответа -> число ответов
+        self.request_latency = LatencyHistogram()
+        self.queue_latency = LatencyHistogram()
+        self.analysis_latency = LatencyHistogram()
+
+    # Запуск и остановка
+
+    def create_executor(self):
+        """
+        Пул процессов анализа. Процессы запускаются не через fork, чтобы они не
+        наследовали слушающий и клиентские сокеты сервиса (пул пересоздается и
+        во время работы): forkserver, а где он недоступен - spawn
+        """
+        method = Config.SERVICE_START_METHOD
+        if method not in multiprocessing.get_all_start_methods():
+            method = 'spawn'
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method),
+                                   initializer=init_worker)
+
+    async def warm_up(self, executor):
+        """
+        Запуск и прогрев всех процессов пула (init_worker) до того, как в него
+        попадут анализы. Возвращает идентификаторы процессов пула
+        """
+        loop = asyncio.get_running_loop()
+        return sorted(set(await asyncio.gather(
+            *(loop.run_in_executor(executor, worker_pid) for _ in range(self.workers))
+        )))
+
+    async def recreate_executor(self, executor, error):
+        """Замена сломанного пула новым, прогретым так же, как при старте сервиса"""
+        print(f"Пул процессов анализа пересоздан: {error}")
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self.create_executor()
+        self.worker_pids = []
+        try:
+            self.worker_pids = await self.warm_up(self.executor)
+        except BrokenProcessPool as e:
+            # Новый пул сломан еще при прогреве - его пересоздаст следующий анализ
+            print(f"Не удалось прогреть пул процессов анализа: {e}")
+
+    async def start(self):
+        self.executor = self.create_executor()
+        # Все процессы пула запускаются и прогреваются до приема запросов
+        self.worker_pids = await self.warm_up(self.executor)
+
+        self.queue = asyncio.Queue(self.queue_size)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started_at = time.monotonic()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.connections):
+                writer.close()
+            await self.server.wait_closed()
+
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.dispatchers = []
+
+        if self.queue is not None:
+            while not self.queue.empty():
+                self.queue.get_nowait()[0].cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Сервис анализа ДШ/МАИ: http://{self.host}:{self.port} "
+              f"(процессов: {len(self.worker_pids)}, очередь: {self.queue_size})")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError, AttributeError):
+                loop.add_signal_handler(sig, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            await self.stop()
+            print("Сервис остановлен")
+
+    # Очередь анализов
+
+    async def dispatch(self):
+        """Обработчик очереди: один анализ за раз в одном процессе пула"""
+        loop = asyncio.get_running_loop()
+        while True:
+            future, problem_key, problem, params, queued_at = await self.queue.get()
+            self.queue_latency.add((time.perf_counter() - queued_at) * 1000)
+            executor = self.executor
+            try:
+                result, elapsed = await loop.run_in_executor(
+                    executor, run_analysis, problem_key, problem, params
+                )
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BrokenProcessPool as e:
+                self.counters['failed'] += 1
+                if not future.done():
+                    future.set_exception(e)
+                # Процесс анализа аварийно завершился - пул пересоздается, если
+                # этого еще не сделал другой обработчик с анализом в том же пуле
+                if self.executor is executor:
+                    await self.recreate_executor(executor, e)
+            except Exception as e:
+                self.counters['failed'] += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.counters['analyses'] += 1
+                self.analysis_latency.add(elapsed)
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.queue.task_done()
+
+    def submit(self, problem_key, problem, params):
+        """
+        Future анализа: уже выполняемый анализ того же запроса или новый
+        анализ в очереди. Возвращает (future, объединен ли запрос с выполняемым)
+        """
+        request_key = self.digest(problem_key.encode(), self.canonical(params))
+        future = self.in_flight.get(request_key)
+        if future is not None:
+            self.counters['coalesced'] += 1
+            return future, True
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((future, problem_key, problem, params, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.counters['rejected'] += 1
+            raise HTTPError(503, "Очередь анализа заполнена, повторите запрос позже", {'Retry-After': '1'})
+
+        self.in_flight[request_key] = future
+        future.add_done_callback(lambda done: self.analysis_done(request_key, done))
+        return future, False
+
+    def analysis_done(self, request_key, future):
+        self.in_flight.pop(request_key, None)
+        if not future.cancelled():
+            future.exception()  # Ошибка уже передана ожидающим запросам
+
+    # Обработчики
+
+    async def handle_analyze(self, query, headers, body):
+        problem, params = self.parse_analysis_request(query, headers, body)
+        problem_key = self.digest(problem if isinstance(problem, bytes) else self.canonical(problem))
+        future, coalesced = self.submit(problem_key, problem, params)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise HTTPError(504, f"Анализ не завершился за {self.request_timeout} с")
+        except (ValueError, TypeError, KeyError) as e:
+            raise HTTPError(400, f"Ошибка в задаче или параметрах анализа: {e}")
+
+        return dict(result, coalesced=coalesced)
+
+    async def handle_health(self, query, headers, body):
+        return {
+            'status': 'ok',
+            'workers': len(self.worker_pids),
+            'queue': self.queue.qsize(),
+            'queue_size': self.queue_size,
+            'in_flight': len(self.in_flight),
+            'uptime': time.monotonic() - self.started_at
+        }
+
+    async def handle_metrics(self, query, headers, body):
+        return {
+            'uptime': time.monotonic() - self.started_at,
+            'workers': len(self.worker_pids),
+            'queue': self.queue.qsize(),
+            'queue_size': self.queue_size,
+            'in_flight': len(self.in_flight),
+            'counters': dict(self.counters),
+            'responses': {str(status): count for status, count in sorted(self.responses.items())},
+            'latency_ms': {
+                'request': self.request_latency.report(),
+                'queue': self.queue_latency.report(),
+                'analysis': self.analysis_latency.report()
+            }
+        }
+
+    def parse_analysis_request(self, query, headers, body):
+        """(задача: словарь или байты XML, параметры анализа) из тела и строки запроса"""
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        stripped = body.lstrip()
+
+        if content_type.endswith('xml') or (not content_type.endswith('json') and stripped.startswith(b'<')):
+            params = {}
+            for name, values in query.items():
+                if name not in self.PARAMS:
+                    raise HTTPError(400, f"Неизвестный параметр '{name}'")
+                try:
+                    params[name] = json.loads(values[-1]) if name in self.JSON_PARAMS else values[-1]
+                except ValueError as e:
+                    raise HTTPError(400, f"Параметр '{name}' должен быть JSON: {e}")
+            return body, self.convert_params(params)
+
+        if content_type.endswith('json') or stripped.startswith(b'{'):
+            try:
+                data = json.loads(body)
+            except (UnicodeDecodeError, ValueError) as e:
+                raise HTTPError(400, f"Неверный JSON: {e}")
+            if not isinstance(data, dict) or 'problem' not in data:
+                raise HTTPError(400, "Ожидается JSON объект с задачей в поле 'problem'")
+
+            unknown = [name for name in data if name != 'problem' and name not in self.PARAMS]
+            if unknown:
+                raise HTTPError(400, f"Неизвестные параметры: {unknown}")
+
+            problem = data['problem']
+            if isinstance(problem, str):
+                problem = problem.encode('utf-8')  # Текст XML
+            elif not isinstance(problem, dict):
+                raise HTTPError(400, "Задача должна быть объектом или текстом XML")
+            return problem, self.convert_params({name: data[name] for name in data if name != 'problem'})
+
+        raise HTTPError(415, "Ожидается задача в формате JSON или XML")
+
+    def convert_params(self, params):
+        converted = {}
+        for name, value in params.items():
+            if value is None:
+                continue
+            convert = self.PARAMS[name]
+            try:
+                converted[name] = convert(value) if convert is not None else value
+            except (TypeError, ValueError):
+                raise HTTPError(400, f"Неверное значение параметра '{name}': {value!r}")
+        return converted
+
+    @staticmethod
+    def canonical(value):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def digest(*parts):
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part)
+        return digest.hexdigest()
+
+    # HTTP
+
+    ROUTES = {
+        '/analyze': {'POST': handle_analyze},
+        '/health': {'GET': handle_health},
+        '/metrics': {'GET': handle_metrics}
+    }
+
+    async def handle_connection(self, reader, writer):
+        """Соединение HTTP/1.1: запросы обрабатываются по очереди до закрытия (keep-alive)"""
+        self.connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break  # Клиент закрыл соединение
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 431, {'error': "Слишком большие заголовки запроса"}, False)
+                    break
+
+                started = time.perf_counter()
+                try:
+                    method, target, version, headers = self.parse_head(head)
+                    body = await self.read_body(reader, writer, headers)
+                except HTTPError as e:
+                    self.record_response(e.status)
+                    await self.respond(writer, e.status, {'error': e.message}, False, e.headers)
+                    break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                path = urlsplit(target).path
+                status, payload, extra_headers = await self.route(method, target, headers, body)
+                self.record_response(status)
+                if path.rstrip('/') == '/analyze':
+                    self.request_latency.add((time.perf_counter() - started) * 1000)
+
+                await self.respond(writer, status, payload, keep_alive, extra_headers)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def route(self, method, target, headers, body):
+        """(код ответа, JSON ответа, дополнительные заголовки)"""
+        self.counters['requests'] += 1
+        url = urlsplit(target)
+        handlers = self.ROUTES.get(url.path.rstrip('/') or '/')
+        try:
+            if handlers is None:
+                raise HTTPError(404, f"Неизвестный адрес '{url.path}'")
+            handler = handlers.get(method)
+            if handler is None:
+                raise HTTPError(405, f"Метод {method} не поддерживается", {'Allow': ', '.join(handlers)})
+            return 200, await handler(self, parse_qs(url.query), headers, body), None
+        except HTTPError as e:
+            return e.status, {'error': e.message}, e.headers
+        except Exception as e:
+            print(f"Ошибка обработки запроса {method} {url.path}: {e}")
+            return 500, {'error': "Внутренняя ошибка сервиса"}, None
+
+    @staticmethod
+    def parse_head(head):
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise HTTPError(400, "Неверная строка запроса")
+        method, target, version = parts
+
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, separator, value = line.partition(':')
+            if not separator:
+                raise HTTPError(400, "Неверный заголовок запроса")
+            headers[name.strip().lower()] = value.strip()
+        return method, target, version, headers
+
+    async def read_body(self, reader, writer, headers):
+        if 'transfer-encoding' in headers:
+            raise HTTPError(501, "Передача тела частями не поддерживается, укажите Content-Length")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Неверный заголовок Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Неверный заголовок Content-Length")
+        if length > self.max_body_bytes:
+            raise HTTPError(413, f"Тело запроса больше {self.max_body_bytes} байт")
+        if not length:
+            return b''
+
+        if headers.get('expect', '').lower() == '100-continue':
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        return await reader.readexactly(length)
+
+    def record_response(self, status):
+        self.responses[status] = self.responses.get(status, 0) + 1
+
+    @staticmethod
+    async def respond(writer, status, payload, keep_alive, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        lines = [
+            f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP сервис анализа ДШ/МАИ')
+    parser.add_argument('--host', default=Config.SERVICE_HOST,
+                        help=f'адрес (по умолчанию {Config.SERVICE_HOST})')
+    parser.add_argument('--port', type=int, default=Config.SERVICE_PORT,
+                        help=f'порт (по умолчанию {Config.SERVICE_PORT}, 0 - любой свободный)')
+    parser.add_argument('--workers', type=int, metavar='N', help='процессов анализа (по умолчанию по числу ядер)')
+    parser.add_argument('--queue-size', dest='queue_size', type=int, metavar='N',
+                        help=f'анализов в очереди (по умолчанию {Config.SERVICE_QUEUE_SIZE})')
+    parser.add_argument('--timeout', type=float, metavar='SEC',
+                        help=f'ожидание результата анализа (по умолчанию {Config.SERVICE_REQUEST_TIMEOUT} с)')
+    args = parser.parse_args(argv)
+
+    for name in ('workers', 'queue_size', 'timeout'):
+        value = getattr(args, name)
+        if value is not None and value <= 0:
+            print(f"Значение --{name.replace('_', '-')} должно быть положительным")
+            return Config.EXIT_USAGE_ERROR
+
+    service = AnalysisService(args.host, args.port, args.workers, args.queue_size, args.timeout)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Не удалось запустить сервис: {e}")
+        return Config.EXIT_ANALYSIS_FAILED
+    return Config.EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+
+import numpy as np
+from config import Config
+from labelled_matrix import LabelledMatrix
+from tracer import tracer
+from utils import Utils
+
+try:
+    import fcntl
+except ImportError:  # Windows: индекс путей пишется атомарно, но без блокировки
+    fcntl = None
+
+
+class StageCache:
+    """
+    Дисковый кэш результатов этапов анализа с адресацией по содержимому.
+
+    Ключ этапа загрузки - хэш содержимого XML файла; ключ каждого следующего
+    этапа - хэш ключа предыдущего этапа и параметров, от которых он зависит:
+        parsed        - матрицы критериев, альтернативы, группы
+        probabilities - базовые вероятности (метод расчета и веса критериев)
+        combined      - комбинированные массы, история конфликтов и граница погрешности
+                        (ядро комбинирования и бюджет фокальных элементов)
+    Поэтому повторный запуск начинается с первого этапа, входные данные которого
+    изменились. Результаты хранятся в двоичном формате .npz (без pickle) в
+    подкаталоге по ключу файла: cache_dir/<ключ файла>/<этап>[_<ключ>].npz.
+
+    Размер кэша ограничен: при превышении удаляются давно не использованные
+    записи (LRU по времени изменения, которое обновляется при каждом чтении).
+    Размер отслеживается по записям этого процесса и пересчитывается обходом
+    каталога только после превышения предела; очистка освобождает место с
+    запасом (до доли CACHE_EVICTION_TARGET предела). Если содержимое файла по
+    известному пути изменилось, все записи старой версии удаляются сразу.
+    Поврежденная запись (например, после аварийного завершения на другом
+    носителе) удаляется и считается промахом.
+
+    Кэш может использоваться несколькими процессами одновременно (пакетный
+    режим): записи заменяются атомарно, исчезновение записей и каталогов,
+    удаленных другим процессом, не является ошибкой, а индекс путей
+    изменяется под файловой блокировкой.
+    """
+
+    FORMAT_VERSION = 2
+    INDEX_FILE = 'paths.json'
+    LOCK_FILE = 'paths.lock'
+
+    def __init__(self, cache_dir, max_size_mb=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = int((max_size_mb or Config.DEFAULT_CACHE_SIZE_MB) * 1024 * 1024)
+        self.size_bytes = None  # Оценка размера кэша (None - пересчитать обходом каталога)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # Ключи
+
+    def file_key(self, file_path, content_hash=None):
+        """
+        Ключ содержимого файла. content_hash - уже вычисленный Utils.file_hash
+        файла (иначе файл читается здесь). Если файл по этому пути раньше имел
+        другое содержимое, записи старой версии удаляются
+        """
+        if content_hash is None:
+            content_hash = Utils.file_hash(file_path)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"ds_ahp_cache_v{self.FORMAT_VERSION}".encode())
+        digest.update(content_hash.encode())
+        key = digest.hexdigest()
+
+        path = os.path.abspath(file_path)
+        with self._index_lock():
+            index = self._read_index()
+            previous = index.get(path)
+            if previous != key:
+                if previous is not None and previous not in [k for p, k in index.items() if p != path]:
+                    self.invalidate(previous)
+                index[path] = key
+                self._write_index(index)
+
+        return key
+
+    @staticmethod
+    def derive_key(parent_key, **params):
+        """Ключ этапа: хэш ключа предыдущего этапа и параметров этого этапа"""
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=float)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(parent_key.encode())
+        digest.update(payload.encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def weights_param(weights):
+        """Веса критериев в точном и независимом от порядка виде"""
+        return sorted((criterion, float(weight).hex()) for criterion, weight in weights.items())
+
+    # Этапы
+
+    def load_parsed(self, file_key):
+        """Матрицы критериев и данные о группах или None"""
+        arrays = self._load(file_key, 'parsed')
+        if arrays is None:
+            return None
+
+        criteria = arrays['criteria'].tolist()
+        criteria_data = {
+            criterion: LabelledMatrix(arrays[f'values_{i}'], arrays[f'rows_{i}'].tolist(),
+                                      arrays[f'cols_{i}'].tolist())
+            for i, criterion in enumerate(criteria)
+        }
+        return {
+            'criteria_data': criteria_data,
+            'alternatives': set(arrays['alternatives'].tolist()),
+            'all_groups': set(arrays['all_groups'].tolist()),
+            'criteria_count': int(arrays['criteria_count'])
+        }
+
+    def store_parsed(self, file_key, criteria_data, alternatives, all_groups, criteria_count):
+        arrays = {
+            'criteria': self._strings(criteria_data.keys()),
+            'alternatives': self._strings(sorted(alternatives)),
+            'all_groups': self._strings(sorted(all_groups)),
+            'criteria_count': np.array(criteria_count, dtype=np.int64)
+        }
+        for i, matrix in enumerate(criteria_data.values()):
+            arrays[f'values_{i}'] = matrix.values
+            arrays[f'rows_{i}'] = self._strings(matrix.row_labels)
+            arrays[f'cols_{i}'] = self._strings(matrix.col_labels)
+        self._store(file_key, 'parsed', arrays)
+
+    def load_probabilities(self, file_key, key):
+        """(базовые вероятности, веса групп до нормирования) или None"""
+        arrays = self._load(file_key, 'probabilities', key)
+        if arrays is None:
+            return None
+
+        basic_probabilities = {}
+        raw_weights = {}
+        for i, criterion in enumerate(arrays['criteria'].tolist()):
+            groups = arrays[f'groups_{i}'].tolist()
+            basic_probabilities[criterion] = dict(zip(groups, arrays[f'probs_{i}'].tolist()))
+            raw_weights[criterion] = dict(zip(groups, arrays[f'raw_{i}'].tolist()))
+        return basic_probabilities, raw_weights
+
+    def store_probabilities(self, file_key, key, basic_probabilities, raw_weights):
+        arrays = {'criteria': self._strings(basic_probabilities.keys())}
+        for i, (criterion, probs) in enumerate(basic_probabilities.items()):
+            arrays[f'groups_{i}'] = self._strings(probs.keys())
+            arrays[f'probs_{i}'] = np.array(list(probs.values()), dtype=np.float64)
+            arrays[f'raw_{i}'] = np.array([raw_weights[criterion][group] for group in probs], dtype=np.float64)
+        self._store(file_key, 'probabilities', arrays, key)
+
+    def load_combined(self, file_key, key):
+        """
+        (комбинированные массы {группа: масса}, история конфликтов,
+        граница погрешности Bel/Pl) или None
+        """
+        arrays = self._load(file_key, 'combined', key)
+        if arrays is None:
+            return None
+        combined = dict(zip(arrays['groups'].tolist(), arrays['masses'].tolist()))
+        return combined, arrays['conflicts'].tolist(), float(arrays['error_bound'])
+
+    def store_combined(self, file_key, key, combined_beliefs, conflict_history, error_bound=0.0):
+        arrays = {
+            'groups': self._strings(combined_beliefs.keys()),
+            'masses': np.array(list(combined_beliefs.values()), dtype=np.float64),
+            'conflicts': np.array(conflict_history, dtype=np.float64),
+            'error_bound': np.array(error_bound, dtype=np.float64)
+        }
+        self._store(file_key, 'combined', arrays, key)
+
+    # Хранение
+
+    def _entry_path(self, file_key, stage, key=None):
+        name = stage if key is None else f"{stage}_{key}"
+        return os.path.join(self.cache_dir, file_key, f"{name}.npz")
+
+    def _load(self, file_key, stage, key=None):
+        path = self._entry_path(file_key, stage, key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)  # Отметка использования для LRU
+        except FileNotFoundError:
+            # Нет записи или запись удалена другим процессом
+            self.misses += 1
+            tracer.step("Кэш: этап '{}' не найден", stage)
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile, EOFError) as e:
+            # Запись повреждена: удаляется, чтобы следующий запуск записал ее заново
+            self.misses += 1
+            print(f"Запись кэша '{path}' повреждена и удалена: {e}")
+            self._remove_entry(path)
+            return None
+
+        self.hits += 1
+        tracer.summary("Кэш: этап '{}' загружен из {}", stage, path)
+        return arrays
+
+    def _store(self, file_key, stage, arrays, key=None):
+        """Атомарная запись: временный файл в том же каталоге и os.replace"""
+        path = self._entry_path(file_key, stage, key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, **arrays)
+                size = os.path.getsize(temp_path)
+                os.replace(temp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            print(f"Не удалось сохранить этап '{stage}' в кэш: {e}")
+            return
+
+        if self.size_bytes is not None:
+            self.size_bytes += size
+        self.evict()
+
+    def _strings(self, values):
+        return np.array([str(value) for value in values], dtype=str)
+
+    def size(self):
+        """Суммарный размер записей кэша, байт"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        """Записи кэша: (путь, размер, время последнего использования)"""
+        entries = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith('.npz'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        """
+        Удаление давно не использованных записей, если размер кэша превышает
+        предел. Каталог обходится только при первом вызове и после превышения
+        предела оценкой размера
+        """
+        if self.size_bytes is not None and self.size_bytes <= self.max_bytes:
+            return
+
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * Config.CACHE_EVICTION_TARGET
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if total <= target:
+                    break
+                if self._remove_entry(path):
+                    total -= size
+        self.size_bytes = total
+
+    def _remove_entry(self, path):
+        """Удаление записи и ее каталога, если он опустел; False - запись уже удалена"""
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+
+        # Каталог может быть удален или заполнен другим процессом
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+        return True
+
+    def invalidate(self, file_key):
+        """Удаление всех записей версии файла"""
+        directory = os.path.join(self.cache_dir, file_key)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+        self.size_bytes = None
+
+    def clear(self):
+        """Полная очистка кэша"""
+        for name in os.listdir(self.cache_dir):
+            if os.path.isdir(os.path.join(self.cache_dir, name)):
+                self.invalidate(name)
+
+    @contextmanager
+    def _index_lock(self):
+        """Монопольная блокировка индекса путей на время чтения, изменения и записи"""
+        if fcntl is None:
+            yield
+            return
+        try:
+            lock_file = open(os.path.join(self.cache_dir, self.LOCK_FILE), 'a')
+        except OSError:
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self):
+        """Соответствие путей файлов и ключей их последнего содержимого"""
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(index, f, ensure_ascii=False)
+                os.replace(temp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            print(f"Не удалось обновить индекс кэша: {e}")
@@ -0,0 +1,100 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from analysis_api import AnalysisResult, analyze
+from config import Config
+from ds_ahp_analyzer import DSAHPAnalyzer
+from problem_generator import ProblemGenerator
+from service import WARMUP_PROBLEM
+
+
+def test_silent_analysis_does_not_print_weight_normalization(capsys):
+    # Веса с суммой 2 нормализуются без сообщения в стандартный вывод
+    result = analyze(WARMUP_PROBLEM, {'Критерий 1': 1.0, 'Критерий 2': 1.0})
+
+    assert capsys.readouterr().out == ''
+    assert result.as_dict() == analyze(WARMUP_PROBLEM, {'Критерий 1': 0.5, 'Критерий 2': 0.5}).as_dict()
+
+
+def test_summary_analysis_reports_weight_normalization(capsys):
+    analyze(WARMUP_PROBLEM, {'Критерий 1': 1.0, 'Критерий 2': 1.0}, verbosity='summary')
+
+    assert "не равна 1. Нормализую" in capsys.readouterr().out
+
+
+# (альтернатив, критериев, seed) сгенерированных задач
+GENERATED_PROBLEMS = [(5, 3, 1), (8, 4, 3), (12, 5, 2)]
+
+
+def analyzer_results(file_path, weights, pessimism, tmp_path, max_focal_elements=None):
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    analyzer.set_pessimism_coefficient(pessimism)
+    analyzer.dempster_combiner.set_focal_budget(max_focal_elements)
+    assert analyzer.run_headless(file_path, weights) is not None
+    return analyzer.get_results()
+
+
+@pytest.mark.parametrize('max_focal_elements', [None, 4])
+@pytest.mark.parametrize('pessimism', [0.0, 0.3, 0.5, 1.0])
+@pytest.mark.parametrize('problem', GENERATED_PROBLEMS)
+def test_analyze_matches_analyzer(problem, pessimism, max_focal_elements, tmp_path):
+    generator = ProblemGenerator(*problem[:2], seed=problem[2])
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    weights = generator.criteria_weights()
+
+    result = analyze(file_path, weights, pessimism=pessimism, max_focal_elements=max_focal_elements).as_dict()
+    expected = analyzer_results(file_path, weights, pessimism, tmp_path, max_focal_elements)
+
+    assert result['optimal_alternative'] == expected['optimal_alternative']
+    assert [alt for alt, _ in result['ranking']] == [alt for alt, _ in expected['ranking']]
+    assert [score for _, score in result['ranking']] == pytest.approx([score for _, score in expected['ranking']])
+    assert result['scores'] == pytest.approx(expected['scores'])
+    assert set(result['intervals']) == set(expected['intervals'])
+    for alt, interval in expected['intervals'].items():
+        assert result['intervals'][alt] == pytest.approx(interval)
+    assert result['conflict_history'] == pytest.approx(expected['conflict_history'])
+    assert result['error_bound'] == pytest.approx(expected['error_bound'])
+
+
+@pytest.fixture
+def result():
+    return analyze(WARMUP_PROBLEM, {'Критерий 1': 0.6, 'Критерий 2': 0.4})
+
+
+def test_result_is_immutable(result):
+    for name in ('belief', 'plausibility', 'scores', 'ranking_index', 'conflict_history'):
+        array = getattr(result, name)
+        assert not array.flags.writeable
+        with pytest.raises(ValueError):
+            array[0] = 0
+        with pytest.raises(ValueError):
+            array.setflags(write=True)
+
+    with pytest.raises(AttributeError):
+        result.optimal_alternative = 'B'
+    with pytest.raises(AttributeError):
+        result.extra = 1
+    with pytest.raises(AttributeError):
+        del result.pessimism
+
+    # Словари-представления - копии, изменение их не затрагивает результат
+    ranking = result.get_ranking()
+    ranking.clear()
+    result.get_intervals().clear()
+    assert result.get_ranking() and result.get_intervals()
+
+
+def test_result_survives_pickling(result):
+    restored = pickle.loads(pickle.dumps(result))
+
+    assert type(restored) is AnalysisResult
+    assert restored.as_dict() == result.as_dict()
+    assert restored.alternatives == result.alternatives
+    np.testing.assert_array_equal(restored.ranking_index, result.ranking_index)
+    assert not restored.belief.flags.writeable
+    with pytest.raises(AttributeError):
+        restored.pessimism = 0.0
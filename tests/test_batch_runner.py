@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+
+import pytest
+
+import batch_runner
+from batch_runner import BatchRunner
+
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                                reason="подмена analyze_file наследуется только при fork")
+
+
+def fake_analyze_file(crashing):
+    """analyze_file, аварийно завершающий процесс на файлах из crashing"""
+    def analyze_file(file_path, base_name, settings, pending=None):
+        if os.path.basename(file_path) in crashing:
+            os._exit(1)
+        return {'file': file_path, 'status': 'ok', 'optimal_alternative': 'A', 'error': None}
+    return analyze_file
+
+
+def make_files(tmp_path, count):
+    files = []
+    for i in range(count):
+        path = tmp_path / f"f{i}.xml"
+        path.write_text("<ds_ahp_analysis/>")
+        files.append(str(path))
+    return files
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3])
+def test_crashing_worker_fails_only_its_file(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(batch_runner, 'analyze_file', fake_analyze_file({'f1.xml'}))
+    files = make_files(tmp_path, 8)
+
+    runner = BatchRunner({'output_dir': str(tmp_path)}, max_workers=2, chunk_size=chunk_size)
+    results = runner.run(files)
+
+    assert [result['file'] for result in results] == files
+    assert runner.get_failed() == [files[1]]
+    assert "аварийно" in results[1]['error']
+    assert all(result['status'] == 'ok' for i, result in enumerate(results) if i != 1)
+
+
+def test_several_crashing_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_runner, 'analyze_file', fake_analyze_file({'f0.xml', 'f4.xml', 'f5.xml'}))
+    files = make_files(tmp_path, 10)
+
+    runner = BatchRunner({'output_dir': str(tmp_path)}, max_workers=3, chunk_size=2)
+    runner.run(files)
+
+    assert runner.get_failed() == [files[0], files[4], files[5]]
+
+
+def test_base_names_do_not_collide_with_other_stems():
+    files = [os.path.join('a', 'x.xml'), os.path.join('b', 'x.xml'), os.path.join('c', 'x_2.xml'),
+             os.path.join('d', 'X.xml')]
+
+    assert BatchRunner.unique_base_names(files) == ['x_ranking', 'x_2_ranking', 'x_2_2_ranking', 'X_3_ranking']
+
+
+def test_batches_in_one_directory_do_not_overwrite_each_other(tmp_path, monkeypatch):
+    # Имя файлов результатов возвращается в результате файла
+    monkeypatch.setattr(batch_runner, 'analyze_file', lambda file_path, base_name, settings, pending=None:
+                        {'file': file_path, 'status': 'ok', 'base_name': base_name})
+    files = make_files(tmp_path, 2)
+
+    runs = {}
+    for _ in range(2):
+        runner = BatchRunner({'output_dir': str(tmp_path)}, max_workers=1)
+        results = runner.run(files)
+        runs[runner.run_id] = [result['base_name'] for result in results]
+
+    assert len(runs) == 2
+    for run_id, names in runs.items():
+        assert names == [f"f0_ranking_{run_id}", f"f1_ranking_{run_id}"]
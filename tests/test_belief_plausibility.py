@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from belief_plausibility import BeliefPlausibilityCalculator
+from frame_of_discernment import FrameOfDiscernment
+from tracer import tracer
+
+
+def random_masses(rng, frame, focal_elements):
+    masks = rng.choice(np.arange(1, 1 << frame.size()), size=focal_elements, replace=False)
+    values = rng.random(focal_elements)
+    values /= values.sum()
+    return {int(mask): float(value) for mask, value in zip(masks, values)}
+
+
+@pytest.fixture
+def trace_level():
+    previous_level, previous_file = tracer.level, tracer.trace_file
+    yield
+    tracer.configure(previous_level, previous_file)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_single_pass_matches_traced_per_group_sums(seed, tmp_path, trace_level, monkeypatch):
+    rng = np.random.default_rng(seed)
+    alternatives = [f"A{i}" for i in range(10)]
+    frame = FrameOfDiscernment(alternatives)
+    masses = random_masses(rng, frame, 200)
+
+    tracer.configure('steps', str(tmp_path / 'trace.txt'))
+    traced = BeliefPlausibilityCalculator()
+    traced.calculate_belief_plausibility(masses, alternatives, frame)
+
+    tracer.configure('silent')
+    calculator = BeliefPlausibilityCalculator()
+
+    def fail(*args):
+        raise AssertionError("Поэлементный проход по фокальным элементам")
+
+    monkeypatch.setattr(calculator, 'calculate_plausibility', fail)
+    calculator.calculate_belief_plausibility(masses, alternatives, frame)
+
+    assert calculator.get_belief_functions() == traced.get_belief_functions()
+    assert calculator.get_plausibility_functions() == traced.get_plausibility_functions()
+    assert calculator.get_intervals() == traced.get_intervals()
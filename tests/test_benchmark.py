@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+import benchmark
+from benchmark import Benchmark
+from config import Config
+
+ARGS = ['--grid', '4x2x2', '--repeats', '1', '--kernel', Config.COMBINATION_KERNEL_PYTHON]
+
+
+@pytest.fixture
+def baseline_path(tmp_path):
+    """Эталон, полученный с настройками ARGS"""
+    path = str(tmp_path / 'baseline.json')
+    assert benchmark.main(ARGS + ['--output', path]) == Config.EXIT_OK
+    return path
+
+
+def test_matching_baseline_is_compared(baseline_path, capsys):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    assert baseline['metadata']['kernel'] == Config.COMBINATION_KERNEL_PYTHON
+
+    # Допуск велик: сравнение не зависит от шума замеров
+    assert benchmark.main(ARGS + ['--baseline', baseline_path, '--tolerance', '1000']) == Config.EXIT_OK
+    assert "Замедлений относительно эталона нет" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('extra_args, key', [
+    (['--kernel', Config.COMBINATION_KERNEL_NUMPY], 'kernel'),
+    (['--truncation', '0.5'], 'generator_options'),
+    (['--seed', '1'], 'seed'),
+])
+def test_baseline_with_other_settings_is_refused_before_measuring(baseline_path, monkeypatch, capsys,
+                                                                  extra_args, key):
+    monkeypatch.setattr(Benchmark, 'run', lambda self: pytest.fail("Замеры выполнены до проверки эталона"))
+
+    assert benchmark.main(ARGS + extra_args + ['--baseline', baseline_path]) == Config.EXIT_USAGE_ERROR
+    assert f"  {key}: эталон" in capsys.readouterr().out
+
+
+def test_unreadable_baseline_is_refused_before_measuring(tmp_path, monkeypatch):
+    monkeypatch.setattr(Benchmark, 'run', lambda self: pytest.fail("Замеры выполнены до чтения эталона"))
+    assert benchmark.main(ARGS + ['--baseline', str(tmp_path / 'missing.json')]) == Config.EXIT_USAGE_ERROR
@@ -0,0 +1,259 @@
+import concurrent.futures
+import json
+import math
+
+import pytest
+
+from analysis_api import analyze
+from cli import CommandLine
+from config import Config
+from dempster_combiner import DempsterCombiner
+from ds_ahp_analyzer import DSAHPAnalyzer
+from frame_of_discernment import FrameOfDiscernment
+from problem_generator import ProblemGenerator
+from tracer import tracer
+
+
+@pytest.fixture
+def generator():
+    return ProblemGenerator(8, 4, seed=3)
+
+
+# (альтернатив, критериев, seed): 7 критериев дополняются в дереве до 8
+GENERATED_PROBLEMS = [(8, 4, 3), (6, 7, 11), (12, 5, 2)]
+
+
+def generated_probabilities(generator, tmp_path):
+    """Базовые вероятности и фрейм сгенерированной задачи (шаги 1-4 анализатора)"""
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    assert analyzer.run_headless(file_path, generator.criteria_weights()) is not None
+    return analyzer.matrix_processor.basic_probabilities, analyzer.xml_parser.get_frame()
+
+
+def combine(basic_probabilities, frame, kernel, max_workers=1):
+    combiner = DempsterCombiner(frame, kernel=kernel, max_workers=max_workers)
+    combiner.combine_evidence(basic_probabilities)
+    return combiner
+
+
+def assert_same_combination(combiner, expected):
+    """Массы и история конфликтов совпадают с ядром expected в пределах погрешности округления"""
+    masses, expected_masses = combiner.get_combined_masses(), expected.get_combined_masses()
+    for mask in set(masses) | set(expected_masses):
+        assert masses.get(mask, 0.0) == pytest.approx(expected_masses.get(mask, 0.0), abs=1e-12)
+    assert combiner.get_conflict_history() == pytest.approx(expected.get_conflict_history(), abs=1e-12)
+
+
+@pytest.mark.parametrize('problem', GENERATED_PROBLEMS)
+def test_parallel_tree_matches_sequential(problem, tmp_path, monkeypatch):
+    alternatives, criteria, seed = problem
+    probabilities, frame = generated_probabilities(ProblemGenerator(alternatives, criteria, seed=seed), tmp_path)
+    expected = combine(probabilities, frame, Config.COMBINATION_KERNEL_PYTHON)
+
+    # Каждый раунд из нескольких пар - в пуле процессов
+    pools = []
+
+    class CountingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(Config, 'TREE_PARALLEL_MIN_PRODUCTS', 1)
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', CountingPool)
+    tree = combine(probabilities, frame, Config.COMBINATION_KERNEL_TREE, max_workers=3)
+
+    # Один пул на все раунды, полного размера и без fork
+    assert len(pools) == 1
+    assert pools[0]['max_workers'] == 3
+    assert pools[0]['mp_context'].get_start_method() != 'fork'
+    assert_same_combination(tree, expected)
+
+    # Согласие корня - произведение (1 - K) узлов дерева и шагов последовательного ядра
+    node_agreement = math.prod(1.0 - node['conflict'] for node in tree.get_node_conflicts())
+    sequential_agreement = math.prod(1.0 - conflict for conflict in expected.get_conflict_history())
+    assert len(tree.get_node_conflicts()) == criteria - 1
+    assert 1.0 - node_agreement == pytest.approx(1.0 - sequential_agreement, abs=1e-12)
+
+
+@pytest.mark.parametrize('kernel', Config.COMBINATION_KERNELS)
+def test_reused_analyzer_does_not_accumulate_conflicts(generator, tmp_path, kernel):
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    analyzer.dempster_combiner.set_kernel(kernel)
+    analyzer.dempster_combiner.set_max_workers(1)
+
+    histories = []
+    for _ in range(2):
+        assert analyzer.run_headless(file_path, generator.criteria_weights()) is not None
+        histories.append((analyzer.get_results()['conflict_history'],
+                          analyzer.dempster_combiner.get_node_conflicts()))
+
+    assert len(histories[0][0]) == len(generator.criteria) - 1
+    assert histories[1] == histories[0]
+
+
+# Фрейм шире 63 альтернатив: маски - объекты Python int
+@pytest.mark.parametrize('problem', GENERATED_PROBLEMS + [(70, 4, 7)])
+def test_numpy_matches_python(problem, tmp_path):
+    alternatives, criteria, seed = problem
+    probabilities, frame = generated_probabilities(ProblemGenerator(alternatives, criteria, seed=seed), tmp_path)
+    assert_same_combination(combine(probabilities, frame, Config.COMBINATION_KERNEL_NUMPY),
+                            combine(probabilities, frame, Config.COMBINATION_KERNEL_PYTHON))
+
+    # Отдельный шаг: векторный против поэлементного
+    combiner = DempsterCombiner(frame)
+    first, second = list(combiner.to_masses(probabilities).values())[:2]
+    expected, expected_conflict = combiner.dempster_combination_step(first, second)
+    masks, values, conflict = combiner.dempster_combination_vectors(*combiner.to_vectors(first),
+                                                                    *combiner.to_vectors(second))
+    assert conflict == pytest.approx(expected_conflict, abs=1e-12)
+    assert combiner.from_vectors(masks, values) == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize('problem', GENERATED_PROBLEMS + [(24, 5, 2)])
+def test_commonality_matches_sequential(problem, tmp_path):
+    alternatives, criteria, seed = problem
+    probabilities, frame = generated_probabilities(ProblemGenerator(alternatives, criteria, seed=seed), tmp_path)
+
+    # Фрейм шире ZETA_MAX_FRAME_SIZE комбинируется ядром numpy
+    assert (frame.size() > Config.ZETA_MAX_FRAME_SIZE) == (alternatives == 24)
+    assert_same_combination(combine(probabilities, frame, Config.COMBINATION_KERNEL_COMMONALITY),
+                            combine(probabilities, frame, Config.COMBINATION_KERNEL_PYTHON))
+
+
+@pytest.mark.parametrize('alternatives', [['A', 'B', 'C'], [f'A{i}' for i in range(1, 25)]])
+@pytest.mark.parametrize('kernel', Config.COMBINATION_KERNELS)
+def test_total_conflict_is_kept_for_later_steps(alternatives, kernel):
+    frame = FrameOfDiscernment(alternatives)
+    first, second = alternatives[:2]
+    # c2 и c3 полностью противоречат друг другу, c4 комбинируется уже с пустым результатом
+    probabilities = {
+        'c1': {first: 0.5, 'ALL': 0.5},
+        'c2': {first: 1.0},
+        'c3': {second: 1.0},
+        'c4': {f'{first}&{second}': 0.3, 'ALL': 0.7},
+    }
+
+    combiner = combine(probabilities, frame, kernel)
+    assert combiner.get_conflict_history() == [0.0, 1.0, 1.0]
+    assert combiner.get_combined_masses() == {}
+
+
+@pytest.mark.parametrize('kernel', Config.COMBINATION_KERNELS)
+def test_total_conflict_is_reported_once_through_tracer(kernel, capsys):
+    frame = FrameOfDiscernment(['A', 'B', 'C'])
+    probabilities = {'c1': {'A': 0.5, 'ALL': 0.5}, 'c2': {'A': 1.0}, 'c3': {'B': 1.0}, 'c4': {'ALL': 1.0}}
+
+    previous_level = tracer.level
+    try:
+        tracer.configure('silent')
+        combine(probabilities, frame, kernel)
+        assert "ВЫСОКИЙ КОНФЛИКТ" not in capsys.readouterr().out
+
+        tracer.configure('summary')
+        combine(probabilities, frame, kernel)
+        lines = [line for line in capsys.readouterr().out.splitlines() if "ВЫСОКИЙ КОНФЛИКТ" in line]
+    finally:
+        tracer.configure(previous_level)
+    assert lines == ["ВЫСОКИЙ КОНФЛИКТ! K >= 1 на шаге 2: результат комбинирования пуст"]
+
+
+def test_tree_combines_each_prefix_once(tmp_path, monkeypatch):
+    generator = ProblemGenerator(8, 16, seed=16)
+    probabilities, frame = generated_probabilities(generator, tmp_path)
+    expected = combine(probabilities, frame, Config.COMBINATION_KERNEL_PYTHON)
+
+    combinations = []
+    combine_vectors = DempsterCombiner.dempster_combination_vectors
+    monkeypatch.setattr(DempsterCombiner, 'dempster_combination_vectors',
+                        lambda self, *vectors: combinations.append(1) or combine_vectors(self, *vectors))
+    tree = combine(probabilities, frame, Config.COMBINATION_KERNEL_TREE)
+
+    # Прямой проход - k - 1 комбинирований, обратный - меньше k - 1;
+    # включающие префиксы и корень повторно не комбинируются
+    assert len(combinations) < 2 * (len(generator.criteria) - 1)
+    assert_same_combination(tree, expected)
+
+
+def test_reused_analyzer_analyses_different_files_independently(tmp_path):
+    # Разные фреймы: A1..A8 и A01..A12, разное число критериев
+    generators = [ProblemGenerator(8, 4, seed=3), ProblemGenerator(12, 3, seed=5)]
+    files = [generator.write(str(tmp_path / f'problem_{number}.xml'))
+             for number, generator in enumerate(generators)]
+
+    def new_analyzer():
+        analyzer = DSAHPAnalyzer()
+        analyzer.set_verbosity(Config.TRACE_SILENT)
+        analyzer.set_export_dir(str(tmp_path))
+        return analyzer
+
+    reused = new_analyzer()
+    for generator, file_path in zip(generators, files):
+        optimal = reused.run_headless(file_path, generator.criteria_weights())
+        assert reused.last_error is None
+
+        fresh = new_analyzer()
+        assert optimal == fresh.run_headless(file_path, generator.criteria_weights())
+        assert list(reused.criteria_matrices) == generator.criteria
+        assert list(reused.matrix_processor.basic_probabilities) == generator.criteria
+        assert reused.get_results()['ranking'] == fresh.get_results()['ranking']
+        assert reused.get_results()['conflict_history'] == fresh.get_results()['conflict_history']
+
+
+def test_streaming_run_drops_state_of_previous_runs(generator, tmp_path):
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+
+    # Обычный анализ другого файла, затем два потоковых анализа подряд
+    other = ProblemGenerator(12, 3, seed=5)
+    other_path = other.write(str(tmp_path / 'other.xml'))
+    assert analyzer.run_headless(other_path, other.criteria_weights()) is not None
+
+    expected = analyzer.run_headless(file_path, generator.criteria_weights())
+    expected_history = analyzer.get_results()['conflict_history']
+
+    analyzer.set_streaming(True)
+    for _ in range(2):
+        assert analyzer.run_headless(file_path, generator.criteria_weights()) == expected
+        assert analyzer.last_error is None
+        assert analyzer.get_results()['conflict_history'] == expected_history
+
+    # Матрицы в потоковом режиме не сохраняются - анализ по матрицам прошлого файла невозможен
+    assert analyzer.criteria_matrices == {}
+    assert analyzer.run_robustness_analysis(samples=10) is None
+    with pytest.raises(ValueError):
+        analyzer.update_criterion(other.criteria[0], weight=0.5)
+
+
+@pytest.mark.parametrize('kernel', [Config.COMBINATION_KERNEL_COMMONALITY, Config.COMBINATION_KERNEL_TREE])
+def test_focal_budget_is_rejected_by_kernels_without_it(generator, tmp_path, kernel):
+    combiner = DempsterCombiner(kernel=kernel)
+    with pytest.raises(ValueError):
+        combiner.set_focal_budget(3)
+    with pytest.raises(ValueError):
+        combiner.set_focal_budget(min_mass=0.01)
+
+    combiner = DempsterCombiner()
+    combiner.set_focal_budget(3)
+    with pytest.raises(ValueError):
+        combiner.set_kernel(kernel)
+
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    with pytest.raises(ValueError):
+        analyze(file_path, generator.criteria_weights(), kernel=kernel, max_focal_elements=3)
+
+    weights_path = tmp_path / 'weights.json'
+    weights_path.write_text(json.dumps(generator.criteria_weights()), encoding='utf-8')
+    command_line = CommandLine()
+    args = command_line.build_parser().parse_args(
+        [file_path, '--weights', str(weights_path), '--kernel', kernel, '--max-focal', '3']
+    )
+    with pytest.raises(ValueError):
+        command_line.resolve_settings(args)
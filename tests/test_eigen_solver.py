@@ -0,0 +1,108 @@
+import json
+
+import numpy as np
+import pytest
+
+from cli import CommandLine
+from config import Config
+from eigen_solver import EigenvectorSolver
+from problem_generator import ProblemGenerator
+from weight_calculator import WeightCalculator
+
+
+def consistent_matrix(weights):
+    """Согласованная матрица a_ij = w_i / w_j"""
+    weights = np.asarray(weights, dtype=float)
+    return weights[:, np.newaxis] / weights[np.newaxis, :]
+
+
+def random_reciprocal(rng, n):
+    """Положительная обратно-симметричная матрица со значениями по шкале Саати"""
+    scale = np.concatenate([np.arange(1, 10), 1.0 / np.arange(2, 10)])
+    matrix = np.ones((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            matrix[i, j] = rng.choice(scale)
+            matrix[j, i] = 1.0 / matrix[i, j]
+    return matrix
+
+
+# Циклически несогласованные суждения: 1 > 2 > 3 > 1
+INCONSISTENT_MATRIX = [[1.0, 9.0, 1 / 9], [1 / 9, 1.0, 9.0], [9.0, 1 / 9, 1.0]]
+
+
+def test_consistent_matrix_has_zero_consistency_ratio():
+    weights = [0.5, 0.25, 0.15, 0.1]
+    solution = EigenvectorSolver().solve(consistent_matrix(weights))
+
+    assert solution['converged']
+    assert solution['weights'] == pytest.approx(weights, abs=1e-12)
+    assert solution['lambda_max'] == pytest.approx(len(weights), abs=1e-12)
+    assert solution['consistency_index'] == pytest.approx(0.0, abs=1e-12)
+    assert solution['consistency_ratio'] == pytest.approx(0.0, abs=1e-12)
+
+
+@pytest.mark.parametrize('n', [3, 5, 9])
+def test_stack_matches_eig_per_matrix(n):
+    rng = np.random.default_rng(n)
+    stack = np.array([random_reciprocal(rng, n) for _ in range(6)])
+    solution = EigenvectorSolver(tolerance=1e-13, max_iterations=1000).solve(stack)
+
+    assert solution['weights'].shape == (6, n)
+    for index, matrix in enumerate(stack):
+        eigenvalues, eigenvectors = np.linalg.eig(matrix)
+        principal = np.argmax(eigenvalues.real)
+        expected = np.abs(eigenvectors[:, principal].real)
+        assert solution['weights'][index] == pytest.approx(expected / expected.sum(), abs=1e-9)
+        assert solution['lambda_max'][index] == pytest.approx(eigenvalues[principal].real, abs=1e-9)
+
+    expected_ci, expected_cr = EigenvectorSolver.consistency(solution['lambda_max'], n)
+    assert solution['consistency_index'] == pytest.approx(expected_ci)
+    assert solution['consistency_ratio'] == pytest.approx(expected_cr)
+
+
+def test_not_converged_matrix_falls_back_to_eig(monkeypatch):
+    calls = []
+    solve_with_eig = EigenvectorSolver.solve_with_eig
+    monkeypatch.setattr(EigenvectorSolver, 'solve_with_eig',
+                        staticmethod(lambda matrix: calls.append(matrix) or solve_with_eig(matrix)))
+
+    # Одна итерация из равномерного приближения не достигает точности
+    matrix = random_reciprocal(np.random.default_rng(4), 5)
+    solution = EigenvectorSolver(tolerance=1e-15, max_iterations=1).solve(matrix, initial=np.ones(5))
+
+    assert not solution['converged']
+    assert solution['iterations'] == 1
+    assert len(calls) == 1
+    expected_weights, expected_lambda = solve_with_eig(matrix)
+    assert solution['weights'] == pytest.approx(expected_weights, abs=1e-12)
+    assert solution['lambda_max'] == pytest.approx(expected_lambda, abs=1e-12)
+
+
+def test_consistency_ratio_above_limit_is_rejected():
+    solution = EigenvectorSolver().solve(INCONSISTENT_MATRIX)
+    assert solution['consistency_ratio'] > Config.ACCEPTABLE_CONSISTENCY_RATIO
+
+    calculator = WeightCalculator()
+    calculator.set_max_consistency_ratio(solution['consistency_ratio'] + 0.01)
+    assert calculator.calculate_weights_from_matrix(['c1', 'c2', 'c3'], INCONSISTENT_MATRIX)
+
+    calculator.set_max_consistency_ratio(0.1)
+    with pytest.raises(ValueError):
+        calculator.calculate_weights_from_matrix(['c1', 'c2', 'c3'], INCONSISTENT_MATRIX)
+
+
+def test_max_cr_option_rejects_inconsistent_criteria_matrix(tmp_path):
+    generator = ProblemGenerator(6, 3, seed=1)
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    matrix_path = tmp_path / 'criteria_matrix.json'
+    matrix_path.write_text(json.dumps({'criteria': generator.criteria, 'matrix': INCONSISTENT_MATRIX}),
+                           encoding='utf-8')
+    output_dir = tmp_path / 'results'
+
+    argv = [file_path, '--criteria-matrix', str(matrix_path), '--output-dir', str(output_dir),
+            '--verbosity', 'silent']
+    assert CommandLine().run(argv + ['--max-cr', '0.1']) == Config.EXIT_ANALYSIS_FAILED
+    assert not output_dir.exists() or not any(output_dir.iterdir())
+
+    assert CommandLine().run(argv + ['--max-cr', '10']) == Config.EXIT_OK
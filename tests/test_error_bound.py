@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from analysis_api import analyze
+from config import Config
+from ds_ahp_analyzer import DSAHPAnalyzer
+from problem_generator import ProblemGenerator
+
+
+@pytest.fixture
+def generator():
+    return ProblemGenerator(8, 4, seed=7)
+
+
+@pytest.fixture
+def analyzer(generator, tmp_path):
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    analyzer.dempster_combiner.set_focal_budget(3)
+    assert analyzer.run_headless(file_path, generator.criteria_weights()) is not None
+    assert analyzer.belief_calculator.get_error_bound() > 0.0
+    return analyzer
+
+
+def test_intervals_are_raw_and_widened_only_for_reports(analyzer):
+    calculator = analyzer.belief_calculator
+    error_bound = calculator.get_error_bound()
+    beliefs = calculator.get_belief_functions()
+    plausibilities = calculator.get_plausibility_functions()
+
+    assert calculator.get_intervals() == {alt: (beliefs[alt], plausibilities[alt]) for alt in beliefs}
+    assert calculator.get_reported_intervals() == {
+        alt: (max(0.0, beliefs[alt] - error_bound), min(1.0, plausibilities[alt] + error_bound))
+        for alt in beliefs
+    }
+    assert analyzer.get_results()['intervals'] == calculator.get_reported_intervals()
+
+
+def test_sweep_scores_match_ranking_scores(analyzer):
+    calculator = analyzer.belief_calculator
+    gamma = analyzer.get_pessimism_coefficient()
+
+    sweep = calculator.sweep_pessimism([gamma])
+    scores = dict(zip(sweep['alternatives'], sweep['scores'][0].tolist()))
+    assert scores == pytest.approx(calculator.get_scores(), abs=1e-15)
+    assert [alt for alt, _ in calculator.get_ranking()] == [sweep['alternatives'][i] for i in sweep['rankings'][0]]
+
+
+def test_analysis_result_intervals_match_calculator(analyzer, generator, tmp_path):
+    result = analyze(str(tmp_path / 'problem.xml'), generator.criteria_weights(), max_focal_elements=3)
+    calculator = analyzer.belief_calculator
+
+    assert result.error_bound == calculator.get_error_bound()
+    assert result.get_intervals() == calculator.get_intervals()
+    assert result.get_reported_intervals() == calculator.get_reported_intervals()
+    assert result.as_dict()['intervals'] == result.get_reported_intervals()
+    assert np.array_equal(result.belief, [interval[0] for _, interval in sorted(result.get_intervals().items())])
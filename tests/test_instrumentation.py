@@ -0,0 +1,33 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from config import Config
+from ds_ahp_analyzer import DSAHPAnalyzer
+from problem_generator import ProblemGenerator
+
+ANALYSIS_STAGES = ['load', 'weights', 'transform', 'probabilities', 'combination', 'belief', 'ranking', 'export']
+
+
+@pytest.mark.parametrize('defer_export', [False, True])
+def test_exported_instrumentation_contains_every_stage(tmp_path, defer_export):
+    generator = ProblemGenerator(8, 4, seed=3)
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path), 'ranking')
+    analyzer.set_instrumentation(memory=False)
+    analyzer.defer_export = defer_export
+    assert analyzer.run_headless(file_path, generator.criteria_weights()) is not None
+    xml_file, json_file, _ = analyzer.finish_export()
+
+    with open(json_file, encoding='utf-8') as f:
+        exported = [record['stage'] for record in json.load(f)['instrumentation']['stages']]
+    assert exported == ANALYSIS_STAGES
+    assert [stage.get('name') for stage in ET.parse(xml_file).getroot().iter('stage')] == ANALYSIS_STAGES
+
+    # Запись файлов замеряется после снятия замеров для файлов
+    reported = [record['stage'] for record in analyzer.get_results()['instrumentation']['stages']]
+    assert reported == ANALYSIS_STAGES + ['export_write']
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from labelled_matrix import LabelledMatrix
+from matrix_processor import MatrixProcessor
+
+
+def transform_elementwise(values, criterion_weight):
+    """Исходное поэлементное правило преобразования (эталон)"""
+    transformed = values.copy()
+    for i in range(values.shape[0]):
+        for j in range(values.shape[1]):
+            value = values[i, j]
+            if i == j or value == 0:
+                continue
+            if value >= 1:
+                transformed[i, j] = value * criterion_weight
+            elif value < 1:
+                transformed[i, j] = value / criterion_weight
+    return transformed
+
+
+def random_truncated(rng, rows, cols):
+    """Матрица со значениями по шкале Саати, обратными значениями, единицами и нулями"""
+    scale = np.concatenate([np.arange(1, 10), 1.0 / np.arange(2, 10)])
+    values = rng.choice(scale, size=(rows, cols))
+    values[rng.random((rows, cols)) < 0.3] = 0.0
+    return values
+
+
+def labelled(values, prefix):
+    rows, cols = values.shape
+    return LabelledMatrix(values, [f"{prefix}{i}" for i in range(rows)], [f"{prefix}{j}" for j in range(cols)])
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (3, 3), (6, 6), (4, 7), (7, 4)])
+def test_transform_values_matches_elementwise(shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(20):
+        values = random_truncated(rng, *shape)
+        weight = rng.uniform(0.01, 1.0)
+        np.testing.assert_array_equal(MatrixProcessor.transform_values(values, weight),
+                                      transform_elementwise(values, weight))
+
+
+def test_transform_values_stack_matches_elementwise():
+    rng = np.random.default_rng(1)
+    stack = np.stack([random_truncated(rng, 5, 5) for _ in range(4)])
+    weights = rng.uniform(0.05, 0.9, size=4)
+
+    transformed = MatrixProcessor.transform_values(stack, weights)
+
+    for values, weight, result in zip(stack, weights, transformed):
+        np.testing.assert_array_equal(result, transform_elementwise(values, weight))
+
+
+def test_transform_batch_mixed_shapes_matches_elementwise():
+    rng = np.random.default_rng(2)
+    shapes = [(3, 3), (5, 5), (3, 3), (4, 6), (5, 5), (2, 2), (3, 3)]
+    matrices = {f"c{k}": labelled(random_truncated(rng, *shape), f"g{k}_") for k, shape in enumerate(shapes)}
+    weights = {criterion: rng.uniform(0.05, 0.9) for criterion in matrices}
+
+    transformed = MatrixProcessor().transform_batch(matrices, weights)
+
+    assert list(transformed) == list(matrices)
+    for criterion, matrix in matrices.items():
+        assert transformed[criterion].row_labels == matrix.row_labels
+        assert transformed[criterion].col_labels == matrix.col_labels
+        np.testing.assert_array_equal(transformed[criterion].values,
+                                      transform_elementwise(matrix.values, weights[criterion]))
@@ -0,0 +1,86 @@
+import builtins
+
+import numpy as np
+import pytest
+
+from config import Config
+from ds_ahp_analyzer import DSAHPAnalyzer
+from menu import Menu
+from pessimism_sweep import PessimismSweep
+from problem_generator import ProblemGenerator
+
+
+def test_crossing_gamma_computed_by_hand():
+    # A: 0.8 - 0.6γ, B: 0.5 - 0.1γ - равны при γ = 0.3 / 0.5 = 0.6
+    sweep = PessimismSweep({'A': (0.2, 0.8), 'B': (0.4, 0.5)})
+    result = sweep.run([0.0, 0.25, 0.5, 0.75, 1.0])
+
+    assert result['breakpoints'] == pytest.approx([0.6])
+    assert [segment['ranking'] for segment in result['segments']] == [['A', 'B'], ['B', 'A']]
+    assert result['segments'][0]['end'] == pytest.approx(0.6)
+    assert result['optimal_alternatives'] == ['A', 'A', 'A', 'B', 'B']
+    assert result['scores'][:, 0] == pytest.approx([0.8, 0.65, 0.5, 0.35, 0.2])
+
+
+def test_ties_keep_original_order():
+    # B и C совпадают при любом γ, A и B - только в точке пересечения γ = 0.6
+    sweep = PessimismSweep({'A': (0.2, 0.8), 'B': (0.4, 0.5), 'C': (0.4, 0.5)})
+    result = sweep.run([0.0, 0.6, 1.0])
+
+    assert result['breakpoints'] == pytest.approx([0.6])
+    assert [sweep.alternatives[index] for index in result['rankings'][1]] == ['A', 'B', 'C']
+    assert [sweep.alternatives[index] for index in result['rankings'][2]] == ['B', 'C', 'A']
+
+    # Альтернатива, совпадающая с лидером, не вытесняет его
+    identical = PessimismSweep({'A': (0.3, 0.6), 'B': (0.3, 0.6)}).run()
+    assert identical['breakpoints'] == []
+    assert identical['segments'][0]['ranking'] == ['A', 'B']
+    assert set(identical['optimal_alternatives']) == {'A'}
+
+
+def test_no_crossing_gives_single_segment():
+    sweep = PessimismSweep({'A': (0.5, 0.9), 'B': (0.1, 0.4), 'C': (0.0, 0.3)})
+    result = sweep.run()
+
+    assert result['breakpoints'] == []
+    assert len(result['segments']) == 1
+    segment = result['segments'][0]
+    assert (segment['start'], segment['end']) == (Config.MIN_PESSIMISM_COEFFICIENT, Config.MAX_PESSIMISM_COEFFICIENT)
+    assert segment['ranking'] == ['A', 'B', 'C']
+    assert segment['optimal_alternative'] == 'A'
+    assert len(result['gammas']) == Config.PESSIMISM_SWEEP_POINTS
+    assert (result['rankings'] == np.array([0, 1, 2])).all()
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    generator = ProblemGenerator(6, 3, seed=2)
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    assert analyzer.run_headless(generator.write(str(tmp_path / 'problem.xml')), generator.criteria_weights())
+    return analyzer
+
+
+def test_menu_runs_sweep_on_last_results(analyzer, monkeypatch):
+    monkeypatch.setattr(analyzer, 'load_xml', lambda *args: pytest.fail("XML загружается повторно"))
+    monkeypatch.setattr(builtins, 'input', lambda prompt='': '11')
+
+    Menu(analyzer)._run_pessimism_sweep()
+    assert analyzer.sweep_files is not None
+
+
+def test_menu_reranks_on_new_pessimism_coefficient(analyzer, monkeypatch):
+    monkeypatch.setattr(analyzer, 'load_xml', lambda *args: pytest.fail("XML загружается повторно"))
+    monkeypatch.setattr(builtins, 'input', lambda prompt='': '1.0')
+
+    Menu(analyzer)._change_pessimism_coefficient()
+    expected = analyzer.belief_calculator.sweep_pessimism([1.0])['optimal_alternatives'][0]
+    assert analyzer.get_pessimism_coefficient() == 1.0
+    assert analyzer.get_results()['optimal_alternative'] == expected
+
+
+def test_menu_sweep_requires_analysis(monkeypatch, capsys):
+    monkeypatch.setattr(builtins, 'input', lambda prompt='': pytest.fail("Лишний запрос ввода"))
+    Menu(DSAHPAnalyzer())._run_pessimism_sweep()
+    assert "Сначала выполните анализ" in capsys.readouterr().out
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from cli import CommandLine
+from config import Config
+from ds_ahp_analyzer import DSAHPAnalyzer
+from problem_generator import ProblemGenerator
+from result_store import ResultStore
+from utils import Utils
+
+
+def test_stored_hash_describes_the_analysed_file(tmp_path):
+    generator = ProblemGenerator(8, 4, seed=3)
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    analysed_hash = ResultStore.input_hash(file_path)
+
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    analyzer.set_hash_inputs(True)
+    optimal = analyzer.run_headless(file_path, generator.criteria_weights())
+    record = CommandLine.result_record(file_path, analyzer, optimal, 0.0)
+
+    # Файл меняется после анализа, но до записи результатов пакета
+    ProblemGenerator(8, 4, seed=4).write(file_path)
+    assert ResultStore.input_hash(file_path) != analysed_hash
+
+    store = ResultStore(str(tmp_path / 'results.db'))
+    try:
+        run_id = store.add_run(record, {'pessimism': 0.5})
+        assert store.get_run(run_id)['input_hash'] == analysed_hash
+        assert [run['id'] for run in store.find_runs(input_hash=analysed_hash)] == [run_id]
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_input_is_hashed_only_for_store_or_cache(tmp_path, monkeypatch, streaming):
+    generator = ProblemGenerator(8, 4, seed=3)
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    weights_path = tmp_path / 'weights.json'
+    weights_path.write_text(json.dumps(generator.criteria_weights()), encoding='utf-8')
+
+    hashed = []
+    file_hash = Utils.file_hash
+    monkeypatch.setattr(Utils, 'file_hash', staticmethod(lambda path: hashed.append(path) or file_hash(path)))
+
+    argv = [file_path, '--weights', str(weights_path), '--output-dir', str(tmp_path / 'results'),
+            '--verbosity', 'silent'] + (['--streaming'] if streaming else [])
+    assert CommandLine().run(argv) == Config.EXIT_OK
+    assert hashed == []
+
+    db_path = str(tmp_path / 'results.db')
+    assert CommandLine().run(argv + ['--store', db_path]) == Config.EXIT_OK
+    assert hashed == [file_path]
+
+    store = ResultStore(db_path)
+    try:
+        assert [run['input_hash'] for run in store.find_runs()] == [file_hash(file_path)]
+    finally:
+        store.close()
+
+    # Кэшу этапов хэш нужен как ключ (потоковый режим кэш не использует)
+    hashed.clear()
+    assert CommandLine().run(argv + ['--cache-dir', str(tmp_path / 'cache')]) == Config.EXIT_OK
+    assert hashed == ([] if streaming else [file_path])
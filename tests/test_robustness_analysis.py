@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from config import Config
+from ds_ahp_analyzer import DSAHPAnalyzer
+from problem_generator import ProblemGenerator
+from robustness_analysis import RobustnessAnalyzer
+
+# A выделяется каждым критерием - оптимальна при любых весах
+DOMINANT_XML = """<?xml version='1.0' encoding='utf-8'?>
+<ds_ahp_analysis>
+  <metadata>
+    <criteria_count>2</criteria_count>
+    <alternatives>A,B,C</alternatives>
+  </metadata>
+  <criteria>
+    <criterion id="1" name="c1">
+      <matrix>
+        <row group="A"><column group="A">1</column><column group="ALL">5</column></row>
+        <row group="ALL"><column group="A">1/5</column><column group="ALL">1</column></row>
+      </matrix>
+    </criterion>
+    <criterion id="2" name="c2">
+      <matrix>
+        <row group="A"><column group="A">1</column><column group="ALL">3</column></row>
+        <row group="ALL"><column group="A">1/3</column><column group="ALL">1</column></row>
+      </matrix>
+    </criterion>
+  </criteria>
+</ds_ahp_analysis>
+"""
+
+# Матрица сравнения трех критериев (CR < 0.1)
+CRITERIA_MATRIX = [[1.0, 3.0, 5.0], [1 / 3, 1.0, 2.0], [1 / 5, 1 / 2, 1.0]]
+
+SAMPLES = 300
+
+
+def new_analyzer(tmp_path):
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    return analyzer
+
+
+@pytest.fixture
+def generated(tmp_path):
+    """
+    Анализатор после автоматического расчета весов по матрице сравнения критериев;
+    ранжирование задачи меняется при изменении весов обоими методами выборки
+    """
+    generator = ProblemGenerator(6, 3, seed=17)
+    analyzer = new_analyzer(tmp_path)
+    analyzer.set_weight_method(Config.WEIGHT_METHOD_AUTO)
+    assert analyzer.run_headless(generator.write(str(tmp_path / 'problem.xml')),
+                                 criteria_matrix=CRITERIA_MATRIX) is not None
+    return analyzer
+
+
+@pytest.mark.parametrize('method', Config.ROBUSTNESS_METHODS)
+def test_rank_acceptability_rows_sum_to_one(generated, method):
+    results = generated.run_robustness_analysis(samples=SAMPLES, method=method, max_workers=1, seed=5)
+
+    acceptability = results['rank_acceptability']
+    assert acceptability.shape == (6, 6)
+    assert ((acceptability > 0) & (acceptability < 1)).any()
+    assert acceptability.sum(axis=1) == pytest.approx(np.ones(6))
+    assert acceptability.sum(axis=0) == pytest.approx(np.ones(6))
+    assert results['optimal_frequency'].sum() == pytest.approx(1.0)
+    assert generated.robustness_files is not None
+
+
+def test_dominant_alternative_is_always_optimal(tmp_path):
+    file_path = tmp_path / 'dominant.xml'
+    file_path.write_text(DOMINANT_XML, encoding='utf-8')
+    analyzer = new_analyzer(tmp_path)
+    assert analyzer.run_headless(str(file_path), {'c1': 0.7, 'c2': 0.3}) == 'A'
+
+    results = analyzer.run_robustness_analysis(samples=SAMPLES, max_workers=1, seed=1)
+    assert results['optimal_frequency'].tolist() == [1.0, 0.0, 0.0]
+    assert results['rank_acceptability'][0, 0] == 1.0
+    assert results['confidence_factors'][0] == 1.0
+    assert np.isnan(results['confidence_factors'][1:]).all()
+
+
+@pytest.mark.parametrize('method', Config.ROBUSTNESS_METHODS)
+def test_fixed_seed_is_reproducible(generated, method):
+    first = generated.run_robustness_analysis(samples=SAMPLES, method=method, max_workers=1, seed=11)
+    second = generated.run_robustness_analysis(samples=SAMPLES, method=method, max_workers=1, seed=11)
+    other = generated.run_robustness_analysis(samples=SAMPLES, method=method, max_workers=1, seed=12)
+
+    for key in ('rank_acceptability', 'optimal_frequency', 'central_weights', 'confidence_factors'):
+        np.testing.assert_array_equal(first[key], second[key])
+    assert not np.array_equal(first['rank_acceptability'], other['rank_acceptability'])
+
+
+@pytest.mark.parametrize('method', Config.ROBUSTNESS_METHODS)
+def test_pooled_run_matches_single_process(generated, method):
+    def run(max_workers):
+        analyzer = RobustnessAnalyzer(generated.criteria_matrices, generated.xml_parser.get_frame(),
+                                      generated.pessimism_coefficient, max_workers=max_workers, batch_size=64)
+        return analyzer.run(generated.weight_calculator.get_weights(), samples=SAMPLES, method=method,
+                            criteria_matrix=CRITERIA_MATRIX, confidence_samples=200, seed=3)
+
+    single, pooled = run(1), run(3)
+    for key in ('rank_acceptability', 'optimal_frequency', 'central_weights', 'confidence_factors'):
+        np.testing.assert_array_equal(pooled[key], single[key])
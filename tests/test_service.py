@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+import os
+import signal
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from service import WARMUP_PROBLEM, WARMUP_WEIGHTS, AnalysisService, worker_pid
+
+_fake_pids = itertools.count(1000)
+
+
+class FakeExecutor(Executor):
+    """Пул без процессов: анализы завершаются вручную, прогрев - сразу"""
+
+    def __init__(self):
+        self.futures = []
+        self.warmups = 0
+        self.shutdowns = 0
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        if fn is worker_pid:
+            self.warmups += 1
+            future.set_result(next(_fake_pids))
+        else:
+            self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shutdowns += 1
+
+
+def test_broken_pool_is_recreated_once_for_concurrent_analyses():
+    async def scenario():
+        service = AnalysisService(workers=3)
+        broken = FakeExecutor()
+        created = []
+        service.create_executor = lambda: created.append(FakeExecutor()) or created[-1]
+        service.executor = broken
+        service.queue = asyncio.Queue()
+        dispatchers = [asyncio.create_task(service.dispatch()) for _ in range(3)]
+
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in range(3)]
+        for i, future in enumerate(futures):
+            service.queue.put_nowait((future, f'problem{i}', {}, {}, time.perf_counter()))
+        while len(broken.futures) < 3:
+            await asyncio.sleep(0)
+
+        # Аварийное завершение процесса ломает все выполняемые в пуле анализы
+        for future in broken.futures:
+            future.set_exception(BrokenProcessPool('процесс завершился'))
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        while not service.worker_pids:
+            await asyncio.sleep(0)
+
+        for task in dispatchers:
+            task.cancel()
+        await asyncio.gather(*dispatchers, return_exceptions=True)
+        return service, broken, created, results
+
+    service, broken, created, results = asyncio.run(scenario())
+    assert all(isinstance(result, BrokenProcessPool) for result in results)
+    assert broken.shutdowns == 1
+    assert len(created) == 1 and service.executor is created[0]
+    assert service.counters['failed'] == 3
+
+    # Новый пул прогрет так же, как при старте, и его процессы учтены
+    assert created[0].warmups == 3
+    assert len(service.worker_pids) == 3
+
+
+def test_recreated_pool_is_warmed_and_reports_live_workers():
+    async def scenario():
+        service = AnalysisService(port=0, workers=1)
+        await service.start()
+        try:
+            old_pids = service.worker_pids
+            os.kill(old_pids[0], signal.SIGKILL)
+
+            future, _ = service.submit('warmup', WARMUP_PROBLEM, {'weights': WARMUP_WEIGHTS})
+            with pytest.raises(BrokenProcessPool):
+                await future
+            while service.worker_pids in ([], old_pids):
+                await asyncio.sleep(0.01)
+
+            # Следующий анализ выполняется уже прогретым процессом
+            future, _ = service.submit('warmup', WARMUP_PROBLEM, {'weights': WARMUP_WEIGHTS})
+            await future
+            health = await service.handle_health({}, {}, b'')
+            return old_pids, service.worker_pids, health
+        finally:
+            await service.stop()
+
+    old_pids, new_pids, health = asyncio.run(scenario())
+    assert len(new_pids) == 1 and new_pids != old_pids
+    assert health['workers'] == 1
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='требуется /proc')
+def test_recreated_pool_does_not_inherit_sockets():
+    async def scenario():
+        service = AnalysisService(port=0, workers=1)
+        await service.start()
+        try:
+            # Пул, пересозданный при работающем сервере
+            service.executor.shutdown()
+            service.executor = service.create_executor()
+            pid = await asyncio.get_running_loop().run_in_executor(service.executor, worker_pid)
+            listening = os.fstat(service.server.sockets[0].fileno()).st_ino
+            descriptors = {os.readlink(f'/proc/{pid}/fd/{fd}') for fd in os.listdir(f'/proc/{pid}/fd')}
+        finally:
+            await service.stop()
+        return listening, descriptors
+
+    listening, descriptors = asyncio.run(scenario())
+    assert f'socket:[{listening}]' not in descriptors
@@ -0,0 +1,99 @@
+import json
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+import stage_cache
+from stage_cache import StageCache
+
+
+def store_entry(cache, index, file_key='file', size=4096):
+    cache.store_combined(file_key, f'key{index}', {'A': 1.0}, [0.0] * (size // 8))
+
+
+def worker_file_keys(cache_dir, paths):
+    cache = StageCache(cache_dir)
+    for path in paths:
+        cache.file_key(path)
+
+
+@pytest.mark.parametrize('damage', [b'', b'not a zip file', b'PK\x03\x04' + b'\x00' * 40])
+def test_damaged_entry_is_a_miss_and_removed(tmp_path, damage):
+    cache = StageCache(str(tmp_path))
+    cache.store_combined('file', 'key', {'A': 0.7, 'ALL': 0.3}, [0.1], 0.0)
+    path = cache._entry_path('file', 'combined', 'key')
+    with open(path, 'wb') as f:
+        f.write(damage)
+
+    assert cache.load_combined('file', 'key') is None
+    assert cache.misses == 1
+    assert not os.path.exists(path)
+
+    # Следующий запуск записывает этап заново
+    cache.store_combined('file', 'key', {'A': 0.7, 'ALL': 0.3}, [0.1], 0.0)
+    assert cache.load_combined('file', 'key') == ({'A': 0.7, 'ALL': 0.3}, [0.1], 0.0)
+
+
+def test_eviction_keeps_size_bounded_without_walking_on_every_store(tmp_path, monkeypatch):
+    cache = StageCache(str(tmp_path), max_size_mb=0.1)
+    walks = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda: walks.append(1) or entries())
+
+    for i in range(200):
+        store_entry(cache, i)
+
+    assert cache.size() <= cache.max_bytes
+    assert len(walks) < 40
+    # Последние записи сохранены
+    assert cache.load_combined('file', 'key199') is not None
+
+
+def test_evict_tolerates_directories_removed_concurrently(tmp_path, monkeypatch):
+    cache = StageCache(str(tmp_path), max_size_mb=0.01)
+
+    def rmdir(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(stage_cache.os, 'rmdir', rmdir)
+    # Каждая запись в своем каталоге: очистка пытается удалить опустевшие каталоги
+    for i in range(10):
+        store_entry(cache, i, file_key=f'file{i}')
+    assert cache.size() <= cache.max_bytes
+
+
+def test_index_updates_from_concurrent_processes_are_not_lost(tmp_path):
+    files = []
+    for i in range(40):
+        path = tmp_path / f'problem{i}.xml'
+        path.write_text(f'<problem id="{i}"/>')
+        files.append(str(path))
+
+    cache_dir = str(tmp_path / 'cache')
+    StageCache(cache_dir)
+    processes = [multiprocessing.Process(target=worker_file_keys, args=(cache_dir, files[i::4]))
+                 for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    with open(os.path.join(cache_dir, StageCache.INDEX_FILE), encoding='utf-8') as f:
+        index = json.load(f)
+    assert set(index) == {os.path.abspath(path) for path in files}
+
+
+def test_changed_file_invalidates_old_entries(tmp_path):
+    problem = tmp_path / 'problem.xml'
+    problem.write_text('<first/>')
+    cache = StageCache(str(tmp_path / 'cache'))
+    old_key = cache.file_key(str(problem))
+    cache.store_combined(old_key, 'key', {'A': 1.0}, [], 0.0)
+
+    problem.write_text('<second/>')
+    assert cache.file_key(str(problem)) != old_key
+    assert cache.load_combined(old_key, 'key') is None
+    assert np.isclose(cache.size(), 0)
@@ -0,0 +1,105 @@
+import pytest
+
+from config import Config
+from dempster_combiner import DempsterCombiner
+from ds_ahp_analyzer import DSAHPAnalyzer
+from problem_generator import ProblemGenerator
+
+# c1 выделяет только A, c2 - B против группы A&C
+PROBLEM_XML = """<?xml version='1.0' encoding='utf-8'?>
+<ds_ahp_analysis>
+  <metadata>
+    <criteria_count>2</criteria_count>
+    <alternatives>A,B,C</alternatives>
+  </metadata>
+  <criteria>
+    <criterion id="1" name="c1">
+      <matrix>
+        <row group="A"><column group="A">1</column><column group="ALL">6</column></row>
+        <row group="ALL"><column group="A">1/6</column><column group="ALL">1</column></row>
+      </matrix>
+    </criterion>
+    <criterion id="2" name="c2">
+      <matrix>
+        <row group="B">
+          <column group="B">1</column><column group="A&amp;C">0</column><column group="ALL">9</column>
+        </row>
+        <row group="A&amp;C">
+          <column group="B">0</column><column group="A&amp;C">1</column><column group="ALL">2</column>
+        </row>
+        <row group="ALL">
+          <column group="B">1/9</column><column group="A&amp;C">1/2</column><column group="ALL">1</column>
+        </row>
+      </matrix>
+    </criterion>
+  </criteria>
+</ds_ahp_analysis>
+"""
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    file_path = tmp_path / 'problem.xml'
+    file_path.write_text(PROBLEM_XML, encoding='utf-8')
+
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    assert analyzer.run_headless(str(file_path), {'c1': 0.6, 'c2': 0.4}) == 'A'
+    return analyzer
+
+
+def test_update_without_interval_leader_returns_ranking_leader(analyzer):
+    analyzer.update_criterion('c1', weight=0.1)
+    optimal = analyzer.update_criterion('c2', weight=0.5)
+
+    calculator = analyzer.belief_calculator
+    assert calculator.find_best_by_interval() is None
+    assert calculator.get_ranking()[0][0] == 'B'
+    assert optimal == 'B'
+    assert analyzer.get_results()['optimal_alternative'] == 'B'
+
+
+def test_update_refreshes_conflict_history(analyzer):
+    initial = analyzer.dempster_combiner.get_conflict_history()
+    analyzer.update_criterion('c1', weight=0.1)
+
+    # Конфликты узлов дерева - отдельно от истории последовательного комбинирования
+    tree = analyzer.get_combination_tree()
+    assert initial
+    assert analyzer.dempster_combiner.get_conflict_history() == []
+    node_conflicts = analyzer.dempster_combiner.get_node_conflicts()
+    assert node_conflicts == [{'round': 1, 'criteria': ['c1', 'c2'], 'conflict': pytest.approx(tree.get_total_conflict())}]
+    assert node_conflicts[0]['conflict'] != pytest.approx(initial[0])
+
+
+
+def test_update_with_focal_budget_recombines_with_summarization(tmp_path):
+    generator = ProblemGenerator(8, 4, seed=3)
+    file_path = generator.write(str(tmp_path / 'problem.xml'))
+    analyzer = DSAHPAnalyzer()
+    analyzer.set_verbosity(Config.TRACE_SILENT)
+    analyzer.set_export_dir(str(tmp_path))
+    analyzer.dempster_combiner.set_focal_budget(3)
+    assert analyzer.run_headless(file_path, generator.criteria_weights()) is not None
+
+    criterion = generator.criteria[0]
+    optimal = analyzer.update_criterion(criterion, weight=0.05)
+
+    # Тот же результат, что и у последовательного комбинирования с бюджетом
+    frame = analyzer.xml_parser.get_frame()
+    expected = DempsterCombiner(frame)
+    expected.set_focal_budget(3)
+    expected.combine_evidence(analyzer.matrix_processor.get_basic_masses())
+    assert expected.get_error_bound() > 0.0
+
+    results = analyzer.get_results()
+    assert analyzer.combination_tree is None
+    assert analyzer.dempster_combiner.get_combined_masses() == pytest.approx(expected.get_combined_masses())
+    assert results['error_bound'] == pytest.approx(expected.get_error_bound())
+    assert results['conflict_history'] == pytest.approx(expected.get_conflict_history())
+    assert results['optimal_alternative'] == optimal
+
+    # Дерево без суммаризации с бюджетом не строится
+    with pytest.raises(ValueError):
+        analyzer.get_combination_tree()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from xml_parser import XMLParser
+
+
+def parse_elementwise(parser, value_texts):
+    return np.array([parser._parse_value(text) for text in value_texts], dtype=np.float64)
+
+
+def test_fractions_are_parsed_in_bulk(monkeypatch):
+    parser = XMLParser()
+    rng = np.random.default_rng(1)
+    value_texts = [str(value) for value in rng.integers(1, 10, 200)]
+    value_texts += [f"1/{value}" for value in rng.integers(2, 10, 200)]
+    value_texts += ['0', '1', '0.5', ' 3 ', '2 / 7', '1e-3', '-1/4']
+    rng.shuffle(value_texts)
+    expected = parse_elementwise(parser, value_texts)
+
+    def fail(value_text):
+        raise AssertionError(f"Поэлементный разбор ячейки '{value_text}'")
+
+    monkeypatch.setattr(parser, '_parse_value', fail)
+    assert np.array_equal(parser._parse_values(value_texts), expected)
+
+
+@pytest.mark.parametrize('bad', ['abc', '1/x', '1/2/3', '/3', ''])
+def test_bad_cells_fall_back_to_elementwise_parsing(bad, capsys):
+    parser = XMLParser()
+    value_texts = ['1', '1/3', bad, '5']
+    assert np.array_equal(parser._parse_values(value_texts), parse_elementwise(parser, value_texts))
+    if bad:
+        assert f"'{bad}'" in capsys.readouterr().out
+
+
+def test_zero_denominator_is_reported_like_elementwise_parsing():
+    with pytest.raises(ZeroDivisionError):
+        XMLParser()._parse_values(['1', '1/0'])
+
+
+def test_empty_matrix():
+    assert XMLParser()._parse_values([]).shape == (0,)
@@ -0,0 +1,70 @@
+import sys
+from config import Config
+
+
+class Tracer:
+    """
+    Вывод хода вычислений с уровнями подробности.
+
+    Сообщения передаются шаблоном str.format и аргументами и форматируются
+    только если соответствующий уровень включен. Пошаговый вывод можно
+    направить в файл, итоговый всегда идет в стандартный вывод.
+    Во внутренних циклах проверяйте флаг steps_enabled до подготовки аргументов.
+    """
+
+    def __init__(self, level=None, trace_file=None):
+        self.level = Config.DEFAULT_TRACE_LEVEL
+        self.trace_file = None
+        self.summary_enabled = True
+        self.steps_enabled = True
+        self._step_stream = None
+        self.configure(level, trace_file)
+
+    def configure(self, level=None, trace_file=None):
+        """Установить уровень подробности и файл для пошагового вывода"""
+        if level is None:
+            level = Config.DEFAULT_TRACE_LEVEL
+        if isinstance(level, str):
+            level = Config.TRACE_LEVEL_NAMES[level]
+
+        self.level = level
+        self.summary_enabled = level >= Config.TRACE_SUMMARY
+        self.steps_enabled = level >= Config.TRACE_STEPS
+
+        if trace_file is None:
+            trace_file = Config.TRACE_FILE
+        if trace_file != self.trace_file:
+            self.close()
+            self.trace_file = trace_file
+
+    def summary(self, message="", *args):
+        """Заголовки шагов и итоговые результаты"""
+        if self.summary_enabled:
+            self._write(sys.stdout, message, args)
+
+    def step(self, message="", *args):
+        """Подробный пошаговый вывод"""
+        if self.steps_enabled:
+            self._write(self._get_step_stream(), message, args)
+
+    def _get_step_stream(self):
+        """Поток для пошагового вывода: файл трассировки или стандартный вывод"""
+        if self.trace_file is None:
+            return sys.stdout
+        if self._step_stream is None:
+            self._step_stream = open(self.trace_file, 'w', encoding='utf-8')
+        return self._step_stream
+
+    @staticmethod
+    def _write(stream, message, args):
+        print(message.format(*args) if args else message, file=stream)
+
+    def close(self):
+        """Закрыть файл трассировки"""
+        if self._step_stream is not None:
+            self._step_stream.close()
+            self._step_stream = None
+
+
+# Общий трассировщик для всех этапов анализа
+tracer = Tracer()
@@ -1,6 +1,7 @@
-import pandas as pd
-import numpy as np
+import hashlib
+
 from config import Config
+from tracer import tracer
 
 
 class Utils:
@@ -41,12 +42,21 @@ class Utils:
             except ValueError:
                 print("Введите целое число!")
 
+    @staticmethod
+    def file_hash(file_path):
+        """Хэш содержимого файла (blake2b, 128 бит) в шестнадцатеричном виде"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
     @staticmethod
     def normalize_weights(weights):
         """Нормализация весов к сумме = 1"""
         total = sum(weights.values())
         if abs(total - 1.0) > 0.001:
-            print(f"Сумма весов ({total:.4f}) не равна 1. Нормализую...")
+            tracer.summary("Сумма весов ({:.4f}) не равна 1. Нормализую...", total)
             return {k: v / total for k, v in weights.items()}
         return weights
 
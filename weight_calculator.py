@@ -1,10 +1,21 @@
 import numpy as np
+from config import Config
 from utils import Utils
+from tracer import tracer
+from eigen_solver import EigenvectorSolver
 
 
 class WeightCalculator:
     def __init__(self):
         self.criteria_weights = {}
+        self.consistency = {}
+        self.criteria_matrix = None  # Матрица сравнения критериев автоматического метода
+        self.eigen_solver = EigenvectorSolver()
+        self.max_consistency_ratio = None  # Выше - матрица отклоняется (None - только предупреждение)
+
+    def set_max_consistency_ratio(self, max_consistency_ratio):
+        """Установить допустимое отношение согласованности CR матрицы сравнения критериев"""
+        self.max_consistency_ratio = max_consistency_ratio
 
     def calculate_weights_auto(self, criteria_names):
         """
@@ -45,21 +56,82 @@ class WeightCalculator:
 
         Utils.print_matrix_info(criteria_matrix, "Матрица парных сравнений критериев")
 
-        # Расчет вектора собственных значений
-        eigenvalues, eigenvectors = np.linalg.eig(criteria_matrix)
-        max_eigenvalue_index = np.argmax(eigenvalues.real)
-        weight_vector = eigenvectors[:, max_eigenvalue_index].real
+        return self.calculate_weights_from_matrix(criteria_names, criteria_matrix)
 
-        # Нормировка
-        weight_vector = np.abs(weight_vector) / np.abs(weight_vector).sum()
+    def calculate_weights_from_matrix(self, criteria_names, criteria_matrix):
+        """
+        Расчет весов критериев по готовой матрице парных сравнений
+        методом собственного вектора
+        """
+        criteria_matrix = np.asarray(criteria_matrix, dtype=float)
+        n = len(criteria_names)
+        if criteria_matrix.shape != (n, n):
+            raise ValueError(f"Матрица сравнения критериев должна иметь размер {n}x{n}, "
+                             f"получено {criteria_matrix.shape}")
+
+        self.criteria_matrix = criteria_matrix
+
+        # Главный собственный вектор степенным методом
+        solution = self.eigen_solver.solve(criteria_matrix)
+        self.consistency = {
+            'lambda_max': solution['lambda_max'],
+            'consistency_index': solution['consistency_index'],
+            'consistency_ratio': solution['consistency_ratio']
+        }
+        self.print_consistency()
+
+        consistency_ratio = solution['consistency_ratio']
+        if self.max_consistency_ratio is not None and consistency_ratio > self.max_consistency_ratio:
+            raise ValueError(f"Матрица сравнения критериев несогласована: CR = {consistency_ratio:.4f} "
+                             f"> {self.max_consistency_ratio}")
+        if consistency_ratio > Config.ACCEPTABLE_CONSISTENCY_RATIO:
+            print(f" Внимание: отношение согласованности CR = {consistency_ratio:.4f} "
+                  f"превышает {Config.ACCEPTABLE_CONSISTENCY_RATIO}")
+
+        weight_vector = solution['weights']
 
         # Сохранение весов
+        self.criteria_weights = {}
         for i, criterion in enumerate(criteria_names):
             self.criteria_weights[criterion] = weight_vector[i]
 
         self.print_weights()
         return self.criteria_weights.copy()
 
+    @staticmethod
+    def reorder_matrix(criteria_names, matrix_criteria, criteria_matrix):
+        """
+        Перестановка матрицы сравнения критериев, заданной в порядке matrix_criteria,
+        в порядок criteria_names
+        """
+        missing = [criterion for criterion in criteria_names if criterion not in matrix_criteria]
+        if missing:
+            raise ValueError(f"В матрице сравнения нет критериев: {missing}")
+
+        criteria_matrix = np.asarray(criteria_matrix, dtype=float)
+        order = [list(matrix_criteria).index(criterion) for criterion in criteria_names]
+        return criteria_matrix[np.ix_(order, order)]
+
+    def set_weights(self, criteria_names, weights):
+        """
+        Установка готовых весов критериев (например, из файла) с проверкой и нормализацией
+        """
+        missing = [criterion for criterion in criteria_names if criterion not in weights]
+        if missing:
+            raise ValueError(f"Не заданы веса для критериев: {missing}")
+
+        for criterion in criteria_names:
+            if weights[criterion] <= 0:
+                raise ValueError(f"Вес критерия '{criterion}' должен быть положительным")
+
+        self.criteria_matrix = None
+        self.criteria_weights = Utils.normalize_weights(
+            {criterion: float(weights[criterion]) for criterion in criteria_names}
+        )
+        self.print_weights()
+
+        return self.criteria_weights.copy()
+
     def get_which_is_better(self, crit1, crit2):
         while True:
             print(f"Какой критерий важнее?")
@@ -115,6 +187,7 @@ class WeightCalculator:
             weights[criterion] = weight
 
         # Нормализация весов
+        self.criteria_matrix = None
         self.criteria_weights = Utils.normalize_weights(weights)
         self.print_weights()
 
@@ -122,12 +195,27 @@ class WeightCalculator:
 
     def print_weights(self):
         """Вывод весов критериев"""
-        print("\nВеса критериев:")
+        tracer.summary("\nВеса критериев:")
         for criterion, weight in self.criteria_weights.items():
-            print(f"  {criterion}: {weight:.4f}")
+            tracer.summary("  {}: {:.4f}", criterion, weight)
 
         final_sum = sum(self.criteria_weights.values())
-        print(f"Итоговая сумма весов: {final_sum:.6f}")
+        tracer.summary("Итоговая сумма весов: {:.6f}", final_sum)
+
+    def print_consistency(self):
+        """Вывод показателей согласованности матрицы сравнения критериев"""
+        tracer.summary("\nСогласованность матрицы сравнения критериев:")
+        tracer.summary("  λmax = {:.6f}", self.consistency['lambda_max'])
+        tracer.summary("  CI = {:.6f}", self.consistency['consistency_index'])
+        tracer.summary("  CR = {:.6f}", self.consistency['consistency_ratio'])
+
+    def get_consistency(self):
+        """Получить λmax, CI и CR последней матрицы сравнения критериев"""
+        return self.consistency.copy()
+
+    def get_criteria_matrix(self):
+        """Получить матрицу сравнения критериев (None для ручного ввода весов)"""
+        return None if self.criteria_matrix is None else self.criteria_matrix.copy()
 
     def get_weights(self):
         """Получить текущие веса критериев"""
@@ -1,7 +1,10 @@
 import xml.etree.ElementTree as ET
-import pandas as pd
+import numpy as np
 import os
 from utils import Utils
+from frame_of_discernment import FrameOfDiscernment
+from labelled_matrix import LabelledMatrix
+from tracer import tracer
 
 
 class XMLParser:
@@ -10,6 +13,7 @@ class XMLParser:
         self.alternatives = set()  # Только отдельные альтернативы (без ALL)
         self.criteria_data = {}  # словарь: название критерия -> матрица
         self.criteria_count = 0
+        self.frame = None  # Фрейм различения (маски групп)
 
     def parse_xml_file(self, file_path):
         """
@@ -25,69 +29,17 @@ class XMLParser:
             return False
 
         try:
-            print(f"\n Чтение XML файла: {file_path}")
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            tracer.summary("\n Чтение XML файла: {}", file_path)
 
-            # Проверяем корневой элемент
-            if root.tag != 'ds_ahp_analysis':
-                print(" Неверный формат XML файла. Ожидается корневой элемент 'ds_ahp_analysis'")
-                return False
-
-            # Сбрасываем предыдущие данные
-            self.reset()
-
-            # Читаем метаданные
-            metadata = root.find('metadata')
-            if metadata is not None:
-                criteria_count_elem = metadata.find('criteria_count')
-                if criteria_count_elem is not None:
-                    self.criteria_count = int(criteria_count_elem.text)
-                    if self.criteria_count < 2:
-                        print(" Внимание: XML файл содержит менее 2 критериев")
-
-                alternatives_elem = metadata.find('alternatives')
-                if alternatives_elem is not None:
-                    alternatives_str = alternatives_elem.text
-                    if alternatives_str:
-                        # Парсим альтернативы из метаданных, исключая ALL
-                        alts = Utils.parse_group_string(alternatives_str)
-                        for alt in alts:
-                            if alt != 'ALL':
-                                self.alternatives.add(alt)
-
-            # Читаем все критерии
-            criteria_elem = root.find('criteria')
-            if criteria_elem is None:
-                print("Не найден элемент 'criteria' в XML")
-                return False
-
-            loaded_criteria = 0
-            for criterion_elem in criteria_elem.findall('criterion'):
-                criterion_name = criterion_elem.get('name')
-                if not criterion_name:
-                    print("Пропущен критерий без имени")
-                    continue
-
-                matrix_elem = criterion_elem.find('matrix')
-                if matrix_elem is None:
-                    print(f"Нет матрицы для критерия '{criterion_name}'")
-                    continue
+            criteria_data = {}
+            for criterion_name, matrix in self.iter_criteria(file_path):
+                criteria_data[criterion_name] = matrix
+            self.criteria_data = criteria_data
 
-                matrix_df = self._parse_matrix_element(matrix_elem)
-
-                if matrix_df is not None:
-                    self.criteria_data[criterion_name] = matrix_df
-                    loaded_criteria += 1
-
-            if loaded_criteria == 0:
+            if not self.criteria_data:
                 print("Не удалось загрузить ни одного критерия")
                 return False
 
-            # Удаляем ALL из альтернатив (если случайно попал)
-            if 'ALL' in self.alternatives:
-                self.alternatives.remove('ALL')
-
             return True
 
         except ET.ParseError as e:
@@ -97,64 +49,160 @@ class XMLParser:
             print(f"Ошибка при чтении файла {file_path}: {e}")
             return False
 
+    def iter_criteria(self, file_path):
+        """
+        Потоковое чтение XML (ET.iterparse): критерии выдаются по одному,
+        как только прочитан их элемент <criterion>, после чего разобранные
+        элементы удаляются из дерева. В памяти находится только текущий критерий.
+
+        Генератор выдает пары (название критерия, матрица). Альтернативы, группы
+        и фрейм различения становятся полными после исчерпания генератора.
+        Ошибки формата - ValueError, ошибки XML - ET.ParseError
+        """
+        # Сбрасываем предыдущие данные
+        self.reset()
+
+        root = None
+        criteria_elem = None
+
+        for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                    # Проверяем корневой элемент
+                    if root.tag != 'ds_ahp_analysis':
+                        raise ValueError("Неверный формат XML файла. "
+                                         "Ожидается корневой элемент 'ds_ahp_analysis'")
+                elif elem.tag == 'criteria' and criteria_elem is None:
+                    criteria_elem = elem
+                continue
+
+            if elem.tag == 'metadata':
+                self._parse_metadata(elem)
+                elem.clear()
+
+            elif elem.tag == 'criterion' and criteria_elem is not None:
+                criterion_name = elem.get('name')
+                matrix_elem = elem.find('matrix')
+                matrix = None
+
+                if not criterion_name:
+                    print("Пропущен критерий без имени")
+                elif matrix_elem is None:
+                    print(f"Нет матрицы для критерия '{criterion_name}'")
+                else:
+                    matrix = self._parse_matrix_element(matrix_elem)
+
+                # Освобождаем уже разобранные критерии
+                criteria_elem.clear()
+
+                if matrix is not None:
+                    yield criterion_name, matrix
+
+        if criteria_elem is None:
+            raise ValueError("Не найден элемент 'criteria' в XML")
+
+        # Удаляем ALL из альтернатив (если случайно попал)
+        self.alternatives.discard('ALL')
+
+        # Строим фрейм различения один раз для всех последующих шагов
+        self.frame = FrameOfDiscernment(self.alternatives)
+        self.frame.intern_groups(self.all_groups)
+
+    def _parse_metadata(self, metadata):
+        """Чтение метаданных: количество критериев и список альтернатив"""
+        criteria_count_elem = metadata.find('criteria_count')
+        if criteria_count_elem is not None:
+            self.criteria_count = int(criteria_count_elem.text)
+            if self.criteria_count < 2:
+                print(" Внимание: XML файл содержит менее 2 критериев")
+
+        alternatives_elem = metadata.find('alternatives')
+        if alternatives_elem is not None:
+            alternatives_str = alternatives_elem.text
+            if alternatives_str:
+                # Парсим альтернативы из метаданных, исключая ALL
+                self._add_alternatives(alternatives_str)
+
+    def _add_alternatives(self, group):
+        """Добавление отдельных альтернатив группы (без ALL)"""
+        if group == 'ALL':
+            return
+        for alt in Utils.parse_group_string(group):
+            if alt != 'ALL':
+                self.alternatives.add(alt)
+
     def _parse_matrix_element(self, matrix_elem):
-        """Парсинг элемента матрицы"""
+        """Парсинг элемента матрицы за один проход по строкам и столбцам"""
         if matrix_elem is None:
             return None
 
-            # Собираем все группы из строк и столбцов, сохраняя порядок
+        # Собираем все группы из строк и столбцов, сохраняя порядок
         row_groups = []
         col_groups_list = []  # Используем список для сохранения порядка
+        col_positions = {}  # группа столбца -> номер столбца
+        row_indices = []
+        col_indices = []
+        value_texts = []
 
         for row_elem in matrix_elem.findall('row'):
             row_group = row_elem.get('group')
-            if row_group:
-                row_groups.append(row_group)
-                self.all_groups.add(row_group)
-
-                # Извлекаем отдельные альтернативы
-                if row_group != 'ALL':
-                    alts = Utils.parse_group_string(row_group)
-                    for alt in alts:
-                        if alt != 'ALL':
-                            self.alternatives.add(alt)
-
-                for col_elem in row_elem.findall('column'):
-                    col_group = col_elem.get('group')
-                    if col_group:
-                        # Добавляем в список, если еще нет
-                        if col_group not in col_groups_list:
-                            col_groups_list.append(col_group)
-                        self.all_groups.add(col_group)
-
-                        # Извлекаем отдельные альтернативы
-                        if col_group != 'ALL':
-                            alts = Utils.parse_group_string(col_group)
-                            for alt in alts:
-                                if alt != 'ALL':
-                                    self.alternatives.add(alt)
-
-
-
-        # Создаем DataFrame с правильным порядком столбцов
-        df = pd.DataFrame(index=row_groups, columns=col_groups_list)
-
-        # Заполняем матрицу значениями
-        for row_elem in matrix_elem.findall('row'):
-            row_group = row_elem.get('group')
+            if not row_group:
+                continue
+
+            row_index = len(row_groups)
+            row_groups.append(row_group)
+            self.all_groups.add(row_group)
+            self._add_alternatives(row_group)
 
             for col_elem in row_elem.findall('column'):
                 col_group = col_elem.get('group')
-                value_text = col_elem.text.strip() if col_elem.text else "0"
+                if not col_group:
+                    continue
+
+                # Добавляем в список, если еще нет
+                col_index = col_positions.get(col_group)
+                if col_index is None:
+                    col_index = len(col_groups_list)
+                    col_positions[col_group] = col_index
+                    col_groups_list.append(col_group)
+                    self.all_groups.add(col_group)
+                    self._add_alternatives(col_group)
 
-                # Преобразуем значение
-                value = self._parse_value(value_text)
-                df.at[row_group, col_group] = value
+                row_indices.append(row_index)
+                col_indices.append(col_index)
+                value_texts.append(col_elem.text.strip() if col_elem.text else "0")
 
-        with pd.option_context('future.no_silent_downcasting', True):
-            df = df.fillna(0)
+        # Плотная матрица float64: отсутствующие ячейки - нули
+        values = np.zeros((len(row_groups), len(col_groups_list)), dtype=np.float64)
+        values[row_indices, col_indices] = self._parse_values(value_texts)
 
-        return df
+        return LabelledMatrix(values, row_groups, col_groups_list)
+
+    def _parse_values(self, value_texts):
+        """
+        Парсинг всех значений матрицы сразу. Числа преобразуются одним вызовом NumPy.
+        Если есть дроби вида '1/3', разбираются только различные значения (шкала
+        Саати и обратные дроби): строки один раз делятся по '/', числители и
+        знаменатели преобразуются двумя вызовами NumPy. Поэлементный разбор -
+        только чтобы сообщить о неверной ячейке
+        """
+        try:
+            return np.array(value_texts, dtype=np.float64)
+        except ValueError:
+            pass
+
+        texts, inverse = np.unique(np.array(value_texts, dtype=str), return_inverse=True)
+        numerators, separators, denominators = np.moveaxis(np.char.partition(texts, '/'), -1, 0)
+        try:
+            values = numerators.astype(np.float64)
+            divisors = np.where(separators == '/', denominators, '1').astype(np.float64)
+        except ValueError:
+            divisors = None
+
+        if divisors is None or not divisors.all():
+            return np.array([self._parse_value(text) for text in value_texts], dtype=np.float64)
+        return (values / divisors)[inverse.ravel()]
 
     def _parse_value(self, value_text):
         """Парсинг числового значения из строки"""
@@ -171,6 +219,17 @@ class XMLParser:
             print(f"⚠️  Не могу преобразовать значение: '{value_text}'")
             return 0.0
 
+    def load_parsed(self, criteria_data, alternatives, all_groups, criteria_count):
+        """Восстановление результата разбора (например, из кэша) без чтения XML"""
+        self.reset()
+        self.criteria_data = dict(criteria_data)
+        self.alternatives = set(alternatives) - {'ALL'}
+        self.all_groups = set(all_groups)
+        self.criteria_count = criteria_count
+
+        self.frame = FrameOfDiscernment(self.alternatives)
+        self.frame.intern_groups(self.all_groups)
+
     def get_criteria_matrices(self):
         """Получить все матрицы критериев"""
         return self.criteria_data.copy()
@@ -187,6 +246,10 @@ class XMLParser:
         """
         return self.all_groups.copy()
 
+    def get_frame(self):
+        """Получить фрейм различения (альтернатива -> бит, группа -> маска)"""
+        return self.frame
+
     def get_criteria_names(self):
         """Получить названия всех критериев"""
         return list(self.criteria_data.keys())
@@ -201,6 +264,7 @@ class XMLParser:
         self.alternatives = set()
         self.criteria_data = {}
         self.criteria_count = 0
+        self.frame = None
 
     def print_loaded_data_summary(self):
         """Вывод сводки по загруженным данным"""